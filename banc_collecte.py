@@ -0,0 +1,44 @@
+# banc_collecte.py
+# Banc d'essai hors-ligne du collecteur : compare le temps d'une collecte groupée,
+# séquentielle ou parallèle, avec le fournisseur synthétique qui simule la latence réseau et les pannes.
+
+import argparse
+import tempfile
+import time
+
+import collecteur_propre
+import rapport_collecte
+from fournisseurs import SyntheticProvider
+
+def run(tickers, provider, **kwargs):
+    """Lance une collecte complète dans un dossier temporaire et retourne sa durée et son rapport."""
+    with tempfile.TemporaryDirectory() as tmp:
+        report = rapport_collecte.RunReport(**kwargs)
+        start = time.perf_counter()
+        results, failures = collecteur_propre.collect(tickers, full=True, provider=provider, data_dir=tmp, report=report, **kwargs)
+        return time.perf_counter() - start, len(results), failures, report.to_dict()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare collecte groupée et collecte par ticker, hors-ligne.")
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.3, help="Latence simulée par appel (secondes).")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Probabilité d'échec simulée par appel.")
+    parser.add_argument('--batch-size', type=int, default=collecteur_propre.BATCH_SIZE)
+    parser.add_argument('--concurrency', type=int, default=collecteur_propre.CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=1000.0, help="Plafond de requêtes par seconde pendant le banc.")
+    args = parser.parse_args()
+
+    provider = SyntheticProvider(latency=args.latency, failure_rate=args.failure_rate)
+    # Un ticker inconnu du fournisseur pour vérifier le signalement des échecs
+    tickers = SyntheticProvider.universe(args.tickers) + ["UNKNOWN0"]
+    scenarios = [
+        ("Séquentiel", dict(batch_size=1, concurrency=1)),
+        (f"{args.concurrency} workers", dict(batch_size=1, concurrency=args.concurrency)),
+        (f"Lots de {args.batch_size}", dict(batch_size=args.batch_size, concurrency=args.concurrency)),
+    ]
+    for label, kwargs in scenarios:
+        provider.calls = 0
+        duration, ok, failures, report = run(tickers, provider, rate=args.rate, **kwargs)
+        latency = report["latency"] if report["latency"]["count"] else report["batch_latency"]
+        print(f"{label:<14} {duration:7.2f}s  {provider.calls:4d} appels  {ok / duration:6.1f} tickers/s  "
+              f"p50 {latency['p50']:.2f}s p95 {latency['p95']:.2f}s  relances: {report['totals']['retries']}  échecs: {sorted(failures)}")
@@ -0,0 +1,157 @@
+# banc_predictions.py
+# Banc d'essai hors-ligne du générateur de prédictions (page 5) : évaluation walk-forward sur les bougies
+# horaires stockées (ou synthétiques), pour tous les horizons, avec les règles du suivi (page 6) :
+# bonne direction et erreur dans les marges de 5 % et 10 %. Mesure aussi le débit d'entraînement
+# et d'inférence (lignes/s, modèles/s) et la mémoire maximale du processus.
+# Chaque passage est ajouté à un historique et comparé au précédent de même configuration.
+#
+#   python banc_predictions.py                          # tickers du magasin horaire
+#   python banc_predictions.py --synthetique 20         # données synthétiques reproductibles (sans réseau ni magasin)
+
+import argparse
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import stockage
+from historique import append_jsonl, load_jsonl
+from fournisseurs import SyntheticProvider
+from predictions import HORIZONS, FEATURES, CLOSE, TIMESTAMP, XGB_PARAMS, NUM_BOOST_ROUND, MIN_TRAINING_ROWS, feature_matrix, prediction_outcomes
+
+# --- Constantes ---
+HISTORY_FILE = "bancs_predictions.jsonl"
+# Un modèle est réentraîné toutes les STEP bougies (comme un scan par séance), sur les FOLDS derniers blocs
+STEP = 24
+FOLDS = 10
+SYNTHETIC_DAYS = 180
+
+def store_prices(tickers=None, root=stockage.HOURLY_DIR):
+    """Bougies horaires du magasin local : {ticker: DataFrame}."""
+    tickers = tickers or stockage.list_hourly_tickers(root)
+    prices = {ticker: stockage.read_hourly(ticker, root) for ticker in tickers}
+    return {ticker: data for ticker, data in prices.items() if not data.empty}
+
+def synthetic_prices(n, days=SYNTHETIC_DAYS, seed=42):
+    """Bougies horaires de `n` tickers synthétiques sur `days` jours (mêmes données à chaque passage pour une graine donnée).
+    L'historique est ancré sur l'origine du générateur, pas sur aujourd'hui : deux passages à des dates différentes sont comparables."""
+    provider = SyntheticProvider(seed=seed)
+    start = SyntheticProvider.INTRADAY_ORIGIN
+    return {ticker: provider.history(ticker, interval='1h', start=start, end=start + pd.Timedelta(days=days))
+            for ticker in SyntheticProvider.universe(n)}
+
+def walk_forward(values, horizons=HORIZONS, step=STEP, folds=FOLDS, window=None, min_rows=MIN_TRAINING_ROWS, nthread=None, timings=None):
+    """Évaluation walk-forward d'une matrice de feature_matrix. Pour chaque horizon de `h` bougies,
+    les `folds * step` dernières origines dont le prix réel est connu sont découpées en blocs de `step` :
+    au début de chaque bloc, un modèle est entraîné sur les seules bougies dont la cible était déjà connue
+    (toutes, ou les `window` dernières), puis prédit chaque origine du bloc. Aucune donnée future n'entre dans un modèle.
+    Retourne un DataFrame (Horizon, Timestamp, Prix Actuel, Prix Prédit, Prix Réel) ; `timings` (dict) cumule
+    les temps et volumes d'entraînement et d'inférence."""
+    import xgboost as xgb  # Import tardif, comme dans predictions.py
+    timings = timings if timings is not None else {}
+    params = {**XGB_PARAMS, **({"nthread": nthread} if nthread else {})}
+    matrix = xgb.DMatrix(values[:, :CLOSE], feature_names=FEATURES, nthread=nthread or -1)
+    rows = []
+    for label, hours in horizons.items():
+        end = len(values) - hours  # Dernière origine exclue dont le prix réel est connu
+        first = max(end - folds * step, min_rows + hours)
+        for block_start in range(first, end, step):
+            train_rows = np.arange(0 if window is None else max(0, block_start - hours + 1 - window), block_start - hours + 1)
+            origins = np.arange(block_start, min(block_start + step, end))
+            start = time.perf_counter()
+            train = matrix.slice(train_rows); train.set_label(values[train_rows + hours, CLOSE])
+            booster = xgb.train(params, train, num_boost_round=NUM_BOOST_ROUND)
+            trained = time.perf_counter()
+            predicted = booster.predict(matrix.slice(origins))
+            timings["train_s"] = timings.get("train_s", 0.0) + trained - start
+            timings["predict_s"] = timings.get("predict_s", 0.0) + time.perf_counter() - trained
+            timings["models"] = timings.get("models", 0) + 1
+            timings["train_rows"] = timings.get("train_rows", 0) + len(train_rows)
+            timings["predict_rows"] = timings.get("predict_rows", 0) + len(origins)
+            rows.append(pd.DataFrame({"Horizon": label, "Timestamp": values[origins, TIMESTAMP], "Prix Actuel": values[origins, CLOSE],
+                                      "Prix Prédit": predicted, "Prix Réel": values[origins + hours, CLOSE]}))
+    return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["Horizon", "Timestamp", "Prix Actuel", "Prix Prédit", "Prix Réel"])
+
+def summarize(predictions):
+    """Précision par horizon (dans l'ordre de HORIZONS) : nombre de prédictions, taux de bonne direction,
+    taux dans les marges de 5 % et 10 %, erreur absolue moyenne en %."""
+    outcomes = pd.DataFrame(prediction_outcomes(predictions["Prix Actuel"], predictions["Prix Prédit"], predictions["Prix Réel"]), index=predictions.index)
+    outcomes["Horizon"] = predictions["Horizon"]
+    table = outcomes.groupby("Horizon", sort=False).agg(predictions=("Erreur (%)", "size"), direction=("Direction Correcte", "mean"),
+                                                       marge_5=("Dans Marge 5%", "mean"), marge_10=("Dans Marge 10%", "mean"),
+                                                       erreur_abs=("Erreur (%)", lambda e: e.abs().mean()))
+    return table.reindex([label for label in HORIZONS if label in table.index])
+
+def peak_memory_mb():
+    """Mémoire résidente maximale du processus depuis son démarrage (allocations d'XGBoost comprises), en Mo.
+    ru_maxrss est en octets sous macOS, en kilo-octets ailleurs (Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def run(prices_by_ticker, step=STEP, folds=FOLDS, window=None, nthread=None):
+    """Banc complet sur {ticker: bougies horaires}. Retourne (enregistrement pour l'historique, tableau de précision)."""
+    timings, frames = {}, []
+    start = time.perf_counter()
+    for ticker, prices in prices_by_ticker.items():
+        values = feature_matrix(prices)
+        if len(values): frames.append(walk_forward(values, step=step, folds=folds, window=window, nthread=nthread, timings=timings))
+    elapsed = time.perf_counter() - start
+    table = summarize(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+    train_s, predict_s = timings.get("train_s", 0.0), timings.get("predict_s", 0.0)
+    record = {
+        "at": datetime.now(timezone.utc).isoformat(timespec='seconds'), "tickers": len(prices_by_ticker),
+        "config": {"step": step, "folds": folds, "window": window, "nthread": nthread, "rounds": NUM_BOOST_ROUND},
+        "elapsed_s": round(elapsed, 3), "models": timings.get("models", 0), "train_s": round(train_s, 3), "predict_s": round(predict_s, 4),
+        "train_rows_per_s": round(timings.get("train_rows", 0) / train_s, 1) if train_s else None,
+        "models_per_s": round(timings.get("models", 0) / train_s, 2) if train_s else None,
+        "predict_rows_per_s": round(timings.get("predict_rows", 0) / predict_s, 1) if predict_s else None,
+        "peak_memory_mb": round(peak_memory_mb(), 1),
+        "accuracy": {label: {k: round(float(v), 4) for k, v in row.items()} for label, row in table.iterrows()},
+    }
+    return record, table
+
+def previous_run(record, history):
+    """Dernier passage de l'historique sur les mêmes données et la même configuration, ou None."""
+    same = [run for run in history if run.get("source") == record.get("source") and run["config"] == record["config"] and run["tickers"] == record["tickers"]]
+    return same[-1] if same else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Évaluation walk-forward et débit du générateur de prédictions, hors-ligne.")
+    parser.add_argument('tickers', nargs='*', help="Tickers du magasin horaire à évaluer (par défaut : tous).")
+    parser.add_argument('--synthetique', type=int, metavar='N', help="Évalue N tickers synthétiques au lieu du magasin.")
+    parser.add_argument('--jours', type=int, default=SYNTHETIC_DAYS, help="Historique des tickers synthétiques (jours).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pas', type=int, default=STEP, help="Bougies entre deux réentraînements.")
+    parser.add_argument('--plis', type=int, default=FOLDS, help="Nombre de blocs évalués par horizon.")
+    parser.add_argument('--fenetre', type=int, help="Entraînement sur les N dernières bougies seulement (par défaut : tout l'historique).")
+    parser.add_argument('--nthread', type=int, help="Threads XGBoost (par défaut : tous les cœurs).")
+    parser.add_argument('--history', default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    if args.synthetique:
+        prices, source = synthetic_prices(args.synthetique, args.jours, args.seed), f"synthetique:{args.synthetique}x{args.jours}j:seed={args.seed}"
+    else:
+        prices, source = store_prices([t.upper() for t in args.tickers]), "magasin"
+    if not prices: raise SystemExit(f"Aucune bougie horaire à évaluer (magasin /{stockage.HOURLY_DIR} vide ? voir --synthetique).")
+
+    record, table = run(prices, step=args.pas, folds=args.plis, window=args.fenetre, nthread=args.nthread)
+    record["source"] = source
+    print(f"{record['tickers']} tickers ({source}), {record['models']} modèles en {record['elapsed_s']:.1f}s\n")
+    print(f"{'horizon':<18}{'prédictions':>12}{'direction':>11}{'marge 5%':>10}{'marge 10%':>11}{'|erreur|':>10}")
+    for label, row in table.iterrows():
+        print(f"{label:<18}{int(row['predictions']):>12}{row['direction']:>11.1%}{row['marge_5']:>10.1%}{row['marge_10']:>11.1%}{row['erreur_abs']:>9.2f}%")
+    print(f"\nEntraînement : {record['train_rows_per_s']} lignes/s, {record['models_per_s']} modèles/s ({record['train_s']:.2f}s)")
+    print(f"Inférence    : {record['predict_rows_per_s']} lignes/s ({record['predict_s']:.3f}s)")
+    print(f"Mémoire max  : {record['peak_memory_mb']:.0f} Mo")
+
+    previous = previous_run(record, load_jsonl(args.history))
+    if previous is not None:
+        ratio = lambda key: f"{record[key] / previous[key]:.2f}x" if record[key] and previous[key] else "-"
+        print(f"\nPar rapport au passage du {previous['at']} : entraînement {ratio('train_rows_per_s')}, inférence {ratio('predict_rows_per_s')}, "
+              f"mémoire {record['peak_memory_mb'] - previous['peak_memory_mb']:+.0f} Mo")
+        for label, accuracy in record["accuracy"].items():
+            before = previous["accuracy"].get(label)
+            if before: print(f"  {label:<18} direction {100 * (accuracy['direction'] - before['direction']):+.1f} pts, marge 5% {100 * (accuracy['marge_5'] - before['marge_5']):+.1f} pts")
+    append_jsonl(args.history, record)
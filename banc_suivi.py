@@ -0,0 +1,102 @@
+# banc_suivi.py
+# Banc d'essai hors-ligne de l'évaluation du suivi des prédictions (page 6) : un journal synthétique
+# de N prédictions arrivées à échéance est évalué par predictions.evaluate_pending (jointure au plus proche
+# puis calcul vectorisé) et par l'ancienne boucle ligne par ligne (recherche de la bougie la plus proche
+# et écriture cellule par cellule). La boucle est mesurée sur un échantillon puis extrapolée à tout le journal ;
+# les résultats des deux méthodes sont comparés sur cet échantillon.
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from fournisseurs import SyntheticProvider
+from predictions import HORIZONS, evaluate_pending
+
+LOG_COLUMNS = [
+    "Timestamp", "Ticker", "Horizon", "Prix Actuel", "Prix Prédit", "Date Cible",
+    "Prix Réel", "Erreur (%)", "Direction Correcte", "Dans Marge 5%", "Dans Marge 10%",
+    "Statut", "SPY_RSI_au_lancement", "VIX_au_lancement"
+]
+
+def synthetic_log(rows, tickers, bars_by_ticker, seed=42):
+    """Journal de `rows` prédictions 'En attente', lancées à des instants aléatoires dans l'historique des bougies,
+    au format de predictions_log.csv relu par la page 6 (dates en UTC)."""
+    rng = np.random.default_rng(seed)
+    ticker = rng.choice(tickers, rows)
+    labels = list(HORIZONS)
+    horizon = rng.choice(labels, rows)
+    start = min(bars.index.min() for bars in bars_by_ticker.values()).tz_convert('UTC')
+    end = max(bars.index.max() for bars in bars_by_ticker.values()).tz_convert('UTC') - pd.Timedelta(hours=max(HORIZONS.values()))
+    timestamp = start + pd.to_timedelta(rng.uniform(0, (end - start).total_seconds(), rows).round(), unit='s')
+    current = rng.uniform(10, 500, rows)
+    return pd.DataFrame({
+        "Timestamp": timestamp, "Ticker": ticker, "Horizon": horizon, "Prix Actuel": current,
+        "Prix Prédit": current * np.exp(rng.normal(0, 0.03, rows)),
+        "Date Cible": timestamp + pd.to_timedelta([HORIZONS[label] for label in horizon], unit='h'),
+        "Prix Réel": np.nan, "Erreur (%)": np.nan, "Direction Correcte": pd.NA, "Dans Marge 5%": pd.NA, "Dans Marge 10%": pd.NA,
+        "Statut": "En attente", "SPY_RSI_au_lancement": np.nan, "VIX_au_lancement": np.nan,
+    })[LOG_COLUMNS]
+
+def evaluate_row_by_row(df, bars_by_ticker, now, limit=None):
+    """Ancienne évaluation de la page 6 : une recherche de la bougie la plus proche et six écritures par prédiction.
+    Seule index.get_loc(target, method='nearest'), retirée de pandas, est remplacée par son équivalent get_indexer."""
+    updates_needed = df[df['Statut'].eq('En attente') & df['Date Cible'].lt(now)]
+    if limit is not None: updates_needed = updates_needed.head(limit)
+    for index, row in updates_needed.iterrows():
+        ticker_data = bars_by_ticker.get(row['Ticker'])
+        if ticker_data is None or ticker_data.empty:
+            df.loc[index, 'Statut'] = "Erreur (pas de data)"
+            continue
+        try:
+            closest_time_index = ticker_data.index.get_indexer([row['Date Cible']], method='nearest')[0]
+            real_price = ticker_data.iloc[closest_time_index]['Close']
+            error_pct = ((real_price - row['Prix Prédit']) / row['Prix Actuel']) * 100
+            predicted_up = row['Prix Prédit'] > row['Prix Actuel']
+            real_up = real_price > row['Prix Actuel']
+            df.loc[index, 'Prix Réel'] = real_price
+            df.loc[index, 'Erreur (%)'] = error_pct
+            df.loc[index, 'Direction Correcte'] = (predicted_up == real_up)
+            df.loc[index, 'Dans Marge 5%'] = abs(error_pct) <= 5
+            df.loc[index, 'Dans Marge 10%'] = abs(error_pct) <= 10
+            df.loc[index, 'Statut'] = "Évaluée"
+        except Exception:
+            df.loc[index, 'Statut'] = "Erreur MàJ"
+    return df, len(updates_needed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare l'évaluation groupée du suivi et l'ancienne boucle ligne par ligne.")
+    parser.add_argument('--lignes', type=int, default=100_000, help="Nombre de prédictions du journal synthétique.")
+    parser.add_argument('--tickers', type=int, default=50)
+    parser.add_argument('--echantillon', type=int, default=2_000, help="Prédictions évaluées par l'ancienne boucle (extrapolée au journal entier).")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    provider = SyntheticProvider(seed=args.seed)
+    tickers = SyntheticProvider.universe(args.tickers)
+    bars_by_ticker = {ticker: provider.history(ticker, interval='1h', period='90d') for ticker in tickers}
+    log = synthetic_log(args.lignes, tickers, bars_by_ticker, args.seed)
+    now = pd.Timestamp.now(tz='UTC')
+    print(f"Journal de {len(log)} prédictions sur {len(tickers)} tickers ({sum(len(b) for b in bars_by_ticker.values())} bougies horaires).")
+
+    start = time.perf_counter()
+    grouped, count = evaluate_pending(log.copy(), bars_by_ticker, now)
+    grouped_s = time.perf_counter() - start
+
+    sample = min(args.echantillon, count)
+    start = time.perf_counter()
+    reference, _ = evaluate_row_by_row(log.copy(), bars_by_ticker, now, limit=sample)
+    sample_s = time.perf_counter() - start
+    row_by_row_s = sample_s * count / sample if sample else 0.0
+
+    print(f"Évaluation groupée       : {grouped_s:8.3f}s  ({count / grouped_s:,.0f} prédictions/s)")
+    print(f"Boucle ligne par ligne   : {row_by_row_s:8.1f}s  (extrapolé : {sample} lignes en {sample_s:.2f}s)")
+    print(f"Accélération             : {row_by_row_s / grouped_s:8.0f}x")
+
+    checked = reference.index[reference['Statut'].ne('En attente')]
+    same_status = grouped.loc[checked, 'Statut'].eq(reference.loc[checked, 'Statut']).all()
+    same_price = np.allclose(grouped.loc[checked, 'Prix Réel'].astype(float), reference.loc[checked, 'Prix Réel'].astype(float), equal_nan=True)
+    same_flags = all(grouped.loc[checked, col].astype(bool).eq(reference.loc[checked, col].astype(bool)).all()
+                     for col in ['Direction Correcte', 'Dans Marge 5%', 'Dans Marge 10%'])
+    print(f"Résultats identiques sur l'échantillon ({len(checked)} prédictions) : {'oui' if same_status and same_price and same_flags else 'NON'}")
@@ -0,0 +1,68 @@
+# cache_donnees.py
+# Cache LRU partagé par tout le processus (toutes les sessions Streamlit, le job horaire)
+# pour les DataFrames lus sur disque, avec un budget mémoire en octets.
+
+import threading
+from collections import OrderedDict
+
+def freeze_frame(df):
+    """Rend les données d'un DataFrame non modifiables : toute écriture sur place lève une ValueError."""
+    for block in df._mgr.blocks:
+        values = getattr(block.values, '_ndarray', block.values)
+        if hasattr(values, 'flags'): values.flags.writeable = False
+    return df
+
+class FrameCache:
+    """Cache LRU de DataFrames. Chaque entrée est rattachée à une version (mtime du fichier,
+    version d'instantané...) : une version différente invalide l'entrée au lieu de la servir.
+    Les DataFrames stockés sont gelés et chaque lecture renvoie une copie superficielle :
+    l'appelant peut ajouter des colonnes à sa copie, mais ne peut ni modifier les valeurs
+    partagées ni altérer l'entrée du cache."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # clé -> (version, DataFrame, octets)
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key, version):
+        """DataFrame en cache pour (clé, version), ou None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1].copy(deep=False)
+            if entry is not None:
+                self._remove(key); self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, version, df):
+        """Ajoute un DataFrame au cache et retourne la copie superficielle à donner à l'appelant."""
+        df = freeze_frame(df)
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        with self.lock:
+            if key in self.entries: self._remove(key)
+            if nbytes <= self.max_bytes:
+                self.entries[key] = (version, df, nbytes); self.bytes += nbytes
+                while self.bytes > self.max_bytes:
+                    self._remove(next(iter(self.entries))); self.evictions += 1
+        return df.copy(deep=False)
+
+    def _remove(self, key):
+        _, _, nbytes = self.entries.pop(key)
+        self.bytes -= nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear(); self.bytes = 0
+
+    def stats(self):
+        """Compteurs du cache : succès, échecs, évictions, invalidations, taille et occupation."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "invalidations": self.invalidations, "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "entries": len(self.entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
@@ -0,0 +1,107 @@
+# calendrier.py
+# Calendriers de marché : horaires de séance par catégorie de tickers.txt et jours fériés
+# (table locale jours_feries.csv). Le collecteur s'en sert pour ne re-télécharger que les tickers
+# dont le marché a été ouvert depuis leur dernière collecte : la nuit et le week-end, seules les cryptos tournent.
+
+import csv
+import logging
+from datetime import datetime, time as dtime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# --- Constantes ---
+HOLIDAYS_FILE = "jours_feries.csv"
+TICKER_FILE = "tickers.txt"
+DEFAULT_MARKET = "XNYS"
+# Catégories qui ne suivent pas le marché par défaut (tous les autres tickers sont cotés à New York, ADR compris)
+CATEGORY_MARKETS = {"CRYPTOMONNAIES": "CRYPTO"}
+# Délai après la clôture pendant lequel la bougie du jour peut encore être corrigée par le fournisseur
+SETTLE_DELAY = timedelta(minutes=30)
+
+class Market:
+    """Marché à séances quotidiennes (jours ouvrés, hors fériés) ou en continu (`continuous`)."""
+
+    def __init__(self, name, tz="UTC", open_time=None, close_time=None, continuous=False):
+        self.name = name
+        self.tz = ZoneInfo(tz)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.continuous = continuous
+        self.holidays = {}  # date -> heure de clôture anticipée, ou None si fermé toute la journée
+
+    def session(self, day):
+        """Séance (ouverture, clôture) du jour `day` en heure locale avec fuseau, ou None si le marché est fermé."""
+        if day.weekday() >= 5: return None
+        close_time = self.close_time
+        if day in self.holidays:
+            close_time = self.holidays[day]
+            if close_time is None: return None
+        return (datetime.combine(day, self.open_time, self.tz), datetime.combine(day, close_time, self.tz))
+
+    def is_open(self, moment):
+        """Vrai si le marché est en séance à l'instant `moment` (datetime avec fuseau)."""
+        if self.continuous: return True
+        session = self.session(moment.astimezone(self.tz).date())
+        return session is not None and session[0] <= moment < session[1]
+
+    def has_activity(self, since, until):
+        """Vrai si une séance (prolongée de SETTLE_DELAY) recoupe l'intervalle ]since, until] :
+        le fournisseur a pu publier ou corriger une bougie depuis `since`."""
+        if self.continuous or since is None: return True
+        day, last_day = since.astimezone(self.tz).date(), until.astimezone(self.tz).date()
+        while day <= last_day:
+            session = self.session(day)
+            if session is not None and session[0] < until and session[1] + SETTLE_DELAY > since: return True
+            day += timedelta(days=1)
+        return False
+
+    def last_holiday(self):
+        return max(self.holidays) if self.holidays else None
+
+MARKETS = {
+    "XNYS": Market("XNYS", "America/New_York", dtime(9, 30), dtime(16, 0)),
+    "CRYPTO": Market("CRYPTO", continuous=True),
+}
+
+def load_holidays(path=HOLIDAYS_FILE, markets=MARKETS):
+    """Charge la table des jours fériés et clôtures anticipées dans les marchés."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                market = markets.get(row['marche'])
+                if market is None: continue
+                closing = row['fermeture'].strip()
+                market.holidays[datetime.strptime(row['date'], '%Y-%m-%d').date()] = datetime.strptime(closing, '%H:%M').time() if closing else None
+    except FileNotFoundError:
+        logging.warning(f"Table des jours fériés '{path}' introuvable : seuls les week-ends sont considérés comme fermés.")
+
+load_holidays()
+
+def load_ticker_markets(file_path=TICKER_FILE):
+    """Marché de chaque ticker d'après sa catégorie dans tickers.txt : {ticker: nom du marché}."""
+    ticker_markets, category = {}, None
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'): continue
+                if line.startswith('[') and line.endswith(']'): category = line[1:-1].strip().upper(); continue
+                ticker_markets[line.upper()] = CATEGORY_MARKETS.get(category, DEFAULT_MARKET)
+    except FileNotFoundError:
+        logging.error(f"Fichier '{file_path}' introuvable.")
+    return ticker_markets
+
+def due_tickers(tickers, last_fetched, ticker_markets=None, now=None):
+    """Sépare les tickers à collecter de ceux dont le marché n'a rien publié depuis leur dernière collecte.
+    `last_fetched` : {ticker: datetime UTC de la dernière collecte réussie} (absent = à collecter).
+    Retourne (à collecter, ignorés)."""
+    now = now or datetime.now(timezone.utc)
+    ticker_markets = ticker_markets if ticker_markets is not None else load_ticker_markets()
+    for market in {ticker_markets.get(t, DEFAULT_MARKET) for t in tickers}:
+        last_holiday = MARKETS[market].last_holiday()
+        if not MARKETS[market].continuous and (last_holiday is None or last_holiday.year < now.year):
+            logging.warning(f"Aucun jour férié connu pour {market} en {now.year} : complétez {HOLIDAYS_FILE}.")
+    due, skipped = [], []
+    for ticker in tickers:
+        market = MARKETS[ticker_markets.get(ticker, DEFAULT_MARKET)]
+        (due if market.has_activity(last_fetched.get(ticker), now) else skipped).append(ticker)
+    return due, skipped
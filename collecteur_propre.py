@@ -1,10 +1,22 @@
 # collecteur_propre.py (Version Chirurgicale Finale)
 
-import yfinance as yf
 import pandas as pd
+import numpy as np
 import os
 import logging
-import shutil
+import argparse
+import functools
+import json
+import time
+from datetime import datetime, timezone
+
+from moteur_collecte import PermanentError, TokenBucket, call_with_retries, run_pool
+import instantanes
+import stockage
+import rapport_collecte
+import calendrier
+import indicateurs
+from fournisseurs import get_provider
 
 print("--- EXÉCUTION DU COLLECTEUR CHIRURGICAL ---")
 
@@ -17,6 +29,29 @@ logging.basicConfig(
     filemode='w'
 )
 
+# --- Constantes ---
+DATA_DIR = "data"
+FULL_PERIOD = "10y"
+# Nombre de jours re-téléchargés avant la dernière date stockée pour capter les révisions
+OVERLAP_DAYS = 5
+# Nombre de tickers envoyés dans un même appel multi-symboles
+BATCH_SIZE = 25
+# Téléchargements individuels simultanés, plafond de requêtes par seconde et relances par ticker
+CONCURRENCY = 8
+RATE_LIMIT = 5.0
+MAX_RETRIES = 3
+# Date de la dernière collecte réussie de chaque ticker. Hors de l'instantané : un run qui ne change
+# aucune donnée la met à jour sans publier de nouvelle version. Hors de git aussi (.gitignore) :
+# le workflow horaire la conserve d'un run à l'autre dans le cache d'Actions
+FETCH_STATE_FILE = "etat_collecte.json"
+# Bougies horaires : premier téléchargement sur 720 jours, juste sous la limite de 730 jours de yfinance en 1h
+# (une demande de 730 jours pile peut être refusée), puis seulement les dernières bougies, avec un recouvrement pour capter la bougie en cours et les révisions.
+# Le magasin garde HOURLY_RETENTION d'historique, au-delà de ce que le fournisseur sert d'un coup.
+HOURLY_INTERVAL = "1h"
+HOURLY_BOOTSTRAP_PERIOD = "720d"
+HOURLY_OVERLAP = pd.Timedelta(days=2)
+HOURLY_RETENTION = pd.Timedelta(days=3 * 365)
+
 def get_all_tickers(file_path='tickers.txt'):
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -26,43 +61,346 @@ def get_all_tickers(file_path='tickers.txt'):
         logging.error(f"Fichier '{file_path}' introuvable.")
         return []
 
-def main():
+def load_fetch_state(path=FETCH_STATE_FILE):
+    """Date (UTC) de la dernière collecte réussie de chaque ticker : {ticker: datetime}."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {ticker: datetime.fromisoformat(value) for ticker, value in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_fetch_state(state, path=FETCH_STATE_FILE):
+    """Écrit l'état des collectes (fichier temporaire renommé), seulement si son contenu change.
+    Retourne True si le fichier a été écrit."""
+    content = json.dumps({ticker: moment.isoformat(timespec='seconds') for ticker, moment in sorted(state.items())}, indent=1)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == content: return False
+    except FileNotFoundError:
+        pass
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(path + ".tmp", path)
+    return True
+
+def download_single(ticker, provider=None, **kwargs):
+    """Télécharge un seul ticker. Appel sûr en parallèle (yfinance : yf.Ticker.history,
+    qui contrairement à yf.download ne partage pas d'état global)."""
+    return (provider or get_provider()).history(ticker, interval="1d", **kwargs)
+
+def split_batch_frame(data, tickers):
+    """Découpe le DataFrame MultiIndex d'un téléchargement groupé en un DataFrame par ticker.
+    Retourne (frames, missing) : les données par ticker et la liste des tickers absents du lot."""
+    frames, missing = {}, []
+    if data is None or data.empty: return frames, list(tickers)
+    if isinstance(data.columns, pd.MultiIndex):
+        # Le niveau des tickers dépend de group_by ('ticker' -> niveau 0, 'column' -> niveau 1)
+        level = 0 if set(tickers) & set(data.columns.get_level_values(0)) else 1
+        available = set(data.columns.get_level_values(level))
+    else:
+        # Colonnes déjà à plat : ce n'est possible que pour un lot d'un seul ticker
+        level, available = None, set(tickers) if len(tickers) == 1 else set()
+    for ticker in tickers:
+        if ticker not in available: missing.append(ticker); continue
+        frame = data if level is None else data.xs(ticker, axis=1, level=level)
+        # Les dates sont alignées sur tout le lot : on retire les jours où ce ticker n'a pas coté
+        frame = frame.dropna(how='all')
+        if frame.empty: missing.append(ticker); continue
+        frame.columns.name = None; frame.index.name = 'Date'
+        frames[ticker] = frame
+    return frames, missing
+
+def download_batch(tickers, provider=None, **kwargs):
+    """Télécharge un lot de tickers en un seul appel multi-symboles et le découpe par ticker."""
+    data = (provider or get_provider()).download(list(tickers), interval="1d", **kwargs)
+    return split_batch_frame(data, list(tickers))
+
+def load_stored_data(ticker, data_dir=DATA_DIR):
+    """Relit les données déjà stockées pour un ticker. Retourne un DataFrame vide si elles sont absentes ou illisibles."""
+    try:
+        return stockage.read_ticker(ticker, data_dir)
+    except FileNotFoundError:
+        return pd.DataFrame()
+    except Exception as e:
+        logging.warning(f"Données de {ticker} illisibles, elles seront reconstruites : {e}")
+        return pd.DataFrame()
+
+def has_revisions(stored, fresh):
+    """Vrai si les bougies déjà stockées ont été corrigées par le fournisseur (dividende, split...).
+    La dernière bougie stockée est exclue : elle peut provenir d'une séance encore en cours."""
+    common = stored.index[:-1].intersection(fresh.index)
+    if common.empty: return False
+    old_close, new_close = stored.loc[common, 'Close'], fresh.loc[common, 'Close']
+    return not ((old_close - new_close).abs() <= 1e-6 * old_close.abs()).all()
+
+def plan_download(ticker, full=False, data_dir=DATA_DIR):
+    """Retourne (stored, kwargs) : les données déjà stockées et la plage à demander au fournisseur."""
+    stored = pd.DataFrame() if full else load_stored_data(ticker, data_dir)
+    # Backfill complet : nouveau ticker, fichier illisible ou --full demandé
+    if stored.empty: return stored, {'period': FULL_PERIOD}
+    start = (stored.index.max() - pd.Timedelta(days=OVERLAP_DAYS)).strftime('%Y-%m-%d')
+    return stored, {'start': start}
+
+def write_ticker(ticker, data, data_dir=DATA_DIR, manifest=None):
+    """Écrit le fichier Parquet du ticker (sauf contenu identique au manifeste) et retire son ancien CSV
+    s'il traîne encore dans l'instantané. Retourne True si le fichier a été écrit."""
+    written = stockage.write_ticker(data, ticker, data_dir, manifest=manifest)
+    legacy_path = stockage.legacy_csv_path(ticker, data_dir)
+    if os.path.exists(legacy_path): os.remove(legacy_path)
+    return written
+
+def store_ticker(ticker, stored, fresh, data_dir=DATA_DIR, manifest=None):
+    """Fusionne les nouvelles bougies avec le fichier du ticker.
+    Retourne le nombre de lignes écrites (0 si le contenu n'a pas changé),
+    ou None si une révision impose un re-téléchargement complet."""
+    if stored.empty:
+        return len(fresh) if write_ticker(ticker, fresh, data_dir, manifest) else 0
+
+    # Une révision des prix ajustés touche tout l'historique : on re-télécharge ce ticker en entier
+    if not set(stored.columns) <= set(fresh.columns) or has_revisions(stored, fresh):
+        logging.info(f"Révision détectée pour {ticker}, re-téléchargement complet.")
+        return None
+
+    # La dernière bougie stockée est réécrite (séance en cours), les suivantes sont nouvelles
+    last_stored = stored.index.max()
+    new_rows = fresh[fresh.index > last_stored]
+    columns = list(stored.columns)
+    last_changed = last_stored in fresh.index and not np.allclose(fresh.loc[last_stored, columns].astype(float), stored.loc[last_stored, columns].astype(float), equal_nan=True)
+    if new_rows.empty and not last_changed: return 0
+    # Parquet ne permet pas l'ajout en fin de fichier : seul le fichier de ce ticker est réécrit
+    merged = pd.concat([stored, fresh[columns]])
+    if not write_ticker(ticker, merged[~merged.index.duplicated(keep='last')], data_dir, manifest): return 0
+    return len(new_rows) + int(last_changed)
+
+def written_bytes(ticker, rows_written, data_dir=DATA_DIR):
+    """Taille du fichier du ticker s'il vient d'être réécrit, 0 sinon."""
+    return os.path.getsize(stockage.ticker_path(ticker, data_dir)) if rows_written else 0
+
+def fetch_and_store(ticker, stored, kwargs, provider=None, data_dir=DATA_DIR, report=None, manifest=None):
+    """Télécharge puis stocke un ticker seul. Un résultat vide (ticker inconnu ou retiré de la cote : les erreurs
+    réseau du fournisseur lèvent une exception) est un échec définitif, sans relance ; les autres exceptions
+    déclenchent une relance."""
+    start = time.perf_counter()
+    fresh = download_single(ticker, provider=provider, **kwargs)
+    latency = time.perf_counter() - start
+    if fresh.empty: raise PermanentError("aucune donnée reçue")
+    rows_written = store_ticker(ticker, stored, fresh, data_dir, manifest)
+    if rows_written is None:
+        start = time.perf_counter()
+        fresh = download_single(ticker, provider=provider, period=FULL_PERIOD)
+        latency += time.perf_counter() - start
+        rows_written = store_ticker(ticker, pd.DataFrame(), fresh, data_dir, manifest)
+    if report is not None:
+        report.record(ticker, source="individuel", latency_s=latency, rows_received=len(fresh),
+                      rows_written=rows_written, bytes=written_bytes(ticker, rows_written, data_dir))
+    return rows_written
+
+def collect(tickers, full=False, batch_size=BATCH_SIZE, concurrency=CONCURRENCY, rate=RATE_LIMIT, provider=None, data_dir=DATA_DIR, report=None, manifest=None):
+    """Collecte les tickers. Ceux qui partagent la même plage à télécharger partent par lots
+    multi-symboles ; les absents d'un lot (cryptos, indices...) et les historiques révisés
+    sont ensuite repris ticker par ticker sur un pool de workers, avec relances.
+    Retourne un dict {ticker: lignes écrites} et un dict {ticker: erreur} des échecs définitifs.
+    Si `report` (rapport_collecte.RunReport) est fourni, il reçoit les métriques de chaque ticker et de chaque lot.
+    Avec un `manifest` (stockage.read_manifest), les fichiers dont le contenu n'a pas changé ne sont pas réécrits."""
+    limiter = TokenBucket(rate)
+    plans = {ticker: plan_download(ticker, full=full, data_dir=data_dir) for ticker in tickers}
+    results, individual, batch_failures = {}, [], {}
+
+    if batch_size > 1:
+        groups = {}
+        for ticker, (stored, kwargs) in plans.items():
+            groups.setdefault(tuple(sorted(kwargs.items())), []).append(ticker)
+        # Les lots restent séquentiels : yf.download partage un état global entre ses appels
+        for key, group in groups.items():
+            for i in range(0, len(group), batch_size):
+                chunk = group[i:i + batch_size]
+                timing = {}
+
+                def timed_batch(chunk=chunk, key=key):
+                    start = time.perf_counter()
+                    frames = download_batch(chunk, provider=provider, **dict(key))
+                    timing['latency'] = time.perf_counter() - start  # Tentative réussie seulement
+                    return frames
+
+                try:
+                    (frames, chunk_missing), retries = call_with_retries(timed_batch, limiter, MAX_RETRIES, label=f"lot {chunk[0]}..{chunk[-1]}")
+                    if report is not None: report.record_batch(chunk, timing['latency'], retries)
+                except Exception as e:
+                    logging.error(f"ERREUR pour le lot {chunk}: {e}")
+                    frames, chunk_missing = {}, list(chunk)
+                    if report is not None: report.record_batch(chunk, None, MAX_RETRIES, str(e) or type(e).__name__)
+                for ticker in chunk_missing:
+                    logging.warning(f"{ticker} absent du lot téléchargé, nouvel essai individuel.")
+                individual.extend(chunk_missing)
+                for ticker, fresh in frames.items():
+                    # Un ticker mal formé dans le lot n'interrompt pas la collecte : il est compté en échec
+                    try:
+                        rows_written = store_ticker(ticker, plans[ticker][0], fresh, data_dir, manifest)
+                    except Exception as e:
+                        batch_failures[ticker] = str(e) or type(e).__name__
+                        logging.error(f"ERREUR pour {ticker} (lot): {batch_failures[ticker]}")
+                        if report is not None: report.record(ticker, source="lot", latency_s=timing['latency'], rows_received=len(fresh), error=batch_failures[ticker])
+                        continue
+                    if rows_written is None:
+                        plans[ticker] = (pd.DataFrame(), {'period': FULL_PERIOD}); individual.append(ticker)
+                        continue
+                    results[ticker] = rows_written
+                    if report is not None:
+                        report.record(ticker, source="lot", latency_s=timing['latency'], rows_received=len(fresh),
+                                      rows_written=rows_written, bytes=written_bytes(ticker, rows_written, data_dir))
+    else:
+        individual = list(tickers)
+
+    tasks = {ticker: functools.partial(fetch_and_store, ticker, *plans[ticker], provider, data_dir, report, manifest) for ticker in individual}
+    pool_results, failures, retries = run_pool(tasks, concurrency=concurrency, limiter=limiter, max_retries=MAX_RETRIES)
+    results.update(pool_results)
+    if report is not None:
+        for ticker, count in retries.items():
+            if ticker in failures: report.record(ticker, source="individuel", retries=count, error=failures[ticker])
+            else: report.record(ticker, retries=count)
+    return results, {**batch_failures, **failures}
+
+# --- Bougies horaires ---
+def _hourly_frame(data, tz=None):
+    """Bougies horaires au schéma stocké, index horodaté : un index sans fuseau (rejeu, CSV enregistré)
+    est considéré en UTC, puis converti dans le fuseau `tz` des bougies déjà stockées s'il est donné."""
+    data = stockage.normalize_prices(data)
+    if data.index.tz is None: data.index = data.index.tz_localize('UTC')
+    if tz is not None: data.index = data.index.tz_convert(tz)
+    return data
+
+def top_up_hourly(ticker, provider=None, root=stockage.HOURLY_DIR):
+    """Complète le magasin horaire d'un ticker avec les bougies publiées depuis le dernier complément.
+    Retourne le nombre de bougies nouvelles. Rien reçu : échec définitif, sans relance (voir fetch_and_store)."""
+    provider = provider or get_provider()
+    stored = previous = stockage.read_hourly(ticker, root)
+    if not stored.empty: stored = _hourly_frame(stored)
+    if stored.empty: fresh = provider.history(ticker, interval=HOURLY_INTERVAL, period=HOURLY_BOOTSTRAP_PERIOD)
+    else: fresh = provider.history(ticker, interval=HOURLY_INTERVAL, start=stored.index.max() - HOURLY_OVERLAP)
+    if fresh.empty: raise PermanentError("aucune bougie horaire reçue")
+    tz = stored.index.tz if not stored.empty else None
+    fresh = _hourly_frame(fresh, tz)
+    if stored.empty:
+        merged = fresh
+    else:
+        if has_revisions(stored, fresh):
+            # Prix ajustés révisés (dividende, split) : la fenêtre du fournisseur est reprise en entier et
+            # l'historique plus ancien, qu'il ne sert plus, est remis à la même échelle
+            fresh = _hourly_frame(provider.history(ticker, interval=HOURLY_INTERVAL, period=HOURLY_BOOTSTRAP_PERIOD), tz)
+            if fresh.index.min() in stored.index:
+                older = stored[stored.index < fresh.index.min()].copy()
+                older[['Open', 'High', 'Low', 'Close']] *= fresh['Close'].iloc[0] / stored.loc[fresh.index.min(), 'Close']
+                logging.info(f"Révision des bougies horaires de {ticker}, historique antérieur remis à l'échelle.")
+            else:
+                # Aucune bougie commune pour calculer le facteur : on ne garde que la fenêtre du fournisseur
+                # plutôt que de mélanger deux échelles de prix
+                older = stored.iloc[:0]
+                logging.warning(f"Révision des bougies horaires de {ticker} sans bougie commune : historique reconstruit sur la fenêtre du fournisseur.")
+            stored = older
+        merged = pd.concat([stored, fresh])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    merged = merged[merged.index >= merged.index.max() - HOURLY_RETENTION]
+    if not previous.empty and merged.equals(previous): return 0
+    stockage.write_hourly(merged, ticker, root)
+    return len(merged.index.difference(previous.index))
+
+def collect_hourly(tickers, concurrency=CONCURRENCY, rate=RATE_LIMIT, provider=None, root=stockage.HOURLY_DIR):
+    """Complète le magasin horaire de chaque ticker (pool de workers, relances), puis son état.
+    Retourne ({ticker: bougies nouvelles}, {ticker: erreur})."""
+    started_at = pd.Timestamp.now(tz='UTC')
+    tasks = {ticker: functools.partial(top_up_hourly, ticker, provider, root) for ticker in tickers}
+    results, failures, _ = run_pool(tasks, concurrency=concurrency, limiter=TokenBucket(rate), max_retries=MAX_RETRIES)
+    if results:
+        state = stockage.read_hourly_state(root)
+        state.update({ticker: started_at for ticker in results})
+        stockage.write_hourly_state(state, root)
+    return results, failures
+
+def main(full=False, batch_size=BATCH_SIZE, concurrency=CONCURRENCY, rate=RATE_LIMIT, ignore_calendar=False, hourly=True):
     logging.info("--- Démarrage du collecteur de données ---")
-    
-    if os.path.exists('data'):
-        print("Suppression de l'ancien dossier /data...")
-        shutil.rmtree('data')
-    
-    os.makedirs('data')
-    print("Création d'un nouveau dossier /data.")
 
     tickers_to_download = get_all_tickers()
     if not tickers_to_download:
         print("Aucun ticker trouvé dans tickers.txt.")
         return
 
-    print(f"{len(tickers_to_download)} tickers à traiter.")
-    
-    for ticker in tickers_to_download:
-        try:
-            data = yf.download(ticker, period="10y", interval="1d", progress=False)
-            
-            # --- LA NOUVELLE LIGNE CHIRURGICALE ---
-            # Si les colonnes sont un MultiIndex, on extrait le PREMIER élément de chaque nom de colonne
-            if isinstance(data.columns, pd.MultiIndex):
-                data.columns = [col[0] for col in data.columns]
-            
-            if data.empty:
-                print(f"Aucune donnée pour {ticker}.")
-                continue
-
-            file_path = f"data/{ticker.upper()}.csv"
-            data.to_csv(file_path)
-            print(f"OK - Données pour {ticker} sauvegardées.")
-        except Exception as e:
-            print(f"ERREUR pour {ticker}: {e}")
+    report = rapport_collecte.RunReport(mode='complet' if full else 'incrémental', batch_size=batch_size, concurrency=concurrency, rate=rate)
+    started_at = datetime.now(timezone.utc)
+    fetch_state = load_fetch_state()
+    skipped = []
+    if not (full or ignore_calendar):
+        # Marché fermé depuis la dernière collecte (nuit, week-end, férié) : rien de nouveau à récupérer
+        tickers_to_download, skipped = calendrier.due_tickers(tickers_to_download, fetch_state, now=started_at)
+        if skipped: print(f"{len(skipped)} tickers ignorés : leur marché n'a rien publié depuis leur dernière collecte.")
+    if not tickers_to_download:
+        print("Aucun marché ouvert depuis la dernière collecte, rien à télécharger.")
+        run_report = report.to_dict(version=None, skipped=len(skipped))
+        rapport_collecte.append_history(run_report)
+        print("--- COLLECTE TERMINÉE ---")
+        return run_report
+
+    # On écrit dans un dossier de préparation : /data reste complet et lisible pendant toute la collecte
+    staging = instantanes.prepare_staging(empty=full)
+    manifest = stockage.read_manifest(staging)
+    manifest["version"] = instantanes.staging_version(staging)
+
+    print(f"{len(tickers_to_download)} tickers à traiter ({'complet' if full else 'incrémental'}, lots de {batch_size}, {concurrency} workers).")
+
+    results, failures = collect(tickers_to_download, full=full, batch_size=batch_size, concurrency=concurrency, rate=rate, data_dir=staging, report=report, manifest=manifest)
+
+    if failures:
+        print(f"{len(failures)} échec(s) définitif(s) :")
+        for ticker, error in sorted(failures.items()):
+            print(f"ERREUR pour {ticker}: {error}")
+    logging.info(f"Résumé : {len(results)} succès, {len(failures)} échecs.")
+
+    # Date de début du run : une bougie publiée pendant la collecte sera reprise au run suivant
+    fetch_state.update({ticker: started_at for ticker in results})
+    save_fetch_state(fetch_state)
+
+    # Bougies horaires des tickers collectés (les tickers en échec ne sont pas redemandés)
+    if hourly:
+        hourly_results, hourly_failures = collect_hourly(list(results), concurrency=concurrency, rate=rate)
+        print(f"Bougies horaires : {sum(hourly_results.values())} nouvelles pour {len(hourly_results)} tickers"
+              f"{f', {len(hourly_failures)} échec(s)' if hourly_failures else ''} -> /{stockage.HOURLY_DIR}.")
+
+    version = None
+    changed = [ticker for ticker, rows in results.items() if rows]
+    # Les fichiers écrits avant l'existence du manifeste y sont ajoutés une fois (ils comptent comme un changement)
+    manifest_completed = stockage.complete_manifest(manifest, staging)
+    # Indicateurs techniques des seuls tickers dont le contenu a changé (ou tous si le registre a changé),
+    # repris depuis leur état persisté quand seules de nouvelles bougies sont arrivées
+    try:
+        indicators_updated, indicators_incremental = indicateurs.update_store(manifest, staging)
+    except Exception as e:
+        indicators_updated = indicators_incremental = 0
+        logging.error(f"Magasin d'indicateurs non mis à jour : {e}")
+    if manifest_completed or changed or indicators_updated:
+        if indicators_updated: print(f"Indicateurs mis à jour pour {indicators_updated} tickers ({indicators_incremental} en incrémental).")
+        stockage.write_manifest(manifest, staging)
+        # Panel aligné de tout l'univers, projeté en mémoire par les pages et l'IA
+        stockage.write_panel(staging)
+        version = instantanes.promote(staging)
+        print(f"{len(changed)} fichiers modifiés, instantané {version} publié dans /{DATA_DIR}.")
+    else:
+        # Rien n'a changé : pas de nouvelle version, les caches des lecteurs restent valides
+        instantanes.discard(staging)
+        print("Aucune donnée modifiée, l'instantané publié est conservé.")
 
+    run_report = report.to_dict(version=version, skipped=len(skipped))
+    rapport_collecte.append_history(run_report)
+    logging.info(f"Rapport de collecte : {rapport_collecte.summary_line(run_report)}")
+    print(f"Rapport : {rapport_collecte.summary_line(run_report)} -> {rapport_collecte.HISTORY_FILE}")
     print("--- COLLECTE TERMINÉE ---")
+    return run_report
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collecte des données de marché journalières.")
+    parser.add_argument('--full', action='store_true', help="Re-télécharge tout l'historique dans un nouvel instantané vide.")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Nombre de tickers par appel groupé (1 = un appel par ticker).")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help="Nombre de téléchargements individuels simultanés.")
+    parser.add_argument('--rate', type=float, default=RATE_LIMIT, help="Nombre maximum de requêtes par seconde.")
+    parser.add_argument('--ignore-calendar', action='store_true', help="Collecte tous les tickers, même si leur marché est resté fermé.")
+    parser.add_argument('--skip-hourly', action='store_true', help="Ne complète pas le magasin des bougies horaires.")
+    args = parser.parse_args()
+    main(full=args.full, batch_size=args.batch_size, concurrency=args.concurrency, rate=args.rate, ignore_calendar=args.ignore_calendar, hourly=not args.skip_hourly)
@@ -0,0 +1,323 @@
+# fournisseurs.py
+# Fournisseurs de données de marché interchangeables : yfinance (réseau), rejeu depuis le disque
+# et générateur synthétique reproductible. Tout le code passe par get_provider(), ce qui permet
+# de profiler ou de tester en charge le pipeline complet sans accès réseau.
+#
+# Conventions communes à tous les fournisseurs :
+# - history() renvoie un DataFrame à colonnes plates Open/High/Low/Close/Volume, vide seulement si le ticker
+#   n'a pas de données (inconnu, retiré de la cote) ; une erreur réseau lève une exception ;
+#   index Date sans fuseau pour les bougies journalières, horodaté (avec fuseau) en intraday ;
+# - download() renvoie plusieurs tickers d'un coup, colonnes MultiIndex (Ticker, Price)
+#   comme yf.download(..., group_by='ticker').
+#
+# Enregistrer des données pour le rejeu, puis les rejouer :
+#   python fournisseurs.py AAPL MSFT BTC-USD --out replay [--source yfinance]
+#   FOURNISSEUR_MARCHE=replay:replay streamlit run Accueil.py
+
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# --- Constantes ---
+PROVIDER_ENV_VAR = "FOURNISSEUR_MARCHE"
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+INTRADAY_INTERVALS = ('1h', '60m', '30m', '15m', '5m', '1m')
+
+def period_start(period, end=None):
+    """Convertit une période yfinance ('5d', '60d', '3mo', '10y', 'max') en date de début."""
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.now()
+    if period is None or period == 'max': return pd.Timestamp('1970-01-01')
+    value, unit = int(''.join(c for c in period if c.isdigit())), ''.join(c for c in period if c.isalpha())
+    offsets = {'d': pd.DateOffset(days=value), 'wk': pd.DateOffset(weeks=value), 'mo': pd.DateOffset(months=value), 'y': pd.DateOffset(years=value)}
+    if unit not in offsets: raise ValueError(f"Période inconnue : {period}")
+    return end - offsets[unit]
+
+def is_intraday(interval):
+    return interval in INTRADAY_INTERVALS
+
+def _align_tz(timestamp, tz):
+    """Aligne une borne sur le fuseau (ou l'absence de fuseau) de l'index à filtrer."""
+    timestamp = pd.Timestamp(timestamp)
+    if tz is not None and timestamp.tz is None: return timestamp.tz_localize(tz)
+    if tz is None and timestamp.tz is not None: return timestamp.tz_convert(None)
+    return timestamp
+
+def slice_bars(data, start=None, end=None):
+    """Bougies de `data` dans [start, end[, quel que soit le fuseau des bornes."""
+    if start is not None: data = data[data.index >= _align_tz(start, data.index.tz)]
+    if end is not None: data = data[data.index < _align_tz(end, data.index.tz)]
+    return data
+
+class MarketDataProvider:
+    """Interface commune des fournisseurs de données de marché."""
+
+    name = "abstrait"
+
+    def history(self, ticker, interval='1d', period=None, start=None, end=None):
+        """Bougies d'un ticker (voir les conventions en tête de module)."""
+        raise NotImplementedError
+
+    def download(self, tickers, interval='1d', period=None, start=None, end=None):
+        """Bougies de plusieurs tickers en un appel. Par défaut, un appel history() par ticker."""
+        frames = {}
+        for ticker in tickers:
+            data = self.history(ticker, interval=interval, period=period, start=start, end=end)
+            if not data.empty: frames[ticker] = data
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    def fx_rate(self, pair="EURUSD=X"):
+        """Dernier cours d'une paire de devises (1.0 si indisponible)."""
+        data = self.history(pair, period="5d")
+        return float(data['Close'].iloc[-1]) if not data.empty else 1.0
+
+    def info(self, ticker):
+        """Données fondamentales et recommandations d'analystes (dict au format de yf.Ticker.info)."""
+        raise NotImplementedError
+
+    def news(self, ticker):
+        """Dernières actualités (liste de dicts au format de yf.Ticker.news)."""
+        raise NotImplementedError
+
+class YFinanceProvider(MarketDataProvider):
+    """Fournisseur réseau, via yfinance (importé seulement au premier appel)."""
+
+    name = "yfinance"
+
+    def _yf(self):
+        import yfinance as yf
+        return yf
+
+    def history(self, ticker, interval='1d', period=None, start=None, end=None):
+        # yf.Ticker.history ne partage pas d'état global : il peut être appelé depuis plusieurs threads
+        from yfinance.exceptions import YFPricesMissingError, YFTzMissingError
+        kwargs = {'period': period} if start is None else {'start': start, 'end': end}
+        try:
+            # raise_errors : sinon yfinance masque les erreurs réseau (délai, 5xx, connexion coupée) derrière un
+            # résultat vide, qu'on ne distinguerait plus d'un ticker sans données et qui ne serait jamais relancé
+            data = self._yf().Ticker(ticker).history(interval=interval, auto_adjust=True, raise_errors=True, **kwargs)
+        except (YFPricesMissingError, YFTzMissingError):
+            return pd.DataFrame()  # Ticker inconnu ou retiré de la cote : vide, comme les autres fournisseurs
+        if data.empty: return pd.DataFrame()
+        data = data[[col for col in PRICE_COLUMNS if col in data.columns]]
+        if not is_intraday(interval): data.index = data.index.tz_localize(None)
+        data.index.name = 'Date'
+        return data
+
+    def download(self, tickers, interval='1d', period=None, start=None, end=None):
+        kwargs = {'period': period} if start is None else {'start': start, 'end': end}
+        return self._yf().download(list(tickers), interval=interval, progress=False, group_by='ticker', **kwargs)
+
+    def fx_rate(self, pair="EURUSD=X"):
+        history = self._yf().Ticker(pair).history(period="5d")
+        return float(history['Close'].iloc[-1]) if not history.empty else 1.0
+
+    def info(self, ticker):
+        return self._yf().Ticker(ticker).info
+
+    def news(self, ticker):
+        return self._yf().Ticker(ticker).news
+
+class ReplayProvider(MarketDataProvider):
+    """Rejoue des données enregistrées sur disque (voir record()) :
+    <racine>/<intervalle>/<TICKER>.parquet, <racine>/info/<TICKER>.json, <racine>/news/<TICKER>.json."""
+
+    name = "rejeu"
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, kind, ticker, ext):
+        return os.path.join(self.root, kind, f"{ticker.upper()}.{ext}")
+
+    def history(self, ticker, interval='1d', period=None, start=None, end=None):
+        path = self._path(interval, ticker, 'parquet')
+        if not os.path.exists(path): return pd.DataFrame()
+        data = pd.read_parquet(path)
+        if start is None and period is not None:
+            # Les périodes se comptent depuis la dernière bougie enregistrée, pas depuis aujourd'hui
+            start = period_start(period, data.index.max())
+        return slice_bars(data, start, end)
+
+    def _json(self, kind, ticker, default):
+        path = self._path(kind, ticker, 'json')
+        if not os.path.exists(path): return default
+        with open(path, 'r', encoding='utf-8') as f: return json.load(f)
+
+    def info(self, ticker):
+        return self._json('info', ticker, {})
+
+    def news(self, ticker):
+        return self._json('news', ticker, [])
+
+class SyntheticProvider(MarketDataProvider):
+    """Générateur déterministe : chaque ticker suit une marche aléatoire log-normale tirée d'une graine
+    dérivée de (seed, ticker). Les mêmes requêtes renvoient toujours les mêmes bougies, quel que soit
+    le nombre de tickers demandés. `latency` simule le temps d'un aller-retour réseau par appel
+    et `failure_rate` la probabilité qu'un appel échoue."""
+
+    name = "synthetique"
+    DAILY_ORIGIN = pd.Timestamp('2010-01-04')
+    INTRADAY_ORIGIN = pd.Timestamp('2024-01-01', tz='UTC')
+
+    def __init__(self, seed=42, latency=0.0, failure_rate=0.0):
+        self.seed = seed; self.latency = latency; self.failure_rate = failure_rate
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.rng = np.random.default_rng(seed)
+        # Caches propres à l'instance, clés comprenant la date de fin (l'heure ou le jour en cours) :
+        # un processus de longue durée voit apparaître les nouvelles bougies
+        self._calendars, self._histories = {}, {}
+
+    @staticmethod
+    def universe(n):
+        """Liste de `n` tickers synthétiques, pour les tests de charge."""
+        return [f"SYN{i:05d}" for i in range(n)]
+
+    def _call(self):
+        with self.lock:
+            self.calls += 1
+            failed = self.rng.random() < self.failure_rate
+        if self.latency: time.sleep(self.latency)
+        if failed: raise ConnectionError("erreur simulée du fournisseur")
+
+    def _ticker_rng(self, ticker, salt):
+        return np.random.default_rng([self.seed, zlib.crc32(ticker.upper().encode()), salt])
+
+    @staticmethod
+    def _cached(cache, key, build, maxsize):
+        if key not in cache:
+            if len(cache) >= maxsize: cache.clear()  # Entrées des heures (ou jours) précédentes
+            cache[key] = build()
+        return cache[key]
+
+    @staticmethod
+    def _now(intraday):
+        """Dernière bougie possible : l'heure en cours (intraday) ou le jour en cours."""
+        return pd.Timestamp.now(tz='UTC').floor('h') if intraday else pd.Timestamp.now().normalize()
+
+    def _calendar(self, intraday, is_crypto, now):
+        """Horodatages des bougies, de l'origine jusqu'à `now` (partagés par tous les tickers)."""
+        return self._cached(self._calendars, (intraday, is_crypto, now), lambda: self._build_calendar(intraday, is_crypto, now), 8)
+
+    def _build_calendar(self, intraday, is_crypto, now):
+        if intraday:
+            index = pd.date_range(self.INTRADAY_ORIGIN, now, freq='h', name='Date')
+            if is_crypto: return index
+            # Séance américaine : 14h30-20h30 UTC, du lundi au vendredi
+            index = index[(index.dayofweek < 5) & (index.hour >= 14) & (index.hour <= 20)] + pd.Timedelta(minutes=30)
+        else:
+            index = pd.date_range(self.DAILY_ORIGIN, now, freq='D', name='Date')
+            if is_crypto: return index
+            index = index[index.dayofweek < 5]
+        index.name = 'Date'
+        return index
+
+    def _series(self, ticker, intraday):
+        """Historique complet d'un ticker, de l'origine jusqu'à maintenant."""
+        now = self._now(intraday)
+        return self._cached(self._histories, (ticker, intraday, now), lambda: self._build_series(ticker, intraday, now), 4096)
+
+    def _build_series(self, ticker, intraday, now):
+        rng = self._ticker_rng(ticker, 1 if intraday else 0)
+        index = self._calendar(intraday, ticker.upper().endswith('-USD'), now)
+        sigma = 0.004 if intraday else 0.02
+        start_price = float(rng.uniform(5, 500))
+        returns = rng.normal(0.0002 if not intraday else 0.00003, sigma, len(index))
+        close = start_price * np.exp(np.cumsum(returns))
+        spread = np.abs(rng.normal(0, sigma, len(index))) * close
+        open_ = close * np.exp(rng.normal(0, sigma / 2, len(index)))
+        return pd.DataFrame({'Open': open_, 'High': np.maximum(open_, close) + spread, 'Low': np.minimum(open_, close) - spread,
+                             'Close': close, 'Volume': rng.lognormal(13, 1, len(index)).astype('int64')}, index=index)
+
+    def _bars(self, ticker, interval, period, start, end):
+        data = self._series(ticker.upper(), is_intraday(interval))
+        if start is None: start = period_start(period or 'max', pd.Timestamp.now(tz=data.index.tz))
+        return slice_bars(data, start, end).copy()
+
+    def history(self, ticker, interval='1d', period=None, start=None, end=None):
+        self._call()
+        # Les symboles UNKNOWN* simulent un ticker délisté, absent chez le fournisseur
+        if ticker.upper().startswith('UNKNOWN'): return pd.DataFrame()
+        return self._bars(ticker, interval, period, start, end)
+
+    def download(self, tickers, interval='1d', period=None, start=None, end=None):
+        # Un seul aller-retour simulé pour tout le lot, comme un appel multi-symboles
+        self._call()
+        frames = {ticker: self._bars(ticker, interval, period, start, end) for ticker in tickers if not ticker.upper().startswith('UNKNOWN')}
+        return pd.concat(frames, axis=1) if frames else pd.DataFrame()
+
+    def fx_rate(self, pair="EURUSD=X"):
+        self._call()
+        return float(1.05 + 0.05 * self._ticker_rng(pair, 2).random())
+
+    def info(self, ticker):
+        self._call()
+        rng = self._ticker_rng(ticker, 3)
+        reco_mean = round(float(rng.uniform(1, 5)), 2)
+        reco_keys = ['strong_buy', 'buy', 'hold', 'sell', 'strong_sell']
+        return {"symbol": ticker, "shortName": f"{ticker} Synthetic Corp", "sector": "Synthétique",
+                "marketCap": int(rng.uniform(1e9, 2e12)), "trailingPE": round(float(rng.uniform(5, 60)), 2),
+                "recommendationMean": reco_mean, "recommendationKey": reco_keys[min(4, int(reco_mean) - 1)],
+                "longBusinessSummary": f"Entreprise fictive générée pour les tests ({ticker})."}
+
+    def news(self, ticker):
+        self._call()
+        now = int(time.time())
+        return [{"title": f"{ticker} : actualité synthétique n°{i + 1}", "link": "https://example.com",
+                 "publisher": "Générateur", "providerPublishTime": now - 3600 * i} for i in range(5)]
+
+def record(source, tickers, root, daily_period="10y", intraday_period="60d"):
+    """Enregistre des données d'un fournisseur (yfinance en général) pour les rejouer hors-ligne."""
+    for kind in ('1d', '1h', 'info', 'news'): os.makedirs(os.path.join(root, kind), exist_ok=True)
+    for ticker in tickers:
+        for interval, period in (('1d', daily_period), ('1h', intraday_period)):
+            data = source.history(ticker, interval=interval, period=period)
+            if not data.empty: data.to_parquet(os.path.join(root, interval, f"{ticker.upper()}.parquet"))
+        for kind, fetch in (('info', source.info), ('news', source.news)):
+            try:
+                with open(os.path.join(root, kind, f"{ticker.upper()}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(fetch(ticker), f, default=str)
+            except Exception:
+                continue
+
+def provider_from_spec(spec):
+    """Construit un fournisseur depuis une description texte :
+    'yfinance', 'replay:<dossier>' ou 'synthetique[:seed=42,latency=0.2,failure_rate=0.05]'."""
+    name, _, options = (spec or "yfinance").partition(':')
+    name = name.strip().lower()
+    if name == "yfinance": return YFinanceProvider()
+    if name in ("replay", "rejeu"): return ReplayProvider(options or "replay")
+    if name in ("synthetique", "synthetic"):
+        kwargs = dict(option.split('=') for option in options.split(',') if option)
+        return SyntheticProvider(seed=int(kwargs.get('seed', 42)), latency=float(kwargs.get('latency', 0)),
+                                 failure_rate=float(kwargs.get('failure_rate', 0)))
+    raise ValueError(f"Fournisseur inconnu : {spec}")
+
+_provider = None
+
+def get_provider():
+    """Fournisseur actif du processus, choisi par la variable d'environnement FOURNISSEUR_MARCHE."""
+    global _provider
+    if _provider is None: _provider = provider_from_spec(os.environ.get(PROVIDER_ENV_VAR))
+    return _provider
+
+def set_provider(provider):
+    """Remplace le fournisseur actif (bancs d'essai, tests de charge)."""
+    global _provider
+    _provider = provider
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enregistre des données de marché pour les rejouer hors-ligne.",
+                                     epilog=f"Exemple : python fournisseurs.py AAPL MSFT --out replay, puis {PROVIDER_ENV_VAR}=replay:replay")
+    parser.add_argument('tickers', nargs='+')
+    parser.add_argument('--out', default="replay", help="Dossier de rejeu à créer.")
+    parser.add_argument('--source', default="yfinance", help="Fournisseur source (même syntaxe que FOURNISSEUR_MARCHE).")
+    args = parser.parse_args()
+    record(provider_from_spec(args.source), [t.upper() for t in args.tickers], args.out)
+    print(f"{len(args.tickers)} tickers enregistrés dans {args.out}/. Rejeu : {PROVIDER_ENV_VAR}=replay:{args.out}")
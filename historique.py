@@ -0,0 +1,29 @@
+# historique.py
+# Historiques JSON Lines (un enregistrement par ligne) partagés par les rapports de collecte, les profils
+# du cycle horaire, le registre des modèles et les bancs d'essai : ajout avec limite de taille, et relecture.
+
+import json
+import os
+
+# --- Constantes ---
+HISTORY_MAX_RUNS = 500  # Environ trois semaines de runs horaires
+
+def append_jsonl(path, record, max_runs=HISTORY_MAX_RUNS):
+    """Ajoute un enregistrement à la fin du fichier ; au-delà de `max_runs` lignes, les plus anciennes
+    sont retirées (réécriture par fichier temporaire renommé)."""
+    if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    if len(lines) > max_runs:
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            f.writelines(lines[-max_runs:])
+        os.replace(path + ".tmp", path)
+
+def load_jsonl(path, last=None):
+    """Enregistrements du fichier, du plus ancien au plus récent (les `last` derniers si précisé) ; [] s'il n'existe pas."""
+    if not os.path.exists(path): return []
+    with open(path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return records[-last:] if last else records
@@ -0,0 +1,93 @@
+# indicateurs.py
+# Magasin d'indicateurs techniques : calculés une fois par ticker et par contenu de données
+# (à la fin de la collecte), stockés dans l'instantané et lus par les pages et le tour de l'IA.
+# Les indicateurs sont déclarés dans un registre : en ajouter un revient à ajouter une ligne à INDICATORS.
+# Ceux qui ont une version incrémentale (indicateurs_flux.py) sont mis à jour depuis leur état persisté,
+# en ne traitant que les nouvelles bougies ; les autres sont recalculés sur tout l'historique avec pandas_ta.
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import pandas as pd
+
+import indicateurs_flux
+import stockage
+
+class IndicatorSpec:
+    """Indicateur pandas_ta : `kind` est le nom de la méthode de l'accesseur DataFrame.ta
+    (sma, rsi, macd, bbands, atr...), `params` ses paramètres et `inputs` les colonnes de prix requises.
+    Les colonnes produites gardent les noms de pandas_ta (SMA_50, MACDs_12_26_9, BBU_20_2.0, ATRr_14...)."""
+
+    def __init__(self, kind, inputs=('Close',), **params):
+        self.kind = kind
+        self.inputs = tuple(inputs)
+        self.params = params
+
+    def compute(self, prices):
+        """DataFrame des colonnes de l'indicateur, aligné sur l'index de `prices`."""
+        import pandas_ta  # noqa: F401 (enregistre l'accesseur .ta) ; import tardif, la bibliothèque est lourde
+        # talib=False : mêmes formules que le calcul incrémental, que TA-Lib soit installé ou non
+        result = getattr(prices[list(self.inputs)].ta, self.kind)(**self.params, talib=False, append=False)
+        return result.to_frame() if isinstance(result, pd.Series) else result
+
+    def describe(self):
+        return {"kind": self.kind, "inputs": list(self.inputs), "params": self.params}
+
+# --- Registre ---
+INDICATORS = [
+    IndicatorSpec('sma', length=50),
+    IndicatorSpec('sma', length=200),
+    IndicatorSpec('rsi', length=14),
+    IndicatorSpec('macd', fast=12, slow=26, signal=9),
+    IndicatorSpec('bbands', length=20, std=2),
+    IndicatorSpec('atr', inputs=('High', 'Low', 'Close'), length=14),
+]
+
+def registry_version(indicators=INDICATORS):
+    """Empreinte du registre : la modifier rend tous les indicateurs stockés périmés."""
+    return hashlib.sha256(json.dumps([spec.describe() for spec in indicators], sort_keys=True).encode()).hexdigest()[:16]
+
+REGISTRY_VERSION = registry_version()
+
+def compute_indicators(prices, indicators=INDICATORS):
+    """Calcule tous les indicateurs du registre sur l'historique complet `prices` (OHLC)."""
+    frames = [spec.compute(prices) for spec in indicators if set(spec.inputs) <= set(prices.columns)]
+    return pd.concat(frames, axis=1) if frames else pd.DataFrame(index=prices.index)
+
+def is_current(entry):
+    """Vrai si les indicateurs stockés pour une entrée du manifeste correspondent à son contenu et au registre actuel."""
+    stored = entry.get("indicators")
+    return stored is not None and stored.get("source") == entry["sha256"] and stored.get("registry") == REGISTRY_VERSION
+
+def update_store(manifest, data_dir=stockage.DATA_DIR):
+    """Met à jour les indicateurs des tickers dont le contenu ou le registre a changé depuis le dernier calcul,
+    et supprime ceux des tickers qui ne sont plus stockés. Le manifeste est mis à jour en place.
+    Retourne (tickers mis à jour, dont mis à jour de façon incrémentale)."""
+    stale = [ticker for ticker, entry in manifest["tickers"].items() if not is_current(entry)]
+    if stale and not indicateurs_flux.StreamingEngine.supports(INDICATORS):
+        import pandas_ta  # noqa: F401 (sans la bibliothèque, inutile d'essayer ticker par ticker)
+    updated = incremental = 0
+    for ticker in stale:
+        entry = manifest["tickers"][ticker]
+        try:
+            prices = stockage.read_ticker(ticker, data_dir)
+            specs = [spec for spec in INDICATORS if set(spec.inputs) <= set(prices.columns)]
+            if indicateurs_flux.StreamingEngine.supports(specs):
+                indicators, resumed = indicateurs_flux.update_ticker(ticker, prices, specs, REGISTRY_VERSION, data_dir)
+            else:
+                indicators, resumed = compute_indicators(prices, specs), False
+            stockage.write_indicators(indicators, ticker, data_dir)
+        except Exception as e:
+            logging.error(f"Indicateurs non calculés pour {ticker} : {e}")
+            continue
+        entry["indicators"] = {"source": entry["sha256"], "registry": REGISTRY_VERSION}
+        updated += 1; incremental += resumed
+    indicators_dir = os.path.join(data_dir, stockage.INDICATORS_DATASET)
+    if os.path.isdir(indicators_dir):
+        for name in os.listdir(indicators_dir):
+            if name.startswith('ticker=') and name.split('=', 1)[1] not in manifest["tickers"]:
+                shutil.rmtree(os.path.join(indicators_dir, name), ignore_errors=True)
+    return updated, incremental
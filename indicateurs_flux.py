@@ -0,0 +1,382 @@
+# indicateurs_flux.py
+# Calcul incrémental des indicateurs : chaque indicateur garde son état récursif (moyennes exponentielles,
+# moyennes de Wilder des hausses/baisses, ATR, sommes glissantes des SMA et Bollinger) et le met à jour
+# en temps constant par nouvelle bougie. L'état est persisté par ticker dans l'instantané
+# (data/indicateurs/ticker=X/etat.json) et repris par le collecteur à la collecte suivante.
+# Les formules reproduisent celles de pandas_ta (implémentation Python, sans TA-Lib) ;
+# `python indicateurs_flux.py verifier` compare les deux sur les données stockées.
+
+import argparse
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import stockage
+
+NAN = float('nan')
+STATE_FILE = "etat.json"
+# Les sommes glissantes sont recalculées à intervalle régulier pour éviter la dérive des arrondis
+RESYNC_EVERY = 1000
+
+class _Ema:
+    """EMA de pandas_ta : amorcée par la SMA des `length` premières valeurs, puis ewm(span, adjust=False).
+    Comme pandas, une valeur manquante prolonge la dernière moyenne mais fait vieillir son poids."""
+
+    def __init__(self, length):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed, self.seen = 0.0, 0
+        self.value = NAN
+        self.weight = 1.0
+
+    def update(self, x):
+        self.count += 1
+        if self.count <= self.length:
+            if not math.isnan(x): self.seed += x; self.seen += 1
+            if self.count == self.length and self.seen: self.value = self.seed / self.seen
+            return self.value
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.weight *= 1 - self.alpha
+            if not math.isnan(x):
+                self.value = (self.weight * self.value + self.alpha * x) / (self.weight + self.alpha); self.weight = 1.0
+        return self.value
+
+class _Rma:
+    """Moyenne de Wilder de pandas_ta : ewm(alpha=1/length, adjust=True, min_periods=length).
+    Avec adjust=True, la moyenne vaut S/W où S et W suivent la même récurrence (valeurs et poids)."""
+
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.total = 0.0
+        self.weight = 0.0
+        self.count = 0
+
+    def update(self, x):
+        if math.isnan(x):
+            # Valeur manquante après le début de la série : les poids vieillissent quand même (ignore_na=False)
+            if self.count: self.total *= self.decay; self.weight *= self.decay
+        else:
+            self.total = x + self.decay * self.total
+            self.weight = 1.0 + self.decay * self.weight
+            self.count += 1
+        return self.total / self.weight if self.count >= self.length else NAN
+
+class _Window:
+    """Fenêtre glissante de `length` valeurs avec leur somme et leur somme des carrés.
+    Comme rolling(length) de pandas, elle n'a de valeur que sans donnée manquante dans la fenêtre."""
+
+    def __init__(self, length):
+        self.length = length
+        self.values = deque(maxlen=length)
+        self.total = 0.0
+        self.squares = 0.0
+        self.missing = 0
+        self.updates = 0
+
+    def update(self, x):
+        if len(self.values) == self.length: self._remove(self.values[0])
+        self.values.append(x)
+        if math.isnan(x): self.missing += 1
+        else: self.total += x; self.squares += x * x
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            valid = [v for v in self.values if not math.isnan(v)]
+            self.total = sum(valid); self.squares = sum(v * v for v in valid)
+
+    def _remove(self, x):
+        if math.isnan(x): self.missing -= 1
+        else: self.total -= x; self.squares -= x * x
+
+    def full(self):
+        return len(self.values) == self.length and not self.missing
+
+    def mean(self):
+        return self.total / self.length
+
+    def std(self):
+        """Écart-type de population (ddof=0), comme les bandes de Bollinger de pandas_ta."""
+        mean = self.mean()
+        return math.sqrt(max(self.squares / self.length - mean * mean, 0.0))
+
+class StreamingIndicator:
+    """Indicateur incrémental : update(high, low, close) renvoie la ligne de ses colonnes pour la nouvelle bougie.
+    L'état complet est l'ensemble des attributs de l'objet, sérialisé tel quel."""
+
+    def columns(self):
+        raise NotImplementedError
+
+    def update(self, high, low, close):
+        raise NotImplementedError
+
+    def get_state(self):
+        return _encode(self.__dict__)
+
+    def set_state(self, state):
+        self.__dict__.update(_decode(state))
+
+class StreamingSMA(StreamingIndicator):
+    def __init__(self, length):
+        self.length = length
+        self.window = _Window(length)
+
+    def columns(self):
+        return [f"SMA_{self.length}"]
+
+    def update(self, high, low, close):
+        self.window.update(close)
+        return [self.window.mean() if self.window.full() else NAN]
+
+class StreamingEMA(StreamingIndicator):
+    def __init__(self, length):
+        self.length = length
+        self.ema = _Ema(length)
+
+    def columns(self):
+        return [f"EMA_{self.length}"]
+
+    def update(self, high, low, close):
+        return [self.ema.update(close)]
+
+class StreamingRSI(StreamingIndicator):
+    def __init__(self, length):
+        self.length = length
+        self.gains = _Rma(length)
+        self.losses = _Rma(length)
+        self.prev_close = NAN
+
+    def columns(self):
+        return [f"RSI_{self.length}"]
+
+    def update(self, high, low, close):
+        change = close - self.prev_close  # NaN pour la première bougie
+        self.prev_close = close
+        gain = self.gains.update(change if math.isnan(change) else max(change, 0.0))
+        loss = self.losses.update(change if math.isnan(change) else min(change, 0.0))
+        denominator = gain + abs(loss)
+        return [100.0 * gain / denominator if denominator else NAN]
+
+class StreamingMACD(StreamingIndicator):
+    def __init__(self, fast, slow, signal):
+        self.fast, self.slow, self.signal = fast, slow, signal
+        self.fast_ema, self.slow_ema, self.signal_ema = _Ema(fast), _Ema(slow), _Ema(signal)
+
+    def columns(self):
+        suffix = f"{self.fast}_{self.slow}_{self.signal}"
+        return [f"MACD_{suffix}", f"MACDh_{suffix}", f"MACDs_{suffix}"]
+
+    def update(self, high, low, close):
+        macd = self.fast_ema.update(close) - self.slow_ema.update(close)
+        # La ligne de signal ne démarre qu'à la première valeur définie du MACD ; ensuite, comme pandas_ta,
+        # une valeur manquante lui est transmise (elle prolonge la ligne et fait vieillir son poids)
+        if math.isnan(macd) and not self.signal_ema.count: return [NAN, NAN, NAN]
+        signal = self.signal_ema.update(macd)
+        return [macd, macd - signal, signal]
+
+class StreamingBBands(StreamingIndicator):
+    def __init__(self, length, std):
+        self.length = length
+        self.std = float(std)
+        self.window = _Window(length)
+
+    def columns(self):
+        suffix = f"{self.length}_{self.std}"
+        return [f"BBL_{suffix}", f"BBM_{suffix}", f"BBU_{suffix}", f"BBB_{suffix}", f"BBP_{suffix}"]
+
+    def update(self, high, low, close):
+        self.window.update(close)
+        if not self.window.full(): return [NAN] * 5
+        mid = self.window.mean(); deviation = self.std * self.window.std()
+        lower, upper = mid - deviation, mid + deviation
+        width = upper - lower
+        return [lower, mid, upper, 100.0 * width / mid, (close - lower) / width if width else NAN]
+
+class StreamingATR(StreamingIndicator):
+    def __init__(self, length):
+        self.length = length
+        self.rma = _Rma(length)
+        self.prev_close = None
+
+    def columns(self):
+        return [f"ATRr_{self.length}"]
+
+    def update(self, high, low, close):
+        prev_close = self.prev_close; self.prev_close = close
+        # Pas de vrai range pour la première bougie ; ensuite, le plus grand des écarts disponibles
+        ranges = [] if prev_close is None else [r for r in (high - low, abs(high - prev_close), abs(prev_close - low)) if not math.isnan(r)]
+        return [self.rma.update(max(ranges) if ranges else NAN)]
+
+# Indicateurs du registre (indicateurs.INDICATORS) qui ont une version incrémentale
+STREAMING = {
+    'sma': lambda length: StreamingSMA(length),
+    'ema': lambda length: StreamingEMA(length),
+    'rsi': lambda length: StreamingRSI(length),
+    'macd': lambda fast, slow, signal: StreamingMACD(fast, slow, signal),
+    'bbands': lambda length, std: StreamingBBands(length, std),
+    'atr': lambda length: StreamingATR(length),
+}
+
+_STATE_CLASSES = {cls.__name__: cls for cls in (_Ema, _Rma, _Window)}
+
+def _encode(value):
+    """État d'un indicateur en types JSON (fenêtres et moyennes internes comprises)."""
+    if isinstance(value, dict): return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, deque): return {"__deque__": list(value), "maxlen": value.maxlen}
+    if type(value).__name__ in _STATE_CLASSES: return {"__class__": type(value).__name__, **_encode(value.__dict__)}
+    return value
+
+def _decode(value):
+    if not isinstance(value, dict): return value
+    if "__deque__" in value: return deque(value["__deque__"], maxlen=value["maxlen"])
+    decoded = {k: _decode(v) for k, v in value.items() if k != "__class__"}
+    if "__class__" not in value: return decoded
+    obj = _STATE_CLASSES[value["__class__"]].__new__(_STATE_CLASSES[value["__class__"]])
+    obj.__dict__.update(decoded)
+    return obj
+
+class StreamingEngine:
+    """Ensemble des indicateurs incrémentaux d'un ticker, dans l'ordre du registre."""
+
+    def __init__(self, specs):
+        self.indicators = [STREAMING[spec.kind](**spec.params) for spec in specs]
+        self.columns = [column for indicator in self.indicators for column in indicator.columns()]
+
+    @staticmethod
+    def supports(specs):
+        return all(spec.kind in STREAMING for spec in specs)
+
+    def update(self, high, low, close):
+        row = []
+        for indicator in self.indicators: row.extend(indicator.update(high, low, close))
+        return row
+
+    def run(self, prices):
+        """Fait avancer l'état sur toutes les bougies de `prices`.
+        Retourne (indicateurs des bougies, état avant la dernière bougie) : la dernière bougie est celle de la
+        séance en cours, que la collecte suivante peut réécrire ; c'est donc l'état juste avant elle qu'on persiste."""
+        highs = prices['High'].tolist() if 'High' in prices else [NAN] * len(prices)
+        lows = prices['Low'].tolist() if 'Low' in prices else [NAN] * len(prices)
+        closes = prices['Close'].tolist()
+        rows, checkpoint = [], self.get_state()
+        for i, (high, low, close) in enumerate(zip(highs, lows, closes)):
+            if i == len(closes) - 1: checkpoint = self.get_state()
+            rows.append(self.update(high, low, close))
+        return pd.DataFrame(rows, index=prices.index, columns=self.columns, dtype='float64'), checkpoint
+
+    def get_state(self):
+        return [indicator.get_state() for indicator in self.indicators]
+
+    def set_state(self, states):
+        for indicator, state in zip(self.indicators, states): indicator.set_state(state)
+
+# --- Persistance et mise à jour d'un ticker ---
+def state_path(ticker, data_dir=stockage.DATA_DIR):
+    return os.path.join(os.path.dirname(stockage.indicators_path(ticker, data_dir)), STATE_FILE)
+
+def load_state(ticker, data_dir=stockage.DATA_DIR):
+    try:
+        with open(state_path(ticker, data_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_state(state, ticker, data_dir=stockage.DATA_DIR):
+    """Écrit l'état (fichier temporaire renommé : l'état publié peut être un lien physique)."""
+    path = state_path(ticker, data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+def update_ticker(ticker, prices, specs, registry, data_dir=stockage.DATA_DIR):
+    """Met à jour les indicateurs stockés d'un ticker à partir de son état persisté.
+    Seules les bougies postérieures au point de reprise sont traitées ; si l'état manque, vient d'un autre
+    registre ou si l'historique a été révisé avant le point de reprise (ajustement de dividende, correction),
+    tout l'historique est rejoué. Retourne (indicateurs, incrémental ?)."""
+    engine = StreamingEngine(specs)
+    state = load_state(ticker, data_dir)
+    rows = None
+    # L'état n'est repris que si l'historique jusqu'au point de reprise est inchangé (même empreinte)
+    if state is not None and state.get("registry") == registry and 0 < state.get("rows", 0) < len(prices) \
+            and stockage.content_hash(prices.iloc[:state["rows"]]) == state["prefix"]:
+        rows = state["rows"]
+        try:
+            stored = stockage.read_indicators(ticker, data_dir, end=prices.index[rows - 1])
+        except FileNotFoundError:
+            rows = None
+    if rows is not None and list(stored.columns) == engine.columns and len(stored) == rows:
+        engine.set_state(state["indicators"])
+        new_rows, checkpoint = engine.run(prices.iloc[rows:])
+        indicators = pd.concat([stored, new_rows])
+        incremental = True
+    else:
+        indicators, checkpoint = engine.run(prices)
+        incremental = False
+    if len(prices) >= 2:
+        save_state({"registry": registry, "rows": len(prices) - 1, "prefix": stockage.content_hash(prices.iloc[:-1]),
+                    "indicators": checkpoint}, ticker, data_dir)
+    return indicators, incremental
+
+# --- Vérification contre pandas_ta ---
+def compare(streaming, reference, rtol=1e-6, atol=1e-8):
+    """Écarts entre deux DataFrames d'indicateurs : pour chaque colonne, écart absolu maximal,
+    nombre de valeurs hors tolérance et nombre de cases NaN d'un seul côté."""
+    rows = []
+    for column in reference.columns:
+        if column not in streaming: rows.append({"column": column, "max_abs": NAN, "outside": len(reference), "nan_mismatch": 0}); continue
+        a, b = streaming[column].to_numpy(), reference[column].to_numpy(dtype='float64')
+        both = ~np.isnan(a) & ~np.isnan(b)
+        diff = np.abs(a[both] - b[both])
+        rows.append({"column": column, "max_abs": float(diff.max()) if diff.size else 0.0,
+                     "outside": int((diff > atol + rtol * np.abs(b[both])).sum()),
+                     "nan_mismatch": int((np.isnan(a) != np.isnan(b)).sum())})
+    return pd.DataFrame(rows).set_index("column")
+
+def with_gaps(prices, gaps, seed=0):
+    """Copie de `prices` où `gaps` bougies prises au hasard dans la seconde moitié de l'historique
+    (après l'amorçage des indicateurs) sont manquantes (toutes colonnes à NaN)."""
+    prices = prices.copy()
+    if gaps and len(prices) > 2:
+        rows = np.random.default_rng(seed).choice(np.arange(len(prices) // 2, len(prices) - 1), min(gaps, len(prices) // 2 - 1), replace=False)
+        prices.iloc[rows] = np.nan
+    return prices
+
+def verify(prices, specs, rtol=1e-6, atol=1e-8, split=None, gaps=0):
+    """Compare le calcul incrémental (rejoué en deux fois, avec reprise d'état sérialisé au milieu)
+    au calcul de pandas_ta sur le même historique, avec `gaps` bougies manquantes en cours de série
+    si précisé (voir with_gaps). Retourne le tableau de compare()."""
+    import indicateurs
+    prices = with_gaps(prices, gaps)
+    split = split or len(prices) // 2
+    engine = StreamingEngine(specs)
+    first, _ = engine.run(prices.iloc[:split])
+    resumed = StreamingEngine(specs); resumed.set_state(json.loads(json.dumps(engine.get_state())))
+    second, _ = resumed.run(prices.iloc[split:])
+    return compare(pd.concat([first, second]), indicateurs.compute_indicators(prices, specs), rtol, atol)
+
+if __name__ == "__main__":
+    import indicateurs
+    parser = argparse.ArgumentParser(description="Indicateurs incrémentaux.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    verify_parser = sub.add_parser('verifier', help="Compare le calcul incrémental à pandas_ta sur les données stockées.")
+    verify_parser.add_argument('tickers', nargs='*', help="Tickers à vérifier (par défaut : tous).")
+    verify_parser.add_argument('--rtol', type=float, default=1e-6)
+    verify_parser.add_argument('--trous', type=int, default=0, help="Bougies manquantes insérées en cours de série (NaN) avant la comparaison.")
+    args = parser.parse_args()
+
+    tickers = args.tickers or stockage.list_stored_tickers()
+    failed = 0
+    for ticker in tickers:
+        report = verify(stockage.read_ticker(ticker), indicateurs.INDICATORS, rtol=args.rtol, gaps=args.trous)
+        bad = report[(report['outside'] > 0) | (report['nan_mismatch'] > 0)]
+        failed += not bad.empty
+        print(f"{ticker:<12} {'OK' if bad.empty else 'ÉCARTS'}  écart max {report['max_abs'].max():.2e}")
+        if not bad.empty: print(bad.to_string())
+    print(f"{len(tickers) - failed}/{len(tickers)} tickers conformes.")
@@ -0,0 +1,130 @@
+# instantanes.py
+# Gestion des instantanés (snapshots) du dossier de données.
+# Le collecteur écrit dans un dossier de préparation, puis le publie d'un coup :
+# `data` est un lien symbolique vers le dernier instantané complet, remplacé atomiquement.
+# Un lecteur voit donc toujours soit l'ancien jeu de données complet, soit le nouveau.
+# Les fichiers d'un instantané publié ne sont jamais modifiés sur place : toute écriture
+# dans la préparation doit passer par un fichier temporaire renommé (voir stockage.write_ticker).
+# data_snapshots/ est hors de git : le workflow horaire ne commite que l'instantané publié (et le lien `data`).
+
+import argparse
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+
+# --- Constantes ---
+DATA_DIR = "data"
+SNAPSHOTS_DIR = "data_snapshots"
+SNAPSHOTS_TO_KEEP = 3
+VERSION_FILE = "VERSION"
+STAGING_SUFFIX = ".staging"
+
+def current_version(data_dir=DATA_DIR):
+    """Identifiant de l'instantané actuellement publié, ou None s'il n'y en a pas."""
+    try:
+        with open(os.path.join(data_dir, VERSION_FILE), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def list_snapshots():
+    """Instantanés publiés, du plus ancien au plus récent."""
+    if not os.path.isdir(SNAPSHOTS_DIR): return []
+    return sorted(d for d in os.listdir(SNAPSHOTS_DIR) if not d.endswith(STAGING_SUFFIX) and os.path.isdir(os.path.join(SNAPSHOTS_DIR, d)))
+
+def _new_version():
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    existing = set(list_snapshots())
+    suffix = 1
+    while version in existing or os.path.exists(os.path.join(SNAPSHOTS_DIR, version + STAGING_SUFFIX)):
+        version = f"{version.split('-')[0]}-{suffix}"; suffix += 1
+    return version
+
+def prepare_staging(empty=False):
+    """Crée un dossier de préparation pour la prochaine version.
+    Sauf si `empty`, il est pré-rempli par des liens physiques vers les fichiers publiés :
+    pas de copie, et un ticker qui échoue garde ses anciennes données."""
+    version = _new_version()
+    staging = os.path.join(SNAPSHOTS_DIR, version + STAGING_SUFFIX)
+    os.makedirs(staging)
+    if not empty and os.path.isdir(DATA_DIR):
+        for root, dirs, files in os.walk(DATA_DIR, followlinks=True):
+            target_dir = os.path.join(staging, os.path.relpath(root, DATA_DIR))
+            os.makedirs(target_dir, exist_ok=True)
+            for name in files:
+                if root == DATA_DIR and name == VERSION_FILE: continue
+                try:
+                    os.link(os.path.join(root, name), os.path.join(target_dir, name))
+                except OSError:
+                    shutil.copy2(os.path.join(root, name), os.path.join(target_dir, name))
+    return staging
+
+def staging_version(staging):
+    """Version sous laquelle un dossier de préparation sera publié."""
+    return os.path.basename(staging)[:-len(STAGING_SUFFIX)]
+
+def _point_data_to(target):
+    """Fait pointer `data` vers `target` en une seule opération atomique (rename d'un lien)."""
+    link_target = os.path.relpath(target, os.path.dirname(os.path.abspath(DATA_DIR)))
+    tmp_link = DATA_DIR + ".tmp"
+    if os.path.lexists(tmp_link): os.unlink(tmp_link)
+    os.symlink(link_target, tmp_link)
+    if os.path.isdir(DATA_DIR) and not os.path.islink(DATA_DIR):
+        # Ancien dossier `data` réel (avant les instantanés) : on l'archive comme instantané, une seule fois
+        os.replace(DATA_DIR, os.path.join(SNAPSHOTS_DIR, "00000000T000000Z-ancien"))
+    os.replace(tmp_link, DATA_DIR)
+
+def promote(staging, keep=SNAPSHOTS_TO_KEEP):
+    """Publie le dossier de préparation comme nouvel instantané courant et retourne sa version."""
+    version = staging_version(staging)
+    with open(os.path.join(staging, VERSION_FILE), 'w', encoding='utf-8') as f:
+        f.write(version)
+    snapshot = os.path.join(SNAPSHOTS_DIR, version)
+    os.replace(staging, snapshot)
+    _point_data_to(snapshot)
+    logging.info(f"Instantané {version} publié.")
+    prune(keep)
+    return version
+
+def discard(staging):
+    """Abandonne un dossier de préparation sans toucher aux données publiées."""
+    shutil.rmtree(staging, ignore_errors=True)
+
+def prune(keep=SNAPSHOTS_TO_KEEP):
+    """Supprime les instantanés les plus anciens (et les préparations abandonnées), sauf le courant."""
+    current = current_version()
+    snapshots = list_snapshots()
+    for name in snapshots[:-keep] if keep > 0 else snapshots:
+        if name != current: shutil.rmtree(os.path.join(SNAPSHOTS_DIR, name), ignore_errors=True)
+    for name in os.listdir(SNAPSHOTS_DIR):
+        if name.endswith(STAGING_SUFFIX) and name[:-len(STAGING_SUFFIX)] < (current or ""):
+            shutil.rmtree(os.path.join(SNAPSHOTS_DIR, name), ignore_errors=True)
+
+def rollback(version=None):
+    """Republie un instantané conservé : `version`, ou à défaut celui qui précède le courant."""
+    snapshots = list_snapshots()
+    if version is None:
+        current = current_version()
+        older = [s for s in snapshots if current is None or s < current]
+        if not older: raise ValueError("Aucun instantané antérieur disponible.")
+        version = older[-1]
+    if version not in snapshots: raise ValueError(f"Instantané '{version}' introuvable.")
+    _point_data_to(os.path.join(SNAPSHOTS_DIR, version))
+    logging.info(f"Retour à l'instantané {version}.")
+    return version
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gestion des instantanés du dossier de données.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="Liste les instantanés conservés.")
+    rollback_parser = sub.add_parser('rollback', help="Republie un instantané précédent.")
+    rollback_parser.add_argument('version', nargs='?', help="Version à republier (par défaut : la précédente).")
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        current = current_version()
+        for name in list_snapshots():
+            print(f"{'*' if name == current else ' '} {name}")
+    else:
+        print(f"Données publiées : {rollback(args.version)}")
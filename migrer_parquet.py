@@ -0,0 +1,78 @@
+# migrer_parquet.py
+# Migration ponctuelle des anciens fichiers data/*.csv vers le jeu de données Parquet,
+# publiée comme un nouvel instantané. Affiche avant/après le temps de chargement
+# de tout l'univers et la place occupée sur disque.
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import instantanes
+import stockage
+
+def find_csv_tickers(data_dir):
+    """Tickers qui ont encore un fichier CSV à la racine du dossier de données."""
+    if not os.path.isdir(data_dir): return []
+    return sorted(name[:-4] for name in os.listdir(data_dir) if name.endswith('.csv'))
+
+def dir_size(paths):
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+def benchmark(data_dir, tickers, repeat=3):
+    """Compare la lecture de tout l'univers en CSV et en Parquet (converti dans un dossier temporaire)."""
+    csv_paths = [stockage.legacy_csv_path(t, data_dir) for t in tickers]
+    with tempfile.TemporaryDirectory() as tmp:
+        for ticker, path in zip(tickers, csv_paths):
+            stockage.write_ticker(pd.read_csv(path, index_col='Date', parse_dates=True), ticker, tmp)
+        parquet_paths = [stockage.ticker_path(t, tmp) for t in tickers]
+
+        def best_time(read):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter(); read(); timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        csv_time = best_time(lambda: [pd.read_csv(p, index_col='Date', parse_dates=True) for p in csv_paths])
+        parquet_time = best_time(lambda: [stockage.read_ticker(t, tmp) for t in tickers])
+        csv_size, parquet_size = dir_size(csv_paths), dir_size(parquet_paths)
+
+    print(f"{len(tickers)} tickers")
+    print(f"{'Format':<8} {'Chargement':>12} {'Taille':>12}")
+    print(f"{'CSV':<8} {csv_time:>11.3f}s {csv_size / 1e6:>10.2f}Mo")
+    print(f"{'Parquet':<8} {parquet_time:>11.3f}s {parquet_size / 1e6:>10.2f}Mo")
+    print(f"Gain : x{csv_time / parquet_time:.1f} en lecture, x{csv_size / max(parquet_size, 1):.1f} en taille.")
+
+def migrate():
+    """Convertit les CSV du dossier publié dans un nouvel instantané et le publie."""
+    staging = instantanes.prepare_staging()
+    tickers = find_csv_tickers(staging)
+    if not tickers:
+        instantanes.discard(staging)
+        return None, 0
+    manifest = stockage.read_manifest(staging)
+    manifest["version"] = instantanes.staging_version(staging)
+    for ticker in tickers:
+        csv_path = stockage.legacy_csv_path(ticker, staging)
+        stockage.write_ticker(pd.read_csv(csv_path, index_col='Date', parse_dates=True), ticker, staging, manifest=manifest)
+        os.remove(csv_path)
+    stockage.complete_manifest(manifest, staging)
+    stockage.write_manifest(manifest, staging)
+    stockage.write_panel(staging)
+    return instantanes.promote(staging), len(tickers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migre data/*.csv vers le jeu de données Parquet.")
+    parser.add_argument('--bench-only', action='store_true', help="Mesure sans migrer.")
+    args = parser.parse_args()
+
+    tickers = find_csv_tickers(stockage.DATA_DIR)
+    if not tickers:
+        print("Aucun fichier CSV à migrer.")
+    else:
+        benchmark(stockage.DATA_DIR, tickers)
+        if not args.bench_only:
+            version, count = migrate()
+            print(f"{count} tickers migrés, instantané {version} publié.")
@@ -0,0 +1,76 @@
+# moteur_collecte.py
+# Moteur d'exécution du collecteur : pool de workers, limiteur de débit et relances avec backoff.
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+class PermanentError(Exception):
+    """Échec qu'une relance ne corrigera pas (ticker sans données, retiré de la cote...) : pas de nouvel essai."""
+
+class TokenBucket:
+    """Limiteur de débit à jetons : au plus `rate` requêtes par seconde, rafales jusqu'à `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible, puis le consomme."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=30.0):
+    """Délai avant la relance n°`attempt` : exponentiel, plafonné, avec jitter complet
+    pour que les workers en échec ne relancent pas tous au même instant."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+def call_with_retries(fn, limiter=None, max_retries=3, base_delay=1.0, max_delay=30.0, label=""):
+    """Appelle `fn` en respectant le limiteur, avec relances en cas d'exception (sauf PermanentError).
+    Retourne (résultat, nombre de relances). Relève la dernière exception si tout échoue,
+    avec son nombre de relances dans `retries`."""
+    attempt = 0
+    while True:
+        if limiter: limiter.acquire()
+        try:
+            return fn(), attempt
+        except Exception as e:
+            if attempt >= max_retries or isinstance(e, PermanentError):
+                e.retries = attempt
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logging.warning(f"Échec pour {label} ({e}), nouvel essai dans {delay:.1f}s.")
+            time.sleep(delay)
+            attempt += 1
+
+def run_pool(tasks, concurrency=8, limiter=None, max_retries=3, base_delay=1.0, max_delay=30.0):
+    """Exécute un dict {clé: callable} sur un pool de `concurrency` workers.
+    Retourne (results, failures, retries) : les résultats par clé, les erreurs finales par clé
+    et le nombre de relances par clé."""
+    results, failures, retries = {}, {}, {}
+    if not tasks: return results, failures, retries
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {pool.submit(call_with_retries, fn, limiter, max_retries, base_delay, max_delay, key): key
+                   for key, fn in tasks.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key], retries[key] = future.result()
+            except Exception as e:
+                failures[key] = str(e) or type(e).__name__
+                retries[key] = getattr(e, 'retries', max_retries)
+                logging.error(f"ERREUR - Échec définitif pour {key}: {failures[key]}")
+    return results, failures, retries
@@ -0,0 +1,384 @@
+# noyau.py
+# Logique métier sans interface : données, portefeuilles et signaux du conseiller.
+# Importable sans Streamlit (job horaire, scripts) : les erreurs sont journalisées et renvoyées
+# à l'appelant au lieu d'être affichées ; utils.py les affiche dans les pages.
+# Les dépendances lourdes (pandas_ta, yfinance) ne sont importées qu'au moment où elles servent.
+
+import pandas as pd
+import os
+import json
+import logging
+import time
+from datetime import datetime
+from instantanes import current_version
+import stockage
+import indicateurs
+import signaux
+from fournisseurs import get_provider, period_start
+from cache_donnees import FrameCache
+
+# --- Constantes ---
+DATA_DIR = "data"
+TICKER_FILE = "tickers.txt"
+VIRTUAL_PORTFOLIO_FILE = "virtual_portfolio.json"
+AI_PORTFOLIO_FILE = "ai_portfolio.json"
+LOAD_DATA_CACHE_BYTES = 256 * 1024 * 1024
+# Le magasin horaire fait foi s'il a été complété moins de ce délai avant la fin de la plage demandée
+HOURLY_STALE_AFTER = pd.Timedelta(hours=2)
+
+# Cache partagé par toutes les sessions : une page qui se réexécute ne relit plus les fichiers
+_load_data_cache = FrameCache(LOAD_DATA_CACHE_BYTES)
+
+# --- Fonctions de base ---
+def read_ticker_categories():
+    """Tickers de tickers.txt par catégorie. Retourne (catégories, message d'erreur ou None)."""
+    categories = {}; current_category = "SANS CATÉGORIE"
+    try:
+        with open(TICKER_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'): continue
+                if line.startswith('[') and line.endswith(']'):
+                    current_category = line[1:-1].strip().upper(); categories[current_category] = []
+                else:
+                    if current_category not in categories: categories[current_category] = []
+                    categories[current_category].append(line.upper())
+        return categories, None
+    except FileNotFoundError: return {"ERREUR": []}, f"Fichier '{TICKER_FILE}' introuvable."
+
+def get_tickers_by_category():
+    categories, error = read_ticker_categories()
+    if error: logging.error(error)
+    return categories
+
+def get_available_tickers(categories=None):
+    categories = categories if categories is not None else get_tickers_by_category()
+    all_tickers = [ticker for ticker_list in categories.values() for ticker in ticker_list]
+    return sorted(list(set(all_tickers)))
+
+def read_data(ticker, columns=None, start=None, end=None, tail=None):
+    """Données journalières d'un ticker, servies par un cache partagé par tout le processus.
+    `columns`, `start`/`end` (bornes incluses) et `tail` sont transmis à la lecture sur disque :
+    demander seulement ce qui sert évite de décoder dix ans d'OHLCV pour un dernier cours.
+    Le DataFrame renvoyé est une copie superficielle dont les valeurs sont en lecture seule :
+    on peut y ajouter des colonnes (indicateurs), mais pas modifier les prix sur place.
+    Retourne (DataFrame, message d'erreur ou None) ; le DataFrame est vide en cas d'erreur."""
+    # Le lien `data` est résolu une fois : manifeste et lecture viennent du même instantané
+    data_dir = os.path.realpath(DATA_DIR)
+    entry = _manifest_for(data_dir)["tickers"].get(ticker.upper())
+    # L'empreinte du contenu survit aux publications : un ticker inchangé garde ses entrées en cache
+    file_version = entry["sha256"] if entry is not None else stockage.ticker_file_version(ticker, data_dir)
+    if file_version is None: return pd.DataFrame(), f"Fichier de données introuvable pour {ticker}."
+    cache_key = (ticker.upper(), tuple(columns) if columns is not None else None,
+                 str(start) if start is not None else None, str(end) if end is not None else None, tail)
+    cached = _load_data_cache.get(cache_key, file_version)
+    if cached is not None: return cached, None
+    try:
+        df = stockage.read_ticker(ticker, data_dir, columns=columns, start=start, end=end, tail=tail)
+        return (_load_data_cache.put(cache_key, file_version, df) if not df.empty else pd.DataFrame()), None
+    except Exception as e: return pd.DataFrame(), f"Erreur de lecture des données de {ticker}: {e}"
+
+def load_data(ticker, columns=None, start=None, end=None, tail=None):
+    """Comme read_data, mais l'erreur éventuelle est journalisée : DataFrame vide si les données manquent."""
+    df, error = read_data(ticker, columns, start, end, tail)
+    if error: logging.error(error)
+    return df
+
+def read_indicators(ticker, columns=None, tail=None):
+    """Indicateurs techniques d'un ticker (colonnes du registre indicateurs.INDICATORS : SMA_50, RSI_14,
+    MACD_12_26_9, BBU_20_2.0, ATRr_14...), calculés sur tout l'historique par le collecteur.
+    Si le magasin n'est pas à jour pour ce ticker, ils sont calculés à la volée. Même cache que load_data.
+    Retourne (DataFrame, message d'erreur ou None)."""
+    data_dir = os.path.realpath(DATA_DIR)
+    entry = _manifest_for(data_dir)["tickers"].get(ticker.upper())
+    file_version = (entry["sha256"], indicateurs.REGISTRY_VERSION) if entry is not None else stockage.ticker_file_version(ticker, data_dir)
+    if file_version is None: return pd.DataFrame(), None
+    cache_key = ("indicateurs", ticker.upper(), tuple(columns) if columns is not None else None, tail)
+    cached = _load_data_cache.get(cache_key, file_version)
+    if cached is not None: return cached, None
+    try:
+        if entry is not None and indicateurs.is_current(entry):
+            df = stockage.read_indicators(ticker, data_dir, columns=columns, tail=tail)
+        else:
+            df = indicateurs.compute_indicators(stockage.read_ticker(ticker, data_dir))
+            if columns is not None: df = df[list(columns)]
+            if tail is not None: df = df.tail(tail)
+        return _load_data_cache.put(cache_key, file_version, df), None
+    except Exception as e: return pd.DataFrame(), f"Erreur de lecture des indicateurs de {ticker}: {e}"
+
+def load_indicators(ticker, columns=None, tail=None):
+    """Comme read_indicators, avec journalisation de l'erreur éventuelle."""
+    df, error = read_indicators(ticker, columns, tail)
+    if error: logging.error(error)
+    return df
+
+def get_hourly_bars(ticker, start=None, end=None, period=None):
+    """Bougies horaires d'un ticker sur [start, end[ (ou sur la `period` qui précède maintenant),
+    lues dans le magasin local que le collecteur complète à chaque cycle : pas d'appel réseau.
+    Repli sur le fournisseur si le magasin n'a pas été complété récemment pour couvrir la plage
+    (ticker ajouté depuis la dernière collecte, collecteur arrêté). DataFrame vide si rien n'est disponible."""
+    now = pd.Timestamp.now(tz='UTC')
+    if start is None and period is not None: start = period_start(period, now)
+    needed = now if end is None else min(pd.Timestamp(end).tz_localize('UTC') if pd.Timestamp(end).tz is None else pd.Timestamp(end), now)
+    data = stockage.read_hourly(ticker, start=start, end=end)
+    topped_up = stockage.read_hourly_state().get(ticker.upper())
+    if not data.empty and topped_up is not None and topped_up >= needed - HOURLY_STALE_AFTER: return data
+    try:
+        kwargs = {'start': start, 'end': end} if start is not None else {'period': "60d"}
+        fetched = get_provider().history(ticker, interval="1h", **kwargs)
+        if not fetched.empty: return fetched
+    except Exception as e:
+        logging.warning(f"Bougies horaires de {ticker} indisponibles chez le fournisseur : {e}")
+    return data
+
+def get_load_data_cache_stats():
+    """Compteurs du cache de load_data (hits, misses, evictions, octets occupés...)."""
+    return _load_data_cache.stats()
+
+def _cached_for(cache, key, build):
+    """Valeur de build() gardée dans `cache` pour la seule clé `key` (instantané, version de données).
+    Les sessions Streamlit tournent dans des threads : la valeur est retournée depuis une variable locale,
+    jamais relue dans le cache, qu'un autre thread peut vider entre-temps lors d'un changement d'instantané."""
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    value = build()
+    cache.clear(); cache[key] = value
+    return value
+
+_data_manifest = {}
+
+def _manifest_for(data_dir):
+    return _cached_for(_data_manifest, data_dir, lambda: stockage.read_manifest(data_dir))
+
+def get_data_manifest():
+    """Manifeste de l'instantané publié : pour chaque ticker, empreinte du contenu, nombre de lignes,
+    première et dernière date, et version où ce contenu a été écrit. Lu une fois par instantané."""
+    return _manifest_for(os.path.realpath(DATA_DIR))
+
+def get_data_freshness(tickers=None):
+    """Fraîcheur des données d'après le manifeste seul, sans ouvrir les fichiers :
+    DataFrame indexé par ticker (rows, first, last, version, jours depuis la dernière bougie)."""
+    entries = get_data_manifest()["tickers"]
+    tickers = [t.upper() for t in tickers] if tickers is not None else sorted(entries)
+    df = pd.DataFrame([entries.get(t, {}) for t in tickers], index=pd.Index(tickers, name='Ticker'),
+                      columns=['rows', 'first', 'last', 'version', 'sha256'])
+    df['age_jours'] = (pd.Timestamp.now().normalize() - pd.to_datetime(df['last'])).dt.days
+    return df
+
+def get_data_version():
+    """Version de l'instantané de données publié (None avant la première collecte).
+    Elle change à chaque publication : les caches peuvent l'utiliser comme clé."""
+    return current_version(DATA_DIR)
+
+_price_panel = {}
+
+def get_price_panel():
+    """Panel (ticker × date × OHLCV) de tout l'univers, projeté en mémoire en lecture seule.
+    Ouvert une fois par version de données et partagé par toutes les sessions du processus.
+    Construit à la première lecture s'il manque (il n'est pas commité avec l'instantané) ; None sans données."""
+    return _cached_for(_price_panel, get_data_version(), lambda: stockage.read_panel(DATA_DIR, build=True))
+
+def get_latest_closes(tickers):
+    """Derniers cours de clôture connus des tickers demandés (dict ticker -> prix, NaN si inconnu).
+    Lus dans le panel en une seule opération ; repli sur load_data si le panel est absent."""
+    panel = get_price_panel()
+    if panel is not None:
+        closes = panel.last_valid('Close')
+        return {ticker: float(closes.get(ticker.upper(), float('nan'))) for ticker in tickers}
+    closes = {}
+    for ticker in tickers:
+        data = load_data(ticker, columns=['Close'], tail=1)
+        closes[ticker] = data['Close'].iloc[-1] if not data.empty else float('nan')
+    return closes
+
+EUR_USD_TTL = 3600
+_eur_usd_rate = {}
+
+def get_eur_usd_rate():
+    """Taux EUR/USD, gardé une heure pour tout le processus. 1.0 si le fournisseur ne répond pas (non gardé)."""
+    if _eur_usd_rate.get("expires", 0) > time.monotonic(): return _eur_usd_rate["rate"]
+    try: rate = get_provider().fx_rate("EURUSD=X")
+    except Exception as e: logging.warning(f"Taux EUR/USD indisponible : {e}"); return 1.0
+    _eur_usd_rate.update(rate=rate, expires=time.monotonic() + EUR_USD_TTL)
+    return rate
+
+# --- Fonctions du Portefeuille Virtuel ---
+def load_virtual_portfolio():
+    try:
+        with open(VIRTUAL_PORTFOLIO_FILE, 'r') as f:
+            data = json.load(f)
+            for pos in data.get('positions_ouvertes', []): pos['Date Achat'] = datetime.fromisoformat(pos['Date Achat'])
+            for transac in data.get('historique_transactions', []):
+                transac['Date Transaction'] = datetime.fromisoformat(transac['Date Transaction'])
+                if 'Date Achat' in transac: transac['Date Achat'] = datetime.fromisoformat(transac['Date Achat'])
+            return data
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"capital_disponible_eur": 10000.0, "positions_ouvertes": [], "historique_transactions": []}
+
+def save_virtual_portfolio(portfolio_data):
+    data_to_save = {"capital_disponible_eur": portfolio_data["capital_disponible_eur"],
+                    "positions_ouvertes": [{**p, 'Date Achat': p['Date Achat'].isoformat()} for p in portfolio_data.get('positions_ouvertes', [])],
+                    "historique_transactions": [{**t, 'Date Transaction': t['Date Transaction'].isoformat(), 'Date Achat': t.get('Date Achat', datetime.now()).isoformat()} for t in portfolio_data.get('historique_transactions', [])]}
+    with open(VIRTUAL_PORTFOLIO_FILE, 'w') as f: json.dump(data_to_save, f, indent=4)
+
+def add_virtual_transaction(ticker, amount_eur):
+    portfolio = load_virtual_portfolio()
+    if amount_eur > portfolio['capital_disponible_eur']: return False, "Fonds insuffisants !"
+    rate = get_eur_usd_rate(); data = load_data(ticker, columns=['Close'], tail=1)
+    if data.empty: return False, f"Données pour {ticker} indisponibles."
+    buy_price_usd = data['Close'].iloc[-1]; quantity = (amount_eur * rate) / buy_price_usd
+    portfolio['capital_disponible_eur'] -= amount_eur
+    new_position = {"Date Achat": datetime.now(), "Ticker": ticker, "Montant Investi EUR": amount_eur, "Prix Achat USD": buy_price_usd, "Prix Pic USD": buy_price_usd, "Quantite": quantity, "Taux EURUSD Achat": rate}
+    portfolio['positions_ouvertes'].append(new_position)
+    log_entry = {**new_position, "Type": "ACHAT", "Date Transaction": datetime.now()}
+    portfolio['historique_transactions'].append(log_entry)
+    save_virtual_portfolio(portfolio)
+    return True, f"Achat de {ticker} pour {amount_eur:.2f}€ réussi !"
+
+# --- Fonctions du Portefeuille IA ---
+SIGNAL_COLUMNS = ['SMA_50', 'SMA_200', 'RSI_14', 'MACD_12_26_9', 'MACDs_12_26_9', 'BBU_20_2.0', 'BBL_20_2.0']
+
+def read_ai_advisor_signal(ticker):
+    """Score et recommandation du conseiller pour un ticker, d'après la dernière ligne du magasin d'indicateurs.
+    Retourne (score, recommandation, message d'erreur ou None) ; en cas d'erreur de lecture, le signal est insuffisant."""
+    indicators, indicators_error = read_indicators(ticker, columns=SIGNAL_COLUMNS, tail=1)
+    close, close_error = read_data(ticker, columns=['Close'], tail=1)
+    error = close_error or indicators_error
+    # Moins de 200 séances : la SMA 200 n'est pas encore définie
+    if indicators.empty or close.empty or pd.isna(indicators['SMA_200'].iloc[-1]): return 0, signaux.INSUFFICIENT, error
+    latest = indicators.iloc[-1]
+    score = int(signaux.score_signals(close['Close'].iloc[-1], latest['SMA_50'], latest['SMA_200'], latest['RSI_14'],
+                                      latest['MACD_12_26_9'], latest['MACDs_12_26_9'], latest['BBU_20_2.0'], latest['BBL_20_2.0']))
+    return score, signaux.recommendation(score), error
+
+def get_ai_advisor_signal(ticker):
+    """Comme read_ai_advisor_signal, avec journalisation de l'erreur éventuelle : (score, recommandation)."""
+    score, recommendation, error = read_ai_advisor_signal(ticker)
+    if error: logging.error(error)
+    return score, recommendation
+
+def get_adaptive_atr_multiplier(natr_percentage):
+    if natr_percentage < 2.0: return 2.0
+    elif natr_percentage < 4.0: return 2.5
+    else: return 3.5
+
+_universe_scores = {}
+
+def read_universe_scores():
+    """Tableau des scores du conseiller pour tous les tickers suivis, calculé d'un bloc sur le panel
+    une fois par version de données. Repli ticker par ticker si le panel n'est pas encore construit.
+    Retourne (tableau, messages d'erreur des tickers illisibles)."""
+    return _cached_for(_universe_scores, get_data_version(), _score_universe)
+
+def _score_universe():
+    panel = get_price_panel(); tickers = get_available_tickers()
+    if panel is not None: return signaux.score_universe(panel, tickers), []
+    signals = {ticker: read_ai_advisor_signal(ticker) for ticker in tickers}
+    scores = pd.DataFrame({'Score': [s for s, _, _ in signals.values()], 'Recommandation': [r for _, r, _ in signals.values()]},
+                          index=pd.Index(list(signals), name='Ticker')).sort_values('Score', ascending=False)
+    return scores, [error for _, _, error in signals.values() if error]
+
+def get_universe_scores():
+    """Comme read_universe_scores, avec journalisation des erreurs éventuelles : le tableau seul."""
+    scores, errors = read_universe_scores()
+    for error in errors: logging.error(error)
+    return scores
+
+def get_best_buy_candidates(num_candidates=5, exclude=()):
+    """Les meilleurs tickers de l'univers recommandés à l'achat, du score le plus élevé au plus faible."""
+    return signaux.top_candidates(get_universe_scores(), num_candidates, exclude).index.tolist()
+
+def scan_analyst_recommendations(tickers, progress=None):
+    """Recommandations d'analystes (clé et note moyenne) de chaque ticker, pour la page 3 (tâche de fond, voir taches.py).
+    `progress(fait, total, message)` est appelé à chaque ticker. Les tickers sans recommandation
+    ou en erreur (cryptos, tickers délistés, problèmes d'API) sont ignorés."""
+    results = []
+    for i, ticker_symbol in enumerate(tickers):
+        if progress: progress(i, len(tickers), f"Analyse de {ticker_symbol}...")
+        try:
+            info = get_provider().info(ticker_symbol)
+            reco_mean = info.get('recommendationMean'); reco_key = info.get('recommendationKey')
+            if reco_mean is not None and reco_key is not None:
+                results.append({"Ticker": ticker_symbol, "Recommandation": reco_key.replace('_', ' ').title(), "Note Moyenne": reco_mean})
+        except Exception: continue
+    if progress: progress(len(tickers), len(tickers), "Scan terminé")
+    return pd.DataFrame(results, columns=["Ticker", "Recommandation", "Note Moyenne"])
+
+def run_ai_portfolio_turn():
+    """Un tour de décision du portefeuille IA (ventes sur stop ou objectif, puis un achat au plus).
+    Retourne (actions effectuées, messages d'erreur des données illisibles) ; l'état est écrit dans AI_PORTFOLIO_FILE."""
+    errors = []
+
+    def read(reader, ticker, **kwargs):
+        df, error = reader(ticker, **kwargs)
+        if error: errors.append(error)
+        return df
+
+    try:
+        with open(AI_PORTFOLIO_FILE, 'r') as f: portfolio = json.load(f)
+        for pos in portfolio['positions_ouvertes']: pos['date_achat'] = datetime.fromisoformat(pos['date_achat'])
+    except (FileNotFoundError, json.JSONDecodeError):
+        portfolio = {"capital_disponible_eur": 10000.0, "positions_ouvertes": [], "historique_transactions": []}
+
+    actions_log = []; rate_eur_usd_actuel = get_eur_usd_rate()
+    positions_a_garder = []
+    for pos in portfolio['positions_ouvertes']:
+        data = read(read_data, pos['Ticker'], columns=['Close'], tail=1)
+        atr = read(read_indicators, pos['Ticker'], columns=['ATRr_14'], tail=1)
+        if data.empty or atr.empty: positions_a_garder.append(pos); continue
+        latest_price_usd = data['Close'].iloc[-1]
+        latest_atr_usd = atr['ATRr_14'].iloc[-1]
+        atr_multiplier = get_adaptive_atr_multiplier((latest_atr_usd / latest_price_usd) * 100)
+        peak_price_usd = max(pos.get('prix_pic_usd', pos['prix_achat_usd']), latest_price_usd)
+        pos['prix_pic_usd'] = peak_price_usd
+        stop_loss_price = peak_price_usd - (atr_multiplier * latest_atr_usd)
+        take_profit_price = pos.get('take_profit_usd', pos['prix_achat_usd'] * 1.20) # Simple take profit à +20%
+        raison_vente = None
+        if latest_price_usd < stop_loss_price: raison_vente = "Stop-Loss atteint"
+        elif latest_price_usd > take_profit_price: raison_vente = "Take-Profit atteint"
+        if raison_vente:
+            valeur_vente_eur = (pos['quantite'] * latest_price_usd) / rate_eur_usd_actuel
+            portfolio['capital_disponible_eur'] += valeur_vente_eur
+            log_entry = {**pos, "type": "VENTE", "date_transaction": datetime.now(), "raison": raison_vente, "montant_vente_eur": valeur_vente_eur}
+            portfolio['historique_transactions'].append(log_entry)
+            actions_log.append(f"🔴 VENTE de {pos['Ticker']} ({raison_vente}). Gain/Perte: {valeur_vente_eur - pos['montant_investi_eur']:.2f}€")
+        else: positions_a_garder.append(pos)
+    portfolio['positions_ouvertes'] = positions_a_garder
+
+    if len(portfolio['positions_ouvertes']) < 5:
+        capital_a_investir_par_position = portfolio['capital_disponible_eur'] * 0.25
+        if capital_a_investir_par_position > 100:
+            # Candidats déjà notés et filtrés sur tout l'univers : pas de nouveau calcul ticker par ticker
+            scores, score_errors = read_universe_scores(); errors.extend(score_errors)
+            for ticker in signaux.top_candidates(scores, exclude=[p['Ticker'] for p in portfolio['positions_ouvertes']]).index:
+                data = read(read_data, ticker, columns=['Close'], tail=1)
+                if not data.empty:
+                    buy_price_usd = data['Close'].iloc[-1]
+                    quantity = (capital_a_investir_par_position * rate_eur_usd_actuel) / buy_price_usd
+                    portfolio['capital_disponible_eur'] -= capital_a_investir_par_position
+                    new_position = {"date_achat": datetime.now(), "Ticker": ticker, "montant_investi_eur": capital_a_investir_par_position, "prix_achat_usd": buy_price_usd, "prix_pic_usd": buy_price_usd, "quantite": quantity}
+                    portfolio['positions_ouvertes'].append(new_position)
+                    log_entry = {**new_position, "type": "ACHAT", "date_transaction": datetime.now()}
+                    portfolio['historique_transactions'].append(log_entry)
+                    actions_log.append(f"🟢 ACHAT de {ticker} pour {capital_a_investir_par_position:.2f}€.")
+                    break
+    
+    # --- LA CORRECTION EST ICI ---
+    # On vérifie que la date est bien un objet datetime avant de la convertir
+    portfolio_to_save = portfolio.copy()
+    for pos in portfolio_to_save['positions_ouvertes']:
+        if isinstance(pos.get('date_achat'), datetime):
+            pos['date_achat'] = pos['date_achat'].isoformat()
+    for transac in portfolio_to_save['historique_transactions']:
+        if isinstance(transac.get('date_transaction'), datetime):
+            transac['date_transaction'] = transac['date_transaction'].isoformat()
+        if 'date_achat' in transac and isinstance(transac.get('date_achat'), datetime):
+            transac['date_achat'] = transac['date_achat'].isoformat()
+    # --- FIN DE LA CORRECTION ---
+    
+    with open(AI_PORTFOLIO_FILE, 'w') as f:
+        json.dump(portfolio_to_save, f, indent=4)
+        
+    return actions_log, errors
\ No newline at end of file
@@ -1,8 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from sklearn.linear_model import LinearRegression
 from datetime import timedelta
 from utils import load_data, get_available_tickers
 
@@ -44,7 +42,7 @@ if selected_ticker:
     st.header(f"Analyse pour : {selected_ticker}")
     
     # 1. Chargement des données via la fonction sécurisée
-    data = load_data(selected_ticker)
+    data = load_data(selected_ticker, columns=['Close'])
     
     # 2. On vérifie si le DataFrame retourné n'est PAS vide avant de continuer
     if not data.empty:
@@ -59,6 +57,9 @@ if selected_ticker:
         X = df_pred[['Days']]
         y = df_pred['Close']
 
+        # Imports tardifs : scikit-learn et plotly ne sont chargés qu'une fois des données à afficher
+        from sklearn.linear_model import LinearRegression
+        import plotly.graph_objects as go
         model = LinearRegression().fit(X, y)
 
         # Préparation des jours et dates futurs pour la prédiction
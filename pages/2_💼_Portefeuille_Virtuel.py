@@ -1,8 +1,7 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data, get_available_tickers, get_eur_usd_rate, load_virtual_portfolio, save_virtual_portfolio, add_virtual_transaction
+from utils import load_data, load_indicators, get_ai_advisor_signal, get_available_tickers, get_eur_usd_rate, load_virtual_portfolio, save_virtual_portfolio, add_virtual_transaction
 from datetime import datetime
-import pandas_ta as ta
 
 # --- Configuration de la page ---
 st.set_page_config(layout="wide", page_title="Portefeuille Virtuel")
@@ -13,26 +12,6 @@ portfolio_state = load_virtual_portfolio()
 st.session_state.update(portfolio_state)
 
 # --- Fonctions de l'IA et de la Stratégie ---
-@st.cache_data(ttl=3600)
-def get_ai_advisor_signal(data):
-    if len(data) < 200: return 0, "Données Insuffisantes"
-    score = 0; data.ta.sma(length=50, append=True); data.ta.sma(length=200, append=True)
-    if data['SMA_50'].iloc[-1] > data['SMA_200'].iloc[-1]: score += 2
-    else: score -= 2
-    data.ta.rsi(length=14, append=True); rsi = data['RSI_14'].iloc[-1]
-    if rsi > 70: score -= 1
-    elif rsi < 30: score += 1
-    macd = data.ta.macd(fast=12, slow=26, signal=9, append=True)
-    if macd['MACD_12_26_9'].iloc[-1] > macd['MACDs_12_26_9'].iloc[-1]: score += 1
-    else: score -= 1
-    bollinger = data.ta.bbands(length=20, std=2, append=True)
-    if data['Close'].iloc[-1] > bollinger['BBU_20_2.0'].iloc[-1]: score -= 1
-    elif data['Close'].iloc[-1] < bollinger['BBL_20_2.0'].iloc[-1]: score += 1
-    if score >= 3: recommandation = "🟢 Renforcer"
-    elif score <= -3: recommandation = "🔴 Vendre"
-    else: recommandation = "⚪ Conserver"
-    return score, recommandation
-
 def get_adaptive_atr_multiplier(natr_percentage):
     if natr_percentage < 2.0: return 2.0
     elif natr_percentage < 4.0: return 2.5
@@ -70,10 +49,11 @@ if st.session_state.get('positions_ouvertes'):
     rate_eur_usd_actuel = get_eur_usd_rate()
     new_cols = {k: [] for k in ['valeurs_actuelles_eur', 'pnl_pct', 'stop_loss_prices', 'new_peak_prices', 'avis_ia', 'score_ia', 'volatilite_natr', 'multiplicateur_auto']}
     for index, pos in df_positions.iterrows():
-        data = load_data(pos['Ticker'])
-        if not data.empty:
-            score, recommandation = get_ai_advisor_signal(data.copy())
-            data.ta.atr(length=14, append=True); latest_atr_usd = data['ATRr_14'].iloc[-1]; latest_price_usd = data['Close'].iloc[-1]
+        data = load_data(pos['Ticker'], columns=['Close'], tail=1)
+        atr = load_indicators(pos['Ticker'], columns=['ATRr_14'], tail=1)
+        if not data.empty and not atr.empty:
+            score, recommandation = get_ai_advisor_signal(pos['Ticker'])
+            latest_atr_usd = atr['ATRr_14'].iloc[-1]; latest_price_usd = data['Close'].iloc[-1]
             natr = (latest_atr_usd / latest_price_usd) * 100; atr_multiplier = get_adaptive_atr_multiplier(natr)
             peak_price_usd = max(pos['Prix Pic USD'], latest_price_usd); st.session_state.positions_ouvertes[index]['Prix Pic USD'] = peak_price_usd
             stop_loss_price_usd = peak_price_usd - (atr_multiplier * latest_atr_usd)
@@ -137,7 +117,7 @@ with st.expander("Vendre une Position Manuellement"):
         pos_a_vendre_idx = st.selectbox("Choisissez la position à vendre", options=range(len(positions_list)), format_func=lambda x: positions_list[x])
         if st.button("Vendre la position sélectionnée", type="primary"):
             pos_a_vendre = st.session_state.positions_ouvertes[pos_a_vendre_idx]
-            data = load_data(pos_a_vendre['Ticker'])
+            data = load_data(pos_a_vendre['Ticker'], columns=['Close'], tail=1)
             if not data.empty:
                 valeur_vente_eur = (pos_a_vendre['Quantite'] * data['Close'].iloc[-1]) / get_eur_usd_rate()
                 st.session_state.capital_disponible_eur += valeur_vente_eur
@@ -1,58 +1,16 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-
-from utils import get_tickers_by_category
+import taches
+from utils import get_tickers_by_category, show_job_progress, poll_jobs
 
 # --- Configuration de la page ---
 st.set_page_config(layout="wide", page_title="Scanner de Recommandations")
 st.title("🏆 Scanner de Recommandations d'Analystes par Secteur")
-st.markdown("Cette page scanne les recommandations d'analystes pour les actifs listés dans votre fichier `tickers.txt`. Les résultats sont mis en cache pendant 4 heures.")
-
-# --- Fonction de Scan avec Cache ---
-# Le cache est crucial ici pour éviter de refaire des appels API coûteux en temps.
-@st.cache_data(ttl=4*3600) # Cache de 4 heures
-def scan_recommendations(tickers_list):
-    """
-    Scanne une liste de tickers et retourne leurs recommandations.
-    Affiche une barre de progression dans l'interface.
-    """
-    results = []
-    progress_bar = st.progress(0, text="Initialisation du scan...")
-
-    for i, ticker_symbol in enumerate(tickers_list):
-        try:
-            # Mise à jour de la barre de progression
-            progress_bar.progress((i + 1) / len(tickers_list), text=f"Analyse de {ticker_symbol}...")
-
-            # Récupération des données
-            ticker_data = yf.Ticker(ticker_symbol)
-            
-            # Utiliser .info peut être lent, on peut cibler directement les recommandations si l'API le permet
-            # Pour yfinance, .info est souvent la méthode la plus simple
-            info = ticker_data.info
-            
-            reco_mean = info.get('recommendationMean')
-            reco_key = info.get('recommendationKey')
-            
-            # On s'assure que les deux informations sont présentes
-            if reco_mean is not None and reco_key is not None:
-                results.append({
-                    "Ticker": ticker_symbol,
-                    "Recommandation": reco_key.replace('_', ' ').title(),
-                    "Note Moyenne": reco_mean
-                })
-        
-        except Exception:
-            # On ignore silencieusement les tickers qui causent des erreurs
-            # (ex: cryptos, tickers délistés, problèmes d'API)
-            continue
-    
-    progress_bar.empty() # On retire la barre de progression à la fin
-    return pd.DataFrame(results)
+st.markdown("Cette page scanne les recommandations d'analystes pour les actifs listés dans votre fichier `tickers.txt`. Les scans tournent en tâche de fond et leurs résultats sont conservés pendant 4 heures.")
 
 # --- Affichage Principal ---
 tickers_by_category = get_tickers_by_category()
+active_jobs = False
 
 # Cas où le fichier tickers.txt est vide ou introuvable
 if not tickers_by_category or "ERREUR" in tickers_by_category:
@@ -74,11 +32,24 @@ else:
         for i, (category, tickers_in_category) in enumerate(action_categories.items()):
             with category_tabs[i]:
                 st.subheader(f"Actifs du secteur : {category}")
-                
-                # Le scan se lance automatiquement grâce au cache de Streamlit.
-                # Le spinner n'apparaît que lors du premier chargement ou après expiration du cache.
-                with st.spinner(f"Scan en cours pour le secteur {category}..."):
-                    df_results = scan_recommendations(tuple(tickers_in_category)) # Convertir en tuple pour que ce soit hashable par st.cache_data
+                params = {"tickers": list(tickers_in_category)}
+
+                # Dernier scan terminé et non expiré : affiché immédiatement, sans appel au fournisseur.
+                # Sinon, le scan est soumis au worker (une seule tâche par secteur, même avec plusieurs sessions).
+                job, df_results = taches.latest_result("recommandations", params)
+                running = taches.latest_job("recommandations", params, statuses=('en_attente', 'en_cours'))
+                if job is None and running is None:
+                    failed = taches.latest_job("recommandations", params, statuses=('echec',))
+                    if failed is None or st.button("🔄 Relancer le scan", key=f"retry_{category}"):
+                        running = taches.status(taches.submit("recommandations", params))
+                    else: show_job_progress(failed)
+                if running is not None:
+                    active_jobs |= show_job_progress(running)
+                if job is None: continue
+
+                st.caption(f"Scan terminé le {pd.Timestamp(job['finished_at']).tz_convert(None):%d/%m/%Y %H:%M} (UTC), conservé jusqu'au {pd.Timestamp(job['expires_at']).tz_convert(None):%d/%m/%Y %H:%M}.")
+                if running is None and st.button("🔄 Rafraîchir", key=f"refresh_{category}"):
+                    taches.submit("recommandations", params); st.rerun()
 
                 if not df_results.empty:
                     # Triage et affichage des résultats
@@ -91,4 +62,7 @@ else:
                         use_container_width=True
                     )
                 else:
-                    st.info(f"Aucune recommandation d'analyste n'a été trouvée pour les actifs de ce secteur.")
\ No newline at end of file
+                    st.info(f"Aucune recommandation d'analyste n'a été trouvée pour les actifs de ce secteur.")
+
+# Tant qu'un scan tourne, la page se réexécute pour suivre son avancement
+poll_jobs(active_jobs)
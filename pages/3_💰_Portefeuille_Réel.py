@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data, get_available_tickers, get_eur_usd_rate
+from utils import load_data, get_available_tickers, get_eur_usd_rate, get_latest_closes
 from datetime import date
 import os
 
@@ -57,10 +57,10 @@ else:
                 amount_in_usd = amount * rate
                 st.sidebar.info(f"Taux EUR/USD appliqué : {rate:.4f}")
 
-            data = load_data(ticker)
+            target_date = pd.to_datetime(transaction_date)
+            data = load_data(ticker, columns=['Close'], end=target_date)
             if not data.empty:
                 try:
-                    target_date = pd.to_datetime(transaction_date)
                     buy_price = data.loc[data.index.asof(target_date), 'Close']
                     quantity = amount_in_usd / buy_price
                     
@@ -95,10 +95,11 @@ if not df_real.empty:
     
     current_values = []
     latest_prices = []
+    # Tous les derniers cours d'un coup, lus dans le panel partagé plutôt que fichier par fichier
+    latest_closes = get_latest_closes(portfolio_summary['Ticker'].tolist())
     for index, row in portfolio_summary.iterrows():
-        data = load_data(row['Ticker'])
-        if not data.empty:
-            latest_price = data['Close'].iloc[-1]
+        latest_price = latest_closes[row['Ticker']]
+        if pd.notna(latest_price):
             current_values.append(row['Quantite_Totale'] * latest_price)
             latest_prices.append(latest_price)
         else:
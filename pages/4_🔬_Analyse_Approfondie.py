@@ -1,9 +1,7 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import pandas_ta as ta
-import plotly.graph_objects as go
-from utils import load_data, get_available_tickers
+from utils import load_data, load_indicators, get_available_tickers
+from fournisseurs import get_provider
 
 # --- Configuration de la page ---
 st.set_page_config(layout="wide", page_title="Analyse Approfondie")
@@ -14,7 +12,7 @@ st.title("🔬 Analyse Approfondie d'un Actif")
 def get_ticker_info(ticker_symbol):
     """Récupère les informations fondamentales d'un ticker."""
     try:
-        return yf.Ticker(ticker_symbol).info
+        return get_provider().info(ticker_symbol)
     except Exception as e:
         st.error(f"Erreur API lors de la récupération des infos pour {ticker_symbol}: {e}")
         return {}
@@ -23,7 +21,7 @@ def get_ticker_info(ticker_symbol):
 def get_ticker_news(ticker_symbol):
     """Récupère les dernières actualités d'un ticker."""
     try:
-        return yf.Ticker(ticker_symbol).news
+        return get_provider().news(ticker_symbol)
     except Exception as e:
         st.error(f"Erreur API lors de la récupération des actualités pour {ticker_symbol}: {e}")
         return []
@@ -47,10 +45,11 @@ if selected_ticker:
     st.header(f"Analyse pour : {selected_ticker}")
 
     # 1. On charge les données principales UNE SEULE FOIS
-    data = load_data(selected_ticker)
+    data = load_data(selected_ticker, columns=['Open', 'High', 'Low', 'Close'])
 
     # 2. On vérifie si les données de base existent AVANT de créer les onglets
     if not data.empty:
+        import plotly.graph_objects as go  # Import tardif : plotly n'est chargé que s'il y a un graphique à tracer
         # Création des onglets
         tab1, tab2, tab3 = st.tabs(["📊 Résumé & Cours", "📈 Indicateurs Techniques", "📰 Actualités"])
 
@@ -95,11 +94,10 @@ if selected_ticker:
         with tab2:
             st.subheader("Analyse Technique")
             # On vérifie qu'il y a assez de données pour les calculs
-            if len(data) > 200:
-                # Calcul des indicateurs avec pandas_ta
-                data.ta.sma(length=50, append=True)
-                data.ta.sma(length=200, append=True)
-                data.ta.rsi(length=14, append=True)
+            # Indicateurs précalculés par le collecteur (magasin d'indicateurs) ; vides s'ils sont illisibles
+            indicators = load_indicators(selected_ticker, columns=['SMA_50', 'SMA_200', 'RSI_14']) if len(data) > 200 else pd.DataFrame()
+            if not indicators.empty:
+                data = data.join(indicators)
                 
                 # Graphique des Moyennes Mobiles
                 st.write("#### Moyennes Mobiles (SMA 50 & 200)")
@@ -117,6 +115,8 @@ if selected_ticker:
                 fig_rsi.add_hline(y=30, line_dash="dash", line_color="green", annotation_text="Zone de Survente", annotation_position="bottom right")
                 fig_rsi.update_yaxes(range=[0, 100])
                 st.plotly_chart(fig_rsi, use_container_width=True)
+            elif len(data) > 200:
+                st.warning("Indicateurs techniques indisponibles pour cet actif.")
             else:
                 st.warning("Pas assez de données historiques (< 200 jours) pour calculer les indicateurs techniques.")
 
@@ -2,11 +2,11 @@
 
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 from datetime import datetime
 import os
 import pytz
-import plotly.express as px
+from noyau import get_hourly_bars
+from predictions import evaluate_pending
 
 # --- Configuration et Constantes ---
 st.set_page_config(layout="wide", page_title="Performance de l'IA")
@@ -55,7 +55,7 @@ def save_log(df):
         return False
 
 def update_predictions_log(df):
-    """Met à jour les prédictions arrivées à échéance. Logique optimisée."""
+    """Met à jour les prédictions arrivées à échéance (évaluation : predictions.evaluate_pending)."""
     now_utc = datetime.now(pytz.UTC)
     
     updates_needed = df[df['Statut'].eq('En attente') & df['Date Cible'].lt(now_utc)].copy()
@@ -63,45 +63,24 @@ def update_predictions_log(df):
     if updates_needed.empty:
         return df, 0
 
-    tickers_to_fetch = updates_needed['Ticker'].unique()
+    # Plage des dates cibles de chaque ticker, calculée en un seul regroupement
+    target_bounds = updates_needed.groupby('Ticker')['Date Cible'].agg(['min', 'max'])
     data_cache = {}
 
     with st.status(f"Mise à jour de {len(updates_needed)} prédictions...", expanded=True) as status:
-        for ticker in tickers_to_fetch:
-            status.update(label=f"Téléchargement des données pour **{ticker}**...")
-            min_date = updates_needed[updates_needed['Ticker'] == ticker]['Date Cible'].min() - pd.Timedelta(days=1)
-            max_date = updates_needed[updates_needed['Ticker'] == ticker]['Date Cible'].max() + pd.Timedelta(days=1)
+        for ticker, bounds in target_bounds.iterrows():
+            status.update(label=f"Lecture des bougies horaires de **{ticker}**...")
+            min_date = bounds['min'] - pd.Timedelta(days=1)
+            max_date = bounds['max'] + pd.Timedelta(days=1)
+            # Magasin horaire local (le fournisseur n'est appelé que s'il n'est pas à jour)
             try:
-                data = yf.download(ticker, start=min_date, end=max_date, interval="1h", progress=False)
-                if isinstance(data.columns, pd.MultiIndex):
-                     data.columns = [col[0] for col in data.columns]
-                data_cache[ticker] = data
+                data_cache[ticker] = get_hourly_bars(ticker, start=min_date, end=max_date)
             except Exception:
                 data_cache[ticker] = None
 
+        # Évaluation groupée : une jointure au plus proche pour toutes les prédictions, puis un calcul vectorisé
         status.update(label="Évaluation des prédictions...")
-        for index, row in updates_needed.iterrows():
-            ticker_data = data_cache.get(row['Ticker'])
-            if ticker_data is None or ticker_data.empty:
-                df.loc[index, 'Statut'] = "Erreur (pas de data)"
-                continue
-            
-            try:
-                target_date_utc = row['Date Cible']
-                closest_time_index = ticker_data.index.get_loc(target_date_utc, method='nearest')
-                real_price = ticker_data.iloc[closest_time_index]['Close']
-                error_pct = ((real_price - row['Prix Prédit']) / row['Prix Actuel']) * 100
-                predicted_up = row['Prix Prédit'] > row['Prix Actuel']
-                real_up = real_price > row['Prix Actuel']
-
-                df.loc[index, 'Prix Réel'] = real_price
-                df.loc[index, 'Erreur (%)'] = error_pct
-                df.loc[index, 'Direction Correcte'] = (predicted_up == real_up)
-                df.loc[index, 'Dans Marge 5%'] = abs(error_pct) <= 5
-                df.loc[index, 'Dans Marge 10%'] = abs(error_pct) <= 10
-                df.loc[index, 'Statut'] = "Évaluée"
-            except Exception:
-                df.loc[index, 'Statut'] = "Erreur MàJ"
+        df, _ = evaluate_pending(df, data_cache, now_utc)
         status.update(label="Mise à jour terminée !", state="complete")
     return df, len(updates_needed)
 
@@ -148,6 +127,7 @@ else:
         st.subheader("Performance par Horizon de Prédiction")
         if not completed.empty:
             perf_by_horizon = completed.groupby('Horizon')['Direction Correcte'].mean().mul(100).sort_index()
+            import plotly.express as px  # Import tardif : seulement quand il y a des résultats à tracer
             fig = px.bar(perf_by_horizon, title="Taux de Succès de la Direction par Horizon", labels={'value': 'Taux de Succès (%)', 'Horizon': 'Horizon'})
             fig.update_layout(yaxis_range=[0, 100])
             st.plotly_chart(fig, use_container_width=True)
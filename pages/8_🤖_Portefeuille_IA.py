@@ -2,7 +2,7 @@
 
 import streamlit as st
 import pandas as pd
-from utils import run_ai_portfolio_turn, load_data, get_eur_usd_rate
+from utils import run_ai_portfolio_turn, get_latest_closes, get_eur_usd_rate
 import json
 from datetime import datetime
 
@@ -40,10 +40,11 @@ st.header("Synthèse du Portefeuille de l'IA")
 total_valeur_positions_eur = 0
 if portfolio['positions_ouvertes']:
     rate = get_eur_usd_rate()
+    # Tous les derniers cours d'un coup, lus dans le panel partagé plutôt que fichier par fichier
+    latest_closes = get_latest_closes([pos['Ticker'] for pos in portfolio['positions_ouvertes']])
     for pos in portfolio['positions_ouvertes']:
-        data = load_data(pos['Ticker'])
-        if not data.empty:
-            total_valeur_positions_eur += (pos['quantite'] * data['Close'].iloc[-1]) / rate
+        if pd.notna(latest_closes[pos['Ticker']]):
+            total_valeur_positions_eur += (pos['quantite'] * latest_closes[pos['Ticker']]) / rate
 
 valeur_totale_portefeuille = portfolio['capital_disponible_eur'] + total_valeur_positions_eur
 pnl_global = valeur_totale_portefeuille - 10000.0
@@ -0,0 +1,51 @@
+# pipeline.py
+# Exécution d'un cycle en plusieurs étapes dans un seul processus.
+# Chaque étape reçoit les résultats en mémoire des étapes précédentes ; une étape en échec
+# n'arrête que celles qui en dépendent, les étapes indépendantes s'exécutent quand même.
+# En option, chaque étape est profilée (voir profilage.py).
+
+import logging
+import time
+
+import profilage
+
+class Stage:
+    """Étape du pipeline : `fn(results)` reçoit le dict {nom d'étape: résultat} des étapes déjà réussies.
+    `requires` liste les étapes qui doivent avoir réussi pour que celle-ci soit lancée."""
+
+    def __init__(self, name, fn, requires=()):
+        self.name = name
+        self.fn = fn
+        self.requires = tuple(requires)
+
+def run_pipeline(stages, profiler=None, top_n=profilage.TOP_N):
+    """Exécute les étapes dans l'ordre.
+    Retourne (results, records) : les résultats des étapes réussies, et pour chaque étape
+    un dict {name, status ('ok', 'failed' ou 'skipped'), duration_s, error}.
+    Avec `profiler` ('cprofile' ou 'echantillonnage'), chaque étape réussie reçoit aussi
+    `profile` : ses `top_n` fonctions les plus coûteuses."""
+    results, records, statuses = {}, [], {}
+    for stage in stages:
+        missing = [name for name in stage.requires if statuses.get(name) != 'ok']
+        if missing:
+            statuses[stage.name] = 'skipped'
+            records.append({"name": stage.name, "status": 'skipped', "duration_s": 0.0, "error": f"dépend de {', '.join(missing)}"})
+            logging.warning(f"Étape '{stage.name}' ignorée : {', '.join(missing)} n'a pas réussi.")
+            continue
+
+        logging.info(f"--- Démarrage de l'étape : {stage.name} ---")
+        start = time.perf_counter()
+        hot = None
+        try:
+            if profiler: results[stage.name], hot = profilage.profile_call(lambda: stage.fn(results), profiler, top_n)
+            else: results[stage.name] = stage.fn(results)
+            status, error = 'ok', None
+        except Exception as e:
+            status, error = 'failed', str(e) or type(e).__name__
+            logging.exception(f"ERREUR lors de l'étape '{stage.name}' : {error}")
+        duration = time.perf_counter() - start
+        statuses[stage.name] = status
+        records.append({"name": stage.name, "status": status, "duration_s": round(duration, 3), "error": error})
+        if profiler: records[-1]["profile"] = hot
+        logging.info(f"--- Étape {stage.name} : {status} en {duration:.1f}s ---")
+    return results, records
@@ -0,0 +1,310 @@
+# predictions.py
+# Prédictions XGBoost du générateur (page 5) sur données horaires, tous horizons en une passe :
+# les variables explicatives sont calculées une seule fois par ticker, chaque horizon n'ajoute que sa cible,
+# et tous les modèles sont entraînés à partir de la même DMatrix (construite une fois, puis découpée par horizon).
+# La ligne de prédiction est la dernière ligne de ces mêmes variables.
+# Le scan d'un secteur répartit les tickers sur un pool de processus : les variables de tous les tickers
+# sont placées une fois dans un bloc de mémoire partagée que chaque worker lit sans copie, les threads
+# d'XGBoost sont répartis entre les workers, et les résultats reviennent dans l'ordre où ils se terminent.
+# Avec un registre (registre_modeles.py), les modèles déjà entraînés sont réutilisés ou prolongés.
+# Sans Streamlit : run_sector_scan (scan complet d'un secteur) est exécuté en tâche de fond par taches.py.
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from indicateurs import IndicatorSpec
+from indicateurs_flux import StreamingEngine
+from registre_modeles import RegistryStats, data_version
+
+# --- Constantes ---
+HORIZONS = {"Court Terme (2h)": 2, "Intraday (8h)": 8, "1 Jour": 24, "2 Jours": 48, "1 Semaine": 168}
+FEATURES = ['hour', 'dayofweek', 'RSI_14', 'EMA_20', 'EMA_50']
+# Colonnes de la matrice d'un ticker : les variables, la clôture (dont on tire les cibles) et l'horodatage (secondes)
+COLUMNS = FEATURES + ['Close', 'Timestamp']
+CLOSE = len(FEATURES)
+TIMESTAMP = CLOSE + 1
+# Calculés par les indicateurs incrémentaux (indicateurs_flux) : mêmes formules que pandas_ta, sans la bibliothèque
+FEATURE_INDICATORS = [IndicatorSpec('rsi', length=14), IndicatorSpec('ema', length=20), IndicatorSpec('ema', length=50)]
+MIN_TRAINING_ROWS = 100
+# Mêmes paramètres que l'ancien XGBRegressor(objective='reg:squarederror', n_estimators=100, random_state=42)
+XGB_PARAMS = {"objective": "reg:squarederror", "seed": 42}
+NUM_BOOST_ROUND = 100
+# Prolongation d'un modèle enregistré : quelques arbres de plus, appris sur les bougies les plus récentes.
+# Au-delà de FULL_RETRAIN_EVERY prolongations ou FULL_RETRAIN_AGE secondes, il est réentraîné en entier.
+WARM_START_ROUNDS = 10
+RECENT_WINDOW = 240
+FULL_RETRAIN_EVERY = 24
+FULL_RETRAIN_AGE = 7 * 24 * 3600
+
+def feature_set_version():
+    """Empreinte des variables et des paramètres d'entraînement : la modifier invalide tous les modèles enregistrés."""
+    described = {"features": FEATURES, "indicators": [spec.describe() for spec in FEATURE_INDICATORS],
+                 "params": XGB_PARAMS, "rounds": NUM_BOOST_ROUND, "warm": [WARM_START_ROUNDS, RECENT_WINDOW]}
+    return hashlib.sha256(json.dumps(described, sort_keys=True).encode()).hexdigest()[:16]
+
+FEATURE_SET_VERSION = feature_set_version()
+
+def build_features(prices):
+    """Variables explicatives de chaque bougie horaire (colonnes FEATURES), plus la clôture."""
+    features = pd.DataFrame({'Close': prices['Close'], 'hour': prices.index.hour, 'dayofweek': prices.index.dayofweek,
+                             'Timestamp': prices.index.asi8 // 10**9}, index=prices.index)
+    indicators, _ = StreamingEngine(FEATURE_INDICATORS).run(prices)
+    return features.join(indicators)
+
+def feature_matrix(prices):
+    """Matrice (bougie × COLUMNS) des seules bougies aux variables complètes, en float64 contigu."""
+    features = build_features(prices)[COLUMNS]
+    return np.ascontiguousarray(features[features.notna().all(axis=1)].to_numpy(dtype='float64'))
+
+def _fit_horizon(matrix, values, hours, params, registry=None, ticker=None):
+    """Modèle d'un horizon et bilan de son obtention ({"outcome", "training_s", "saved_s"}).
+    Sans registre, entraînement complet. Avec registre : réutilisation si les données d'entraînement
+    sont identiques, prolongation sur la fenêtre récente si le modèle enregistré reste valable
+    (même jeu de variables, dernière bougie apprise toujours présente, pas trop ancien), sinon entraînement complet."""
+    import xgboost as xgb
+    rows = np.arange(len(values) - hours)
+    labels = values[hours:, CLOSE]
+    version = data_version(values[rows, :CLOSE], labels, values[rows, TIMESTAMP]) if registry is not None else None
+    meta = registry.load(ticker, hours) if registry is not None else None
+    if meta is not None and meta["feature_set"] != FEATURE_SET_VERSION: meta = None
+    if meta is not None and meta["data_version"] == version:
+        return xgb.Booster(model_file=meta["booster"]), {"outcome": 'reutilise', "training_s": 0.0, "saved_s": meta["full_training_s"]}
+
+    start = time.perf_counter()
+    warm = meta is not None and meta["increments"] < FULL_RETRAIN_EVERY and time.time() - meta["full_trained_epoch"] < FULL_RETRAIN_AGE \
+        and meta["last_bar"] in values[rows, TIMESTAMP]
+    if warm:
+        window = rows[-RECENT_WINDOW:]
+        train = matrix.slice(window); train.set_label(labels[window])
+        booster = xgb.train(params, train, num_boost_round=WARM_START_ROUNDS, xgb_model=xgb.Booster(model_file=meta["booster"]))
+        elapsed = time.perf_counter() - start
+        meta.update(increments=meta["increments"] + 1, trees=meta["trees"] + WARM_START_ROUNDS)
+        outcome = {"outcome": 'incremental', "training_s": elapsed, "saved_s": max(meta["full_training_s"] - elapsed, 0.0)}
+    else:
+        train = matrix.slice(rows); train.set_label(labels)
+        booster = xgb.train(params, train, num_boost_round=NUM_BOOST_ROUND)
+        elapsed = time.perf_counter() - start
+        meta = {"feature_set": FEATURE_SET_VERSION, "increments": 0, "trees": NUM_BOOST_ROUND, "full_training_s": round(elapsed, 4),
+                "full_trained_epoch": time.time(), "full_trained_at": datetime.now(timezone.utc).isoformat(timespec='seconds')}
+        outcome = {"outcome": 'complet', "training_s": elapsed, "saved_s": 0.0}
+    if registry is not None:
+        meta.update(data_version=version, last_bar=float(values[rows[-1], TIMESTAMP]), rows=len(rows))
+        registry.save(ticker, hours, booster, meta)
+    return booster, outcome
+
+def train_predict_matrix(values, horizons=HORIZONS, min_rows=MIN_TRAINING_ROWS, nthread=None, registry=None, ticker=None):
+    """Modèle par horizon sur une matrice de feature_matrix et prix prédit à chaque horizon depuis la dernière bougie.
+    La DMatrix est construite une fois ; chaque horizon en prend les lignes qui ont une cible
+    (toutes sauf les `h` dernières), sans reconvertir les données. Avec un `registry`, les modèles du
+    ticker sont repris du registre quand c'est possible (voir _fit_horizon).
+    Retourne ({horizon: prix prédit}, [bilan de chaque modèle]) ; prix None pour un horizon qui a moins
+    de `min_rows` bougies d'entraînement."""
+    import xgboost as xgb  # Import tardif : xgboost est lourd et seule la page 5 s'en sert
+    if len(values) == 0: return {label: None for label in horizons}, []
+    params = {**XGB_PARAMS, **({"nthread": nthread} if nthread else {})}
+    matrix = xgb.DMatrix(values[:, :CLOSE], feature_names=FEATURES, nthread=nthread or -1)
+    latest = matrix.slice([len(values) - 1])
+    predictions, outcomes = {}, []
+    for label, hours in horizons.items():
+        if len(values) - hours < min_rows: predictions[label] = None; continue
+        booster, outcome = _fit_horizon(matrix, values, hours, params, registry, ticker)
+        predictions[label] = float(booster.predict(latest)[0]); outcomes.append(outcome)
+    return predictions, outcomes
+
+def prediction_outcomes(current, predicted, real):
+    """Règles d'évaluation du suivi (page 6), sur des tableaux (une prédiction par élément) :
+    erreur en % du prix de départ, bonne direction, erreur dans la marge de 5 % et de 10 %."""
+    current, predicted, real = (np.asarray(a, dtype='float64') for a in (current, predicted, real))
+    error_pct = (real - predicted) / current * 100
+    return {"Erreur (%)": error_pct, "Direction Correcte": (predicted > current) == (real > current),
+            "Dans Marge 5%": np.abs(error_pct) <= 5, "Dans Marge 10%": np.abs(error_pct) <= 10}
+
+def train_predict_all(prices, horizons=HORIZONS, min_rows=MIN_TRAINING_ROWS, nthread=None):
+    """Prédictions de tous les horizons pour un ticker, à partir de ses bougies horaires (sans registre)."""
+    return train_predict_matrix(feature_matrix(prices), horizons, min_rows, nthread)[0]
+
+# --- Scan d'un secteur en parallèle ---
+_pools = {}
+
+def _get_pool(workers):
+    """Pool de processus gardé d'un scan à l'autre (les workers ont déjà importé xgboost).
+    Démarrage par `spawn` : Streamlit exécute les pages dans des threads, et un fork d'un processus
+    multi-thread (OpenMP d'XGBoost compris) peut se bloquer."""
+    if workers not in _pools:
+        for pool in _pools.values(): pool.shutdown(wait=False)
+        _pools.clear()
+        _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker)
+    return _pools[workers]
+
+def _init_worker():
+    import xgboost  # noqa: F401 (importé une fois par worker, pas à chaque ticker)
+
+def _train_shared(name, shape, start, length, horizons, min_rows, nthread, registry, ticker):
+    """Tâche d'un worker : entraîne les modèles d'un ticker sur sa tranche du bloc partagé, sans la copier."""
+    # Les workers `spawn` partagent le suivi des ressources du processus principal : c'est lui qui supprime le bloc
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        values = np.ndarray(shape, dtype='float64', buffer=block.buf)[start:start + length]
+        result = train_predict_matrix(values, horizons, min_rows, nthread, registry, ticker)
+        del values  # La vue doit disparaître avant de fermer le bloc
+        return result
+    finally:
+        block.close()
+
+def scan(prices_by_ticker, horizons=HORIZONS, workers=None, min_rows=MIN_TRAINING_ROWS, registry=None, stats=None):
+    """Prédictions de plusieurs tickers en parallèle. `prices_by_ticker` : {ticker: bougies horaires}.
+    Générateur qui rend (ticker, prix actuel, {horizon: prix prédit}) dans l'ordre d'achèvement.
+    Les variables sont calculées ici, une fois par ticker, puis copiées dans un seul bloc de mémoire partagée ;
+    chaque worker entraîne avec cpu_count // workers threads XGBoost, pour ne pas dépasser le nombre de cœurs.
+    Avec un `registry` (registre_modeles.ModelRegistry), le bilan de chaque modèle est ajouté à `stats` (RegistryStats)."""
+    stats = stats if stats is not None else RegistryStats()
+    matrices = {}
+    for ticker, prices in prices_by_ticker.items():
+        try:
+            values = feature_matrix(prices) if not prices.empty else None
+        except Exception as e:
+            logging.error(f"Variables non calculées pour {ticker} : {e}"); values = None
+        if values is not None and len(values): matrices[ticker] = values
+    cpus = os.cpu_count() or 1
+    workers = min(workers or cpus, len(matrices))
+    if workers <= 1:
+        for ticker, values in matrices.items():
+            predictions, outcomes = train_predict_matrix(values, horizons, min_rows, None, registry, ticker)
+            for outcome in outcomes: stats.record(**outcome)
+            yield ticker, values[-1, CLOSE], predictions
+        return
+
+    total = sum(len(values) for values in matrices.values())
+    block = shared_memory.SharedMemory(create=True, size=total * len(COLUMNS) * 8)
+    try:
+        shared = np.ndarray((total, len(COLUMNS)), dtype='float64', buffer=block.buf)
+        offsets, position = {}, 0
+        for ticker, values in matrices.items():
+            shared[position:position + len(values)] = values; offsets[ticker] = position; position += len(values)
+        del shared
+        nthread = max(1, cpus // workers)
+        pool = _get_pool(workers)
+        futures = {pool.submit(_train_shared, block.name, (total, len(COLUMNS)), offsets[ticker], len(values), horizons, min_rows, nthread, registry, ticker): ticker
+                   for ticker, values in matrices.items()}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                predictions, outcomes = future.result()
+                for outcome in outcomes: stats.record(**outcome)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool): _pools.clear()  # Un worker est mort : pool neuf au prochain scan
+                logging.error(f"Prédictions en échec pour {ticker} : {e}")
+                predictions = {label: None for label in horizons}
+            yield ticker, matrices[ticker][-1, CLOSE], predictions
+    finally:
+        block.close(); block.unlink()
+
+# --- Scan complet d'un secteur (tâche de fond, voir taches.py) ---
+# Fenêtre d'entraînement du scan : celle de l'ancien téléchargement (le magasin horaire en garde davantage)
+HOURLY_PERIOD = "60d"
+
+def get_hourly_data(ticker):
+    """Bougies horaires des HOURLY_PERIOD derniers jours, lues dans le magasin local (voir noyau.get_hourly_bars)."""
+    from noyau import get_hourly_bars
+    try:
+        data = get_hourly_bars(ticker, period=HOURLY_PERIOD)
+        if data.empty: return pd.DataFrame()
+        if not isinstance(data.index, pd.DatetimeIndex): data.index = pd.to_datetime(data.index)
+        return data
+    except Exception: return pd.DataFrame()
+
+def get_market_context():
+    """(RSI 14 du S&P 500, VIX) au moment du scan, NaN si indisponibles."""
+    from fournisseurs import get_provider
+    try:
+        spy = get_provider().history('^GSPC', period='3mo'); vix = get_provider().history('^VIX', period='3mo')
+        spy_rsi = StreamingEngine([IndicatorSpec('rsi', length=14)]).run(spy)[0]['RSI_14'].iloc[-1]; vix_value = vix['Close'].iloc[-1]
+        return spy_rsi, vix_value
+    except Exception: return np.nan, np.nan
+
+def create_log_entry(timestamp, ticker, horizon_label, predicted_price, current_price, market_context):
+    spy_rsi, vix_value = market_context
+    target_date = timestamp + pd.Timedelta(hours=HORIZONS[horizon_label])
+    return {
+        "Timestamp": timestamp, "Ticker": ticker, "Horizon": horizon_label, "Prix Actuel": current_price,
+        "Prix Prédit": predicted_price, "Date Cible": target_date, "Prix Réel": np.nan, "Erreur (%)": np.nan,
+        "Direction Correcte": pd.NA, "Dans Marge 5%": pd.NA, "Dans Marge 10%": pd.NA, "Statut": "En attente",
+        "SPY_RSI_au_lancement": spy_rsi, "VIX_au_lancement": vix_value
+    }
+
+def run_sector_scan(tickers, progress=None, registry=None):
+    """Scan complet d'une liste de tickers : téléchargement des bougies horaires, prédictions de tous les horizons
+    (modèles du registre local par défaut), lignes du tableau de la page 5 et entrées du journal de suivi.
+    `progress(fait, total, message)` est appelé à chaque ticker téléchargé puis terminé.
+    Retourne {"results": DataFrame (ordre du secteur), "log_entries", "stats" (bilan du registre), "prediction_time"}."""
+    from registre_modeles import ModelRegistry, append_history
+    progress = progress or (lambda done, total, message="": None)
+    tickers = list(tickers)
+    prediction_time = datetime.now()
+    hourly_by_ticker = {}
+    for j, ticker in enumerate(tickers):
+        progress(j, 2 * len(tickers), f"Téléchargement de {ticker}...")
+        hourly_data = get_hourly_data(ticker)
+        if not hourly_data.empty: hourly_by_ticker[ticker] = hourly_data
+    market_context = get_market_context()
+    registry_stats = RegistryStats()
+    all_results, log_entries = [], []
+    for j, (ticker, current_price, predicted_prices) in enumerate(scan(hourly_by_ticker, registry=registry or ModelRegistry(), stats=registry_stats)):
+        progress(len(tickers) + j + 1, len(tickers) + len(hourly_by_ticker), f"{ticker} terminé ({j + 1}/{len(hourly_by_ticker)})")
+        result_row = {"Actif": ticker, "Prix Actuel": current_price}
+        for horizon_label in HORIZONS:
+            predicted_price = predicted_prices[horizon_label]
+            if predicted_price is not None:
+                result_row[horizon_label] = ((predicted_price - current_price) / current_price) * 100
+                log_entries.append(create_log_entry(prediction_time, ticker, horizon_label, predicted_price, current_price, market_context))
+            else:
+                result_row[horizon_label] = np.nan
+        all_results.append(result_row)
+    all_results.sort(key=lambda row: tickers.index(row["Actif"]))  # Ordre du secteur, pas d'achèvement
+    progress(len(tickers) + len(hourly_by_ticker), len(tickers) + len(hourly_by_ticker), "Scan terminé")
+    append_history(registry_stats)
+    return {"results": pd.DataFrame(all_results), "log_entries": log_entries,
+            "stats": registry_stats.summary_line(), "prediction_time": prediction_time}
+
+# --- Évaluation des prédictions arrivées à échéance (page 6) ---
+def evaluate_pending(log, bars_by_ticker, now=None):
+    """Évalue d'un bloc les prédictions 'En attente' du journal dont la date cible est passée.
+    Une seule jointure au plus proche (merge_asof, par ticker) rattache chaque date cible à la bougie
+    horaire la plus proche dans `bars_by_ticker` ({ticker: bougies}), puis prix réel, erreur, direction
+    et marges sont calculés en une passe et écrits colonne par colonne.
+    Les tickers sans bougies passent en « Erreur (pas de data) ». Retourne (journal, nombre de prédictions traitées)."""
+    now = now if now is not None else pd.Timestamp.now(tz='UTC')
+    pending = log['Statut'].eq('En attente') & log['Date Cible'].lt(now)
+    if not pending.any(): return log, 0
+    targets = log.loc[pending, ['Ticker', 'Date Cible']].reset_index()
+    frames = [pd.DataFrame({'Ticker': ticker, 'Date Cible': bars.index.tz_convert('UTC') if bars.index.tz is not None else bars.index.tz_localize('UTC'),
+                            'Prix Réel': bars['Close'].to_numpy(dtype='float64')})
+              for ticker, bars in bars_by_ticker.items() if bars is not None and not bars.empty]
+    has_data = targets['Ticker'].isin([frame['Ticker'].iat[0] for frame in frames])
+    for col in ['Direction Correcte', 'Dans Marge 5%', 'Dans Marge 10%']: log[col] = log[col].astype(object)
+    log.loc[targets.loc[~has_data, 'index'], 'Statut'] = "Erreur (pas de data)"
+    if not has_data.any(): return log, int(pending.sum())
+
+    targets = targets[has_data].astype({'Date Cible': 'datetime64[ns, UTC]'})
+    bars = pd.concat(frames, ignore_index=True).astype({'Date Cible': 'datetime64[ns, UTC]'}).sort_values('Date Cible', kind='stable')
+    matched = pd.merge_asof(targets.sort_values('Date Cible', kind='stable'), bars, on='Date Cible', by='Ticker', direction='nearest').set_index('index')
+    rows = log.loc[matched.index]
+    outcomes = prediction_outcomes(rows['Prix Actuel'], rows['Prix Prédit'], matched['Prix Réel'])
+    found = matched['Prix Réel'].notna().to_numpy()
+    evaluated = matched.index[found]
+    log.loc[evaluated, 'Prix Réel'] = matched['Prix Réel'].to_numpy()[found]
+    for col, values in outcomes.items(): log.loc[evaluated, col] = values[found] if col == 'Erreur (%)' else values[found].astype(object)
+    log.loc[evaluated, 'Statut'] = "Évaluée"
+    log.loc[matched.index[~found], 'Statut'] = "Erreur MàJ"
+    return log, int(pending.sum())
@@ -0,0 +1,178 @@
+# profilage.py
+# Profilage des étapes du cycle horaire et historique de leurs durées.
+# Chaque cycle ajoute un enregistrement compact (durée et statut par étape) à un historique JSON Lines ;
+# en mode profilage, chaque étape y ajoute aussi ses N fonctions les plus coûteuses.
+# Deux profileurs : cProfile (exact, mais ralentit le code très appelé et ne voit que le thread de l'étape)
+# et un échantillonneur qui relève à intervalle fixe la pile de tous les threads, workers du collecteur
+# compris (surcoût quasi nul, résultats statistiques).
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+
+from historique import HISTORY_MAX_RUNS, append_jsonl, load_jsonl
+
+# --- Constantes ---
+HISTORY_FILE = "profils_cycle.jsonl"
+PROFILERS = ('cprofile', 'echantillonnage')
+TOP_N = 25
+SAMPLE_INTERVAL = 0.005
+
+def function_label(filename, lineno, name):
+    """Nom lisible et stable d'une fonction : chemin relatif au projet, ou aux deux derniers dossiers ailleurs."""
+    if filename.startswith('~') or filename.startswith('<'): return name  # Fonctions natives
+    path = os.path.relpath(filename) if os.path.abspath(filename).startswith(os.getcwd() + os.sep) else os.path.join(*filename.split(os.sep)[-2:])
+    return f"{path}:{lineno}({name})"
+
+def hot_functions_cprofile(profiler, top_n=TOP_N):
+    """N fonctions au temps propre le plus élevé, avec leur temps cumulé et leur nombre d'appels."""
+    stats = pstats.Stats(profiler).stats
+    rows = [{"function": function_label(*func), "calls": calls, "self_s": round(tottime, 4), "total_s": round(cumtime, 4)}
+            for func, (_, calls, tottime, cumtime, _) in stats.items()]
+    return sorted(rows, key=lambda row: row["self_s"], reverse=True)[:top_n]
+
+class StackSampler:
+    """Échantillonneur de pile : un thread relève toutes les `interval` secondes la pile de tous les autres threads.
+    Le temps propre d'une fonction est estimé par les échantillons où elle est au sommet d'une pile,
+    son temps total par ceux où elle apparaît n'importe où dans la pile. Les temps sont additionnés
+    sur tous les threads : avec un pool de workers, ils peuvent dépasser la durée de l'étape, et les
+    attentes (verrous, réseau) y apparaissent comme du temps passé."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.self_samples, self.total_samples = {}, {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id: continue
+                seen = set()
+                leaf = True
+                while frame is not None:
+                    code = frame.f_code
+                    label = function_label(code.co_filename, code.co_firstlineno, code.co_name)
+                    if leaf: self.self_samples[label] = self.self_samples.get(label, 0) + 1; leaf = False
+                    if label not in seen:  # Une fonction récursive ne compte qu'une fois par échantillon
+                        seen.add(label); self.total_samples[label] = self.total_samples.get(label, 0) + 1
+                    frame = frame.f_back
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set(); self._thread.join()
+
+    def hot_functions(self, top_n=TOP_N):
+        """N fonctions au temps propre estimé le plus élevé."""
+        rows = [{"function": label, "calls": None, "self_s": round(self.self_samples.get(label, 0) * self.interval, 4),
+                 "total_s": round(total * self.interval, 4)} for label, total in self.total_samples.items()]
+        return sorted(rows, key=lambda row: (row["self_s"], row["total_s"]), reverse=True)[:top_n]
+
+def profile_call(fn, profiler='cprofile', top_n=TOP_N):
+    """Appelle `fn()` sous le profileur choisi. Retourne (résultat, fonctions chaudes).
+    Si `fn` lève une exception, elle est propagée et le profil est perdu."""
+    if profiler == 'cprofile':
+        prof = cProfile.Profile()
+        result = prof.runcall(fn)
+        return result, hot_functions_cprofile(prof, top_n)
+    if profiler == 'echantillonnage':
+        with StackSampler() as sampler:
+            result = fn()
+        return result, sampler.hot_functions(top_n)
+    raise ValueError(f"Profileur inconnu : {profiler} (attendu : {', '.join(PROFILERS)})")
+
+# --- Historique ---
+def new_run_record(records, started_at, elapsed, profiler=None):
+    """Enregistrement compact d'un cycle : horodatage, durée totale et étapes (avec leur profil éventuel)."""
+    return {"started_at": started_at.isoformat(timespec='seconds'), "elapsed_s": round(elapsed, 3),
+            "profiler": profiler, "stages": records}
+
+def append_history(record, path=HISTORY_FILE, max_runs=HISTORY_MAX_RUNS):
+    """Ajoute un cycle à l'historique ; au-delà de `max_runs` cycles, les plus anciens sont retirés."""
+    append_jsonl(path, record, max_runs)
+
+def load_history(path=HISTORY_FILE):
+    return load_jsonl(path)
+
+def find_run(runs, ref):
+    """Cycle désigné par un indice (-1 = dernier, éventuellement parmi les seuls cycles profilés)
+    ou par le début de son horodatage."""
+    try:
+        return runs[int(ref)]
+    except ValueError:
+        matches = [run for run in runs if run["started_at"].startswith(ref)]
+        if not matches: raise ValueError(f"Aucun cycle ne correspond à '{ref}'.")
+        return matches[-1]
+
+def diff_runs(before, after, top_n=10):
+    """Écarts entre deux cycles : durée de chaque étape, puis fonctions chaudes dont le temps total
+    a le plus varié. Retourne une liste de lignes de texte."""
+    def pct(old, new): return f"{(new - old) / old * 100:+.0f}%" if old else "nouveau"
+    lines = [f"{before['started_at']} ({before['profiler'] or 'sans profil'}) -> {after['started_at']} ({after['profiler'] or 'sans profil'})",
+             f"{'Total':<24} {before['elapsed_s']:9.2f}s {after['elapsed_s']:9.2f}s {after['elapsed_s'] - before['elapsed_s']:+9.2f}s {pct(before['elapsed_s'], after['elapsed_s']):>8}"]
+    stages_before = {stage["name"]: stage for stage in before["stages"]}
+    for stage in after["stages"]:
+        old = stages_before.get(stage["name"])
+        old_duration = old["duration_s"] if old else 0.0
+        lines.append(f"{stage['name']:<24} {old_duration:9.2f}s {stage['duration_s']:9.2f}s {stage['duration_s'] - old_duration:+9.2f}s "
+                     f"{pct(old_duration, stage['duration_s']):>8}  {stage['status']}")
+
+    for stage in after["stages"]:
+        old = stages_before.get(stage["name"])
+        if not stage.get("profile") or not old or not old.get("profile"): continue
+        old_hot = {row["function"]: row for row in old["profile"]}
+        new_hot = {row["function"]: row for row in stage["profile"]}
+        deltas = []
+        for function in set(old_hot) | set(new_hot):
+            old_total = old_hot[function]["total_s"] if function in old_hot else 0.0
+            new_total = new_hot[function]["total_s"] if function in new_hot else 0.0
+            deltas.append((new_total - old_total, function, old_total, new_total))
+        deltas.sort(key=lambda row: abs(row[0]), reverse=True)
+        lines.append(f"\nÉtape {stage['name']} : fonctions dont le temps total a le plus varié")
+        for delta, function, old_total, new_total in deltas[:top_n]:
+            marker = " (nouvelle)" if function not in old_hot else (" (disparue)" if function not in new_hot else "")
+            lines.append(f"  {delta:+8.3f}s  {old_total:8.3f}s -> {new_total:8.3f}s  {function}{marker}")
+    return lines
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historique des durées et profils du cycle horaire.")
+    parser.add_argument('--history', default=HISTORY_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    list_parser = sub.add_parser('list', help="Liste les derniers cycles et la durée de chaque étape.")
+    list_parser.add_argument('--last', type=int, default=24)
+    show_parser = sub.add_parser('show', help="Affiche les fonctions chaudes d'un cycle profilé.")
+    show_parser.add_argument('run', nargs='?', default='-1', help="Indice (-1 = dernier) ou début d'horodatage.")
+    diff_parser = sub.add_parser('diff', help="Compare deux cycles (par défaut les deux derniers cycles profilés).")
+    diff_parser.add_argument('before', nargs='?', default='-2')
+    diff_parser.add_argument('after', nargs='?', default='-1')
+    diff_parser.add_argument('--top', type=int, default=10)
+    diff_parser.add_argument('--all', action='store_true', help="Choisir parmi tous les cycles, profilés ou non.")
+    args = parser.parse_args()
+
+    runs = load_history(args.history)
+    if args.command == 'list':
+        for run in runs[-args.last:]:
+            stages = "  ".join(f"{stage['name']}={stage['duration_s']:.1f}s{'' if stage['status'] == 'ok' else '(' + stage['status'] + ')'}" for stage in run["stages"])
+            print(f"{run['started_at']}  {run['elapsed_s']:7.1f}s  {run['profiler'] or '-':<15} {stages}")
+    else:
+        profiled = [run for run in runs if run["profiler"]]
+        if args.command == 'show':
+            run = find_run(profiled, args.run)
+            for stage in run["stages"]:
+                print(f"\nÉtape {stage['name']} ({stage['duration_s']:.2f}s, {stage['status']}, {run['profiler']})")
+                print(f"  {'propre':>9} {'total':>9} {'appels':>9}  fonction")
+                for row in stage.get("profile") or []:
+                    print(f"  {row['self_s']:8.3f}s {row['total_s']:8.3f}s {row['calls'] if row['calls'] is not None else '-':>9}  {row['function']}")
+        else:
+            pool = runs if args.all else profiled
+            print("\n".join(diff_runs(find_run(pool, args.before), find_run(pool, args.after), args.top)))
@@ -0,0 +1,133 @@
+# rapport_collecte.py
+# Rapport structuré d'une collecte : métriques par ticker (latence, lignes reçues et écrites,
+# octets, relances, erreur), totaux du run et percentiles de latence.
+# Chaque rapport est ajouté à un historique JSON Lines (un run par ligne), ce qui permet de suivre
+# le débit et les tickers lents d'un run horaire à l'autre sans fouiller les logs.
+
+import argparse
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from historique import HISTORY_MAX_RUNS, append_jsonl, load_jsonl
+
+# --- Constantes ---
+HISTORY_FILE = "rapports_collecte.jsonl"
+
+def latency_summary(values):
+    """Nombre, moyenne, p50, p95 et maximum d'une liste de latences (en secondes)."""
+    if not values: return {"count": 0, "mean": None, "p50": None, "p95": None, "max": None}
+    values = np.asarray(values, dtype=float)
+    return {"count": int(values.size), "mean": round(float(values.mean()), 4),
+            "p50": round(float(np.percentile(values, 50)), 4), "p95": round(float(np.percentile(values, 95)), 4),
+            "max": round(float(values.max()), 4)}
+
+class RunReport:
+    """Métriques d'une collecte, alimentées par le collecteur pendant le run (y compris depuis les workers).
+    Pour chaque ticker : source ('lot' ou 'individuel'), latency_s (durée de l'appel réseau réussi ;
+    pour un lot, celle du lot entier), rows_received, rows_written, bytes (taille du fichier réécrit),
+    retries et error (erreur définitive, ou None)."""
+
+    def __init__(self, **params):
+        self.params = params
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self.tickers = {}
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def record(self, ticker, **metrics):
+        """Met à jour les métriques d'un ticker. Les relances s'additionnent d'un passage à l'autre
+        (lot puis reprise individuelle), les autres champs sont remplacés."""
+        with self.lock:
+            entry = self.tickers.setdefault(ticker, {"source": None, "latency_s": None, "rows_received": 0,
+                                                     "rows_written": 0, "bytes": 0, "retries": 0, "error": None})
+            entry["retries"] += metrics.pop("retries", 0)
+            entry.update(metrics)
+
+    def record_batch(self, tickers, latency, retries=0, error=None):
+        """Enregistre un appel groupé : taille, latence, relances et erreur éventuelle."""
+        with self.lock:
+            self.batches.append({"tickers": len(tickers), "first": tickers[0], "last": tickers[-1],
+                                 "latency_s": round(latency, 4) if latency is not None else None,
+                                 "retries": retries, "error": error})
+
+    def to_dict(self, **extra):
+        """Rapport complet : paramètres, totaux, résumés de latence, lots et détail par ticker."""
+        with self.lock:
+            tickers = {ticker: dict(entry) for ticker, entry in sorted(self.tickers.items())}
+            batches = list(self.batches)
+        elapsed = time.perf_counter() - self._start
+        succeeded = [t for t, entry in tickers.items() if entry["error"] is None]
+        individual = [entry["latency_s"] for entry in tickers.values() if entry["source"] == "individuel" and entry["latency_s"] is not None]
+        for entry in tickers.values():
+            if entry["latency_s"] is not None: entry["latency_s"] = round(entry["latency_s"], 4)
+        totals = {"tickers": len(tickers), "succeeded": len(succeeded), "failed": len(tickers) - len(succeeded),
+                  "rows_received": sum(e["rows_received"] for e in tickers.values()),
+                  "rows_written": sum(e["rows_written"] for e in tickers.values()),
+                  "bytes": sum(e["bytes"] for e in tickers.values()),
+                  "retries": sum(e["retries"] for e in tickers.values()) + sum(b["retries"] for b in batches),
+                  "batches": len(batches),
+                  "tickers_per_s": round(len(succeeded) / elapsed, 2) if elapsed > 0 else None}
+        return {"started_at": self.started_at.isoformat(timespec='seconds'), "elapsed_s": round(elapsed, 3),
+                "params": self.params, **extra, "totals": totals,
+                "latency": latency_summary(individual),
+                "batch_latency": latency_summary([b["latency_s"] for b in batches if b["latency_s"] is not None]),
+                "batches": batches, "tickers": tickers}
+
+def summary_line(report):
+    """Résumé d'un rapport en une ligne, pour la sortie console et les logs."""
+    totals = report["totals"]
+    # En mode groupé, seuls les lots ont une latence propre
+    latency, label = (report["latency"], "latence") if report["latency"]["count"] else (report["batch_latency"], "latence des lots")
+    line = (f"{totals['succeeded']}/{totals['tickers']} tickers en {report['elapsed_s']:.1f}s ({totals['tickers_per_s']} tickers/s), "
+            f"{totals['rows_written']} lignes écrites, {totals['bytes'] / 1e6:.2f} Mo, {totals['retries']} relances")
+    if latency["count"]: line += f", {label} p50 {latency['p50']:.2f}s / p95 {latency['p95']:.2f}s"
+    return line
+
+def append_history(report, path=HISTORY_FILE, max_runs=HISTORY_MAX_RUNS):
+    """Ajoute un rapport à l'historique ; au-delà de `max_runs` runs, les plus anciens sont retirés."""
+    append_jsonl(path, report, max_runs)
+
+def load_history(path=HISTORY_FILE, last=None):
+    """Rapports de l'historique, du plus ancien au plus récent (les `last` derniers si précisé)."""
+    return load_jsonl(path, last)
+
+def slowest_tickers(reports, n=10):
+    """Tickers dont la latence individuelle médiane est la plus élevée sur les rapports donnés.
+    Retourne une liste de (ticker, latence médiane, nombre de runs, nombre d'échecs)."""
+    latencies, failures = {}, {}
+    for report in reports:
+        for ticker, entry in report["tickers"].items():
+            if entry["source"] == "individuel" and entry["latency_s"] is not None:
+                latencies.setdefault(ticker, []).append(entry["latency_s"])
+            if entry["error"] is not None: failures[ticker] = failures.get(ticker, 0) + 1
+    ranked = sorted(((t, float(np.median(v)), len(v), failures.get(t, 0)) for t, v in latencies.items()), key=lambda row: row[1], reverse=True)
+    return ranked[:n]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Historique des rapports de collecte.")
+    parser.add_argument('--last', type=int, default=24, help="Nombre de runs à afficher.")
+    parser.add_argument('--slowest', type=int, default=10, help="Nombre de tickers lents à afficher.")
+    parser.add_argument('--history', default=HISTORY_FILE)
+    args = parser.parse_args()
+
+    reports = load_history(args.history, args.last)
+    if not reports:
+        print("Aucun rapport de collecte.")
+    else:
+        print(f"{'Début':<26} {'Durée':>8} {'Tickers':>8} {'Échecs':>7} {'Lignes':>8} {'Ko':>8} {'t/s':>7} {'p50':>7} {'p95':>7}")
+        for report in reports:
+            totals = report["totals"]
+            latency = report["latency"] if report["latency"]["count"] else report["batch_latency"]
+            p50 = f"{latency['p50']:.2f}" if latency["p50"] is not None else "-"
+            p95 = f"{latency['p95']:.2f}" if latency["p95"] is not None else "-"
+            print(f"{report['started_at']:<26} {report['elapsed_s']:>7.1f}s {totals['tickers']:>8} {totals['failed']:>7} "
+                  f"{totals['rows_written']:>8} {totals['bytes'] / 1e3:>8.0f} {totals['tickers_per_s'] or 0:>7.1f} {p50:>7} {p95:>7}")
+        slow = slowest_tickers(reports, args.slowest)
+        if slow:
+            print(f"\nTickers les plus lents (latence médiane sur {len(reports)} runs) :")
+            for ticker, median, runs, failed in slow:
+                print(f"  {ticker:<12} {median:6.2f}s  ({runs} appels, {failed} échec(s))")
@@ -0,0 +1,126 @@
+# registre_modeles.py
+# Registre des modèles XGBoost horaires du générateur de prédictions, sur disque local :
+# un booster et ses métadonnées par (ticker, horizon), rattachés à la version du jeu de variables
+# et à l'empreinte des données d'entraînement. Un scan réutilise le modèle si rien n'a changé,
+# prolonge le boosting sur une fenêtre récente quand de nouvelles bougies sont arrivées, et réentraîne
+# entièrement à intervalle régulier. Chaque scan ajoute son bilan (taux de réutilisation, temps économisé)
+# à un historique.
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from historique import HISTORY_MAX_RUNS, append_jsonl, load_jsonl
+
+# --- Constantes ---
+MODELS_DIR = "modeles"
+HISTORY_FILE = "historique.jsonl"
+OUTCOMES = ('reutilise', 'incremental', 'complet')
+
+def data_version(*arrays):
+    """Empreinte des données d'entraînement (variables, cibles et horodatages des bougies)."""
+    digest = hashlib.sha256()
+    for array in arrays: digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:16]
+
+class ModelRegistry:
+    """Modèles rangés par ticker : `<root>/<TICKER>/h<heures>.ubj` (booster) et `.json` (métadonnées).
+    Le registre n'est qu'un chemin : il peut être passé tel quel aux workers du scan."""
+
+    def __init__(self, root=MODELS_DIR):
+        self.root = root
+
+    def _path(self, ticker, hours, extension):
+        return os.path.join(self.root, ticker.upper(), f"h{hours}.{extension}")
+
+    def load(self, ticker, hours):
+        """Métadonnées du modèle enregistré, ou None. Le chemin du booster est dans meta["booster"]."""
+        try:
+            with open(self._path(ticker, hours, "json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        meta["booster"] = self._path(ticker, hours, "ubj")
+        return meta if os.path.exists(meta["booster"]) else None
+
+    def save(self, ticker, hours, booster, meta):
+        """Enregistre booster puis métadonnées (fichiers temporaires renommés : un scan concurrent
+        lit soit l'ancien modèle, soit le nouveau)."""
+        os.makedirs(os.path.join(self.root, ticker.upper()), exist_ok=True)
+        booster_path = self._path(ticker, hours, "ubj")
+        booster.save_model(booster_path + ".tmp.ubj")
+        os.replace(booster_path + ".tmp.ubj", booster_path)
+        meta_path = self._path(ticker, hours, "json")
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({k: v for k, v in meta.items() if k != "booster"}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def models(self):
+        """Métadonnées de tous les modèles enregistrés, avec leur ticker et leur horizon."""
+        found = []
+        if not os.path.isdir(self.root): return found
+        for ticker in sorted(os.listdir(self.root)):
+            if not os.path.isdir(os.path.join(self.root, ticker)): continue
+            for name in sorted(os.listdir(os.path.join(self.root, ticker))):
+                if name.startswith('h') and name.endswith('.json'):
+                    meta = self.load(ticker, int(name[1:-5]))
+                    if meta is not None: found.append({"ticker": ticker, "hours": int(name[1:-5]), **meta})
+        return sorted(found, key=lambda meta: (meta["ticker"], meta["hours"]))
+
+class RegistryStats:
+    """Bilan d'un scan : nombre de modèles réutilisés, prolongés ou réentraînés,
+    temps d'entraînement passé et temps économisé par rapport à un entraînement complet de chacun."""
+
+    def __init__(self):
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.training_s = 0.0
+        self.saved_s = 0.0
+
+    def record(self, outcome, training_s=0.0, saved_s=0.0):
+        self.counts[outcome] += 1
+        self.training_s += training_s
+        self.saved_s += saved_s
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def hit_rate(self):
+        return self.counts['reutilise'] / self.total() if self.total() else 0.0
+
+    def to_dict(self):
+        return {"at": datetime.now(timezone.utc).isoformat(timespec='seconds'), "models": self.total(), **self.counts,
+                "hit_rate": round(self.hit_rate(), 3), "training_s": round(self.training_s, 3), "saved_s": round(self.saved_s, 3)}
+
+    def summary_line(self):
+        if not self.total(): return "Aucun modèle entraîné."
+        return (f"{self.total()} modèles : {self.counts['reutilise']} réutilisés ({self.hit_rate():.0%}), "
+                f"{self.counts['incremental']} prolongés, {self.counts['complet']} entraînés en entier ; "
+                f"{self.training_s:.1f}s d'entraînement, ~{self.saved_s:.1f}s économisées")
+
+def append_history(stats, root=MODELS_DIR, max_runs=HISTORY_MAX_RUNS):
+    """Ajoute le bilan d'un scan à l'historique ; au-delà de `max_runs` scans, les plus anciens sont retirés."""
+    append_jsonl(os.path.join(root, HISTORY_FILE), stats.to_dict(), max_runs)
+
+def load_history(root=MODELS_DIR):
+    return load_jsonl(os.path.join(root, HISTORY_FILE))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registre des modèles du générateur de prédictions.")
+    parser.add_argument('--root', default=MODELS_DIR)
+    parser.add_argument('--last', type=int, default=10, help="Nombre de scans à afficher.")
+    args = parser.parse_args()
+
+    models = ModelRegistry(args.root).models()
+    print(f"{len(models)} modèles enregistrés.")
+    for meta in models:
+        print(f"{meta['ticker']:<10} {meta['hours']:>4}h  {meta['trees']:>4} arbres  {meta['increments']:>2} prolongations  "
+              f"entraînement complet le {meta['full_trained_at']}  ({meta['full_training_s']:.2f}s)")
+    runs = load_history(args.root)[-args.last:]
+    if runs: print(f"\n{'scan':<26}{'modèles':>8}{'réutil.':>9}{'prolong.':>9}{'complets':>9}{'entraîn.':>10}{'économ.':>10}")
+    for run in runs:
+        print(f"{run['at']:<26}{run['models']:>8}{run['hit_rate']:>9.0%}{run['incremental']:>9}{run['complet']:>9}"
+              f"{run['training_s']:>9.1f}s{run['saved_s']:>9.1f}s")
@@ -1,11 +1,16 @@
 # run_hourly_update.py
 
+import argparse
 import logging
-from datetime import datetime
-import subprocess
+import time
+from datetime import datetime, timezone
+
+import profilage
+from pipeline import Stage, run_pipeline
 
 # --- Configuration du Logging ---
 # On crée un log spécifique pour les mises à jour automatiques
+# (configuré avant tout import du collecteur : ses logs arrivent aussi dans ce fichier)
 logging.basicConfig(
     filename='hourly_update.log',
     level=logging.INFO,
@@ -14,46 +19,53 @@ logging.basicConfig(
     filemode='a' # On ajoute les logs les uns à la suite des autres
 )
 
-def run_script(script_name):
-    """Lance un script externe et logue sa sortie."""
-    try:
-        logging.info(f"--- Démarrage du script : {script_name} ---")
-        # On utilise subprocess pour lancer le script comme si on le faisait dans le terminal
-        result = subprocess.run(['python', script_name], capture_output=True, text=True, check=True)
-        logging.info(f"Sortie de {script_name}:\n{result.stdout}")
-        logging.info(f"--- {script_name} terminé avec succès ---")
-        return True
-    except subprocess.CalledProcessError as e:
-        logging.error(f"ERREUR lors de l'exécution de {script_name}.")
-        logging.error(f"Sortie d'erreur:\n{e.stderr}")
-        return False
-    except FileNotFoundError:
-        logging.error(f"ERREUR: Le script '{script_name}' est introuvable.")
-        return False
-
-def run_ai_decision():
-    """Importe et exécute la fonction de décision de l'IA."""
-    try:
-        from utils import run_ai_portfolio_turn # On importe le cerveau
-        logging.info("--- Démarrage du tour de décision de l'IA ---")
-        actions = run_ai_portfolio_turn()
-        logging.info(f"Actions de l'IA : {actions if actions else 'Aucune action nécessaire.'}")
-        logging.info("--- Tour de décision de l'IA terminé avec succès ---")
-    except Exception as e:
-        logging.error(f"ERREUR lors du tour de décision de l'IA : {e}")
+def run_collection(results):
+    """Met à jour les données du marché et retourne le rapport de collecte."""
+    import collecteur_propre # Import tardif : pandas et le fournisseur ne sont chargés qu'une fois, ici
+    report = collecteur_propre.main()
+    if report is None: raise RuntimeError("Aucun ticker à collecter.")
+    return report
+
+def run_ai_decision(results):
+    """Exécute le tour de décision de l'IA sur les données qui viennent d'être publiées."""
+    from noyau import run_ai_portfolio_turn, get_data_version # On importe le cerveau (sans Streamlit)
+    report = results.get('collecte')
+    if report is not None:
+        logging.info(f"Données utilisées : instantané {get_data_version()} ({report['totals']['succeeded']} tickers mis à jour).")
+    actions, errors = run_ai_portfolio_turn()
+    for error in errors: logging.error(error)
+    logging.info(f"Actions de l'IA : {actions if actions else 'Aucune action nécessaire.'}")
+    return actions
+
+# Étapes du cycle, dans l'ordre. Une étape n'est lancée que si celles de `requires` ont réussi.
+STAGES = [
+    Stage('collecte', run_collection),
+    Stage('decision_ia', run_ai_decision, requires=['collecte']),
+]
+
+def run_cycle(stages=STAGES, profiler=None, top_n=profilage.TOP_N):
+    """Exécute un cycle complet dans ce processus, logue le bilan de chaque étape
+    et ajoute les durées (et le profil éventuel) à l'historique des cycles."""
+    started_at, start = datetime.now(timezone.utc), time.perf_counter()
+    results, records = run_pipeline(stages, profiler=profiler, top_n=top_n)
+    for record in records:
+        logging.info(f"Bilan {record['name']:<12} {record['status']:<8} {record['duration_s']:7.1f}s" + (f"  ({record['error']})" if record['error'] else ""))
+    profilage.append_history(profilage.new_run_record(records, started_at, time.perf_counter() - start, profiler))
+    return results, records
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cycle de mise à jour horaire : collecte puis décision de l'IA.")
+    parser.add_argument('--profil', choices=profilage.PROFILERS, help="Profile chaque étape (voir python profilage.py show/diff).")
+    parser.add_argument('--top', type=int, default=profilage.TOP_N, help="Nombre de fonctions chaudes conservées par étape.")
+    args = parser.parse_args()
+
     logging.info("=============================================")
     logging.info("===== DÉBUT DU CYCLE DE MISE À JOUR HORAIRE =====")
     logging.info("=============================================")
-    
-    # 1. Mettre à jour les données du marché
-    # Assurez-vous que le nom du script ici est le bon !
-    if run_script('collecteur_propre.py'):
-        # 2. Si la collecte a réussi, on lance l'IA
-        run_ai_decision()
+
+    run_cycle(profiler=args.profil, top_n=args.top)
 
     logging.info("=============================================")
     logging.info("====== FIN DU CYCLE DE MISE À JOUR HORAIRE ======")
-    logging.info("=============================================\n")
\ No newline at end of file
+    logging.info("=============================================\n")
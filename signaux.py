@@ -0,0 +1,102 @@
+# signaux.py
+# Score du conseiller (croisement SMA 50/200, RSI, MACD, bandes de Bollinger) pour tout l'univers d'un coup.
+# Les indicateurs sont calculés en opérations sur tableaux à partir du panel (ticker × date) :
+# chaque ligne est d'abord recalée à droite sur ses seules séances cotées, pour que les fenêtres
+# glissantes portent sur les mêmes bougies que l'historique du ticker, puis seule la dernière séance est notée.
+# Les règles de score sont partagées avec noyau.read_ai_advisor_signal (un seul ticker, magasin d'indicateurs).
+
+import numpy as np
+import pandas as pd
+
+# --- Règles du conseiller ---
+BUY = "🟢 Renforcer"
+SELL = "🔴 Vendre"
+HOLD = "⚪ Conserver"
+INSUFFICIENT = "Données Insuffisantes"
+
+def score_signals(price, sma_50, sma_200, rsi, macd, macd_signal, bb_upper, bb_lower):
+    """Score du conseiller, de -5 à +5. Accepte des scalaires ou des tableaux (un score par élément)."""
+    score = np.where(sma_50 > sma_200, 2, -2)
+    score = score - (rsi > 70) + (rsi < 30)
+    score = score + np.where(macd > macd_signal, 1, -1)
+    score = score - (price > bb_upper) + (price < bb_lower)
+    return score
+
+def recommendation(score):
+    if score >= 3: return BUY
+    if score <= -3: return SELL
+    return HOLD
+
+# --- Indicateurs vectorisés ---
+def _pack_right(matrix):
+    """Recale chaque ligne à droite sur ses valeurs définies : la dernière colonne est la dernière séance
+    de chaque ticker, les séances manquantes (week-ends des actions, ticker plus récent) disparaissent.
+    Retourne (matrice recalée, nombre de valeurs définies par ligne)."""
+    valid = ~np.isnan(matrix)
+    counts = valid.sum(axis=1)
+    order = np.argsort(valid, axis=1, kind='stable')  # Cases vides d'abord, puis les valeurs dans l'ordre des dates
+    packed = np.take_along_axis(matrix, order, axis=1)
+    return packed[:, packed.shape[1] - counts.max():] if counts.size and counts.max() else packed[:, :0], counts
+
+def _last_sma(packed, length):
+    return packed[:, -length:].mean(axis=1) if packed.shape[1] >= length else np.full(len(packed), np.nan)
+
+def _ema(packed, length):
+    """EMA de pandas_ta (amorce par la SMA des `length` premières valeurs, puis adjust=False) sur chaque ligne
+    d'une matrice recalée à droite. Retourne la matrice complète : le MACD en a besoin pour son signal."""
+    width = packed.shape[1]
+    counts = (~np.isnan(packed)).sum(axis=1)
+    start = width - counts
+    seed_at = start + length - 1
+    seeded = counts >= length
+    rows = np.arange(len(packed))
+    window = np.clip(start[:, None] + np.arange(length), 0, max(width - 1, 0))
+    seed = packed[rows[:, None], window].mean(axis=1) if width else np.full(len(packed), np.nan)
+    values = np.where(np.arange(width)[None, :] < seed_at[:, None], np.nan, packed)
+    values[rows[seeded], seed_at[seeded]] = seed[seeded]
+    return pd.DataFrame(values.T).ewm(span=length, adjust=False).mean().to_numpy().T
+
+def _last_rma(values, length):
+    return pd.DataFrame(values.T).ewm(alpha=1.0 / length, min_periods=length).mean().to_numpy()[-1]
+
+def universe_indicators(closes):
+    """Dernière valeur des indicateurs du conseiller pour chaque ligne de `closes` (ticker × date, NaN hors séance).
+    Retourne un DataFrame aux noms de colonnes de pandas_ta, dans l'ordre des lignes."""
+    packed, _ = _pack_right(np.asarray(closes, dtype='float64'))
+    if packed.shape[1] == 0: packed = np.full((len(packed), 1), np.nan)
+    change = np.diff(packed, axis=1, prepend=np.nan)
+    gain = _last_rma(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), 14)
+    loss = _last_rma(np.where(change < 0, change, np.where(np.isnan(change), np.nan, 0.0)), 14)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = 100 * gain / (gain + np.abs(loss))
+    macd = _ema(packed, 12) - _ema(packed, 26)
+    macd_signal = _ema(macd, 9)[:, -1]
+    middle = _last_sma(packed, 20)
+    deviation = 2.0 * (packed[:, -20:].std(axis=1) if packed.shape[1] >= 20 else np.full(len(packed), np.nan))
+    return pd.DataFrame({'Close': packed[:, -1], 'SMA_50': _last_sma(packed, 50), 'SMA_200': _last_sma(packed, 200),
+                         'RSI_14': rsi, 'MACD_12_26_9': macd[:, -1], 'MACDs_12_26_9': macd_signal,
+                         'BBU_20_2.0': middle + deviation, 'BBL_20_2.0': middle - deviation})
+
+def score_universe(panel, tickers=None):
+    """Tableau des scores de tout l'univers du panel (ou des seuls `tickers`), du plus haut au plus bas.
+    À score égal, les tickers dont la SMA 50 est le plus au-dessus de la SMA 200 passent devant.
+    Les tickers de moins de 200 séances ont un score de 0 et la recommandation « Données Insuffisantes »."""
+    names = list(panel.tickers) if tickers is None else [t.upper() for t in tickers if panel.ticker(t) is not None]
+    rows = [panel.tickers.index(t) for t in names] if tickers is not None else slice(None)
+    table = universe_indicators(panel.field('Close')[rows])
+    table.index = pd.Index(names, name='Ticker')
+    sufficient = table['SMA_200'].notna().to_numpy()
+    scores = score_signals(table['Close'].to_numpy(), table['SMA_50'].to_numpy(), table['SMA_200'].to_numpy(),
+                           table['RSI_14'].to_numpy(), table['MACD_12_26_9'].to_numpy(), table['MACDs_12_26_9'].to_numpy(),
+                           table['BBU_20_2.0'].to_numpy(), table['BBL_20_2.0'].to_numpy())
+    table['Score'] = np.where(sufficient, scores, 0)
+    table['Tendance'] = table['SMA_50'] / table['SMA_200'] - 1
+    table['Recommandation'] = [recommendation(s) if ok else INSUFFICIENT for s, ok in zip(table['Score'], sufficient)]
+    return table.sort_values(['Score', 'Tendance'], ascending=False, na_position='last')
+
+def top_candidates(scores, k=5, exclude=(), recommendation_filter=BUY):
+    """Les `k` meilleurs tickers du tableau de score_universe ayant la recommandation voulue,
+    hors tickers de `exclude` (positions déjà ouvertes)."""
+    excluded = {t.upper() for t in exclude}
+    selected = scores[(scores['Recommandation'] == recommendation_filter) & ~scores.index.isin(excluded)]
+    return selected.head(k)
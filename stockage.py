@@ -0,0 +1,321 @@
+# stockage.py
+# Stockage des données de marché au format Parquet : un jeu de données partitionné par ticker
+# (data/prix/ticker=AAPL/part-0.parquet), colonnes typées et index Date conservé,
+# plus un panel dense de tout l'univers en tableaux NumPy projetés en mémoire (data/panel/),
+# les indicateurs techniques calculés par le collecteur (data/indicateurs/ticker=AAPL/part-0.parquet)
+# et un manifeste (data/manifest.json) qui décrit chaque fichier sans avoir à l'ouvrir.
+# Les bougies horaires ont leur propre magasin, hors des instantanés (donnees_horaires/ticker=AAPL/part-0.parquet) :
+# complété à chaque collecte, il garde plus d'historique que les 60 jours servis d'un coup par le fournisseur.
+# Il est hors de git : le workflow horaire le transmet d'un run à l'autre par le cache d'Actions.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# --- Constantes ---
+DATA_DIR = "data"
+PRICES_DATASET = "prix"
+INDICATORS_DATASET = "indicateurs"
+PART_FILE = "part-0.parquet"
+PRICE_DTYPES = {'Open': 'float64', 'High': 'float64', 'Low': 'float64', 'Close': 'float64', 'Volume': 'int64'}
+COMPRESSION = 'zstd'
+# Environ quatre ans de séances par groupe de lignes : les lectures partielles (tail, plage de dates)
+# sautent les groupes inutiles sans trop pénaliser la lecture complète
+ROW_GROUP_SIZE = 1024
+
+def ticker_path(ticker, data_dir=DATA_DIR):
+    """Chemin du fichier Parquet d'un ticker dans le jeu de données partitionné."""
+    return os.path.join(data_dir, PRICES_DATASET, f"ticker={ticker.upper()}", PART_FILE)
+
+def legacy_csv_path(ticker, data_dir=DATA_DIR):
+    """Chemin de l'ancien fichier CSV d'un ticker (avant la migration vers Parquet)."""
+    return os.path.join(data_dir, f"{ticker.upper()}.csv")
+
+def normalize_prices(df):
+    """Impose le schéma stocké : index Date trié sans doublon, colonnes OHLCV typées."""
+    df = df[[col for col in PRICE_DTYPES if col in df.columns]].copy()
+    if 'Volume' in df.columns: df['Volume'] = df['Volume'].fillna(0)
+    df = df.astype({col: dtype for col, dtype in PRICE_DTYPES.items() if col in df.columns})
+    df.index = pd.DatetimeIndex(df.index, name='Date')
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+def write_ticker(df, ticker, data_dir=DATA_DIR, manifest=None):
+    """Écrit (ou réécrit entièrement) le fichier d'un ticker.
+    L'écriture passe par un fichier temporaire renommé : un lecteur ne voit jamais de fichier partiel,
+    et un fichier partagé par lien physique avec un autre instantané n'est jamais modifié.
+    Avec un `manifest`, le fichier n'est pas réécrit si son contenu est identique à celui décrit,
+    sinon son entrée est mise à jour. Retourne True si le fichier a été écrit."""
+    path = ticker_path(ticker, data_dir)
+    df = normalize_prices(df)
+    digest = content_hash(df)
+    if manifest is not None:
+        entry = manifest["tickers"].get(ticker.upper())
+        if entry is not None and entry["sha256"] == digest and os.path.exists(path): return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    df.to_parquet(tmp_path, engine='pyarrow', compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+    if manifest is not None: manifest["tickers"][ticker.upper()] = manifest_entry(df, digest, manifest.get("version"), os.path.getsize(path))
+    return True
+
+def read_ticker(ticker, data_dir=DATA_DIR, columns=None, start=None, end=None, tail=None):
+    """Lit les données d'un ticker. Retombe sur l'ancien CSV tant que la migration n'a pas eu lieu.
+    Les filtres sont appliqués pendant la lecture Parquet plutôt qu'après coup :
+    - `columns` : seules ces colonnes sont décodées (l'index Date est toujours présent) ;
+    - `start` / `end` : bornes incluses sur la date, les groupes de lignes hors plage sont sautés ;
+    - `tail` : seules les dernières lignes sont lues, en partant des derniers groupes de lignes.
+    Lève FileNotFoundError si aucun fichier n'existe."""
+    path = ticker_path(ticker, data_dir)
+    columns = list(columns) if columns is not None else None
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    if not os.path.exists(path):
+        csv_path = legacy_csv_path(ticker, data_dir)
+        if not os.path.exists(csv_path): raise FileNotFoundError(path)
+        df = pd.read_csv(csv_path, index_col='Date', parse_dates=True, usecols=None if columns is None else ['Date'] + columns)
+        df = df.loc[start:end]
+        return df.tail(tail) if tail is not None else df
+
+    return _read_parquet(path, columns, start, end, tail)
+
+def _read_parquet(path, columns=None, start=None, end=None, tail=None):
+    """Lecture Parquet avec projection des colonnes et filtres sur l'index Date (voir read_ticker)."""
+    if tail is not None and end is None:
+        # On remonte les groupes de lignes depuis la fin jusqu'à en avoir assez
+        parquet_file = pq.ParquetFile(path)
+        groups, rows = [], 0
+        for i in reversed(range(parquet_file.num_row_groups)):
+            groups.insert(0, i); rows += parquet_file.metadata.row_group(i).num_rows
+            if rows >= tail: break
+        df = parquet_file.read_row_groups(groups, columns=columns, use_pandas_metadata=True).to_pandas()
+        return df.loc[start:].tail(tail)
+
+    filters = [('Date', '>=', start)] if start is not None else []
+    if end is not None: filters.append(('Date', '<=', end))
+    df = pq.read_table(path, columns=columns, filters=filters or None, use_pandas_metadata=True).to_pandas()
+    return df.tail(tail) if tail is not None else df
+
+def indicators_path(ticker, data_dir=DATA_DIR):
+    """Chemin du fichier des indicateurs techniques d'un ticker."""
+    return os.path.join(data_dir, INDICATORS_DATASET, f"ticker={ticker.upper()}", PART_FILE)
+
+def write_indicators(df, ticker, data_dir=DATA_DIR):
+    """Écrit les indicateurs d'un ticker (même schéma d'écriture que write_ticker)."""
+    path = indicators_path(ticker, data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df = df.astype('float64')
+    df.index = pd.DatetimeIndex(df.index, name='Date')
+    df.to_parquet(path + ".tmp", engine='pyarrow', compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+    os.replace(path + ".tmp", path)
+
+def read_indicators(ticker, data_dir=DATA_DIR, columns=None, start=None, end=None, tail=None):
+    """Lit les indicateurs d'un ticker, avec les mêmes filtres que read_ticker. Lève FileNotFoundError s'ils n'existent pas."""
+    path = indicators_path(ticker, data_dir)
+    if not os.path.exists(path): raise FileNotFoundError(path)
+    return _read_parquet(path, list(columns) if columns is not None else None,
+                         pd.Timestamp(start) if start is not None else None, pd.Timestamp(end) if end is not None else None, tail)
+
+def ticker_exists(ticker, data_dir=DATA_DIR):
+    return os.path.exists(ticker_path(ticker, data_dir)) or os.path.exists(legacy_csv_path(ticker, data_dir))
+
+def ticker_file_version(ticker, data_dir=DATA_DIR):
+    """Identifiant de version du fichier d'un ticker : chemin réel (qui change à chaque instantané),
+    date de modification et taille. None si le ticker n'a pas de fichier."""
+    for path in (ticker_path(ticker, data_dir), legacy_csv_path(ticker, data_dir)):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        return (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+    return None
+
+def list_stored_tickers(data_dir=DATA_DIR):
+    """Tickers présents dans le jeu de données Parquet."""
+    dataset_dir = os.path.join(data_dir, PRICES_DATASET)
+    if not os.path.isdir(dataset_dir): return []
+    return sorted(name.split('=', 1)[1] for name in os.listdir(dataset_dir) if name.startswith('ticker='))
+
+# --- Magasin des bougies horaires ---
+HOURLY_DIR = "donnees_horaires"
+# Date du dernier complément réussi de chaque ticker : les lecteurs savent jusqu'où le magasin fait foi
+HOURLY_STATE_FILE = "etat.json"
+
+def hourly_path(ticker, root=HOURLY_DIR):
+    return os.path.join(root, f"ticker={ticker.upper()}", PART_FILE)
+
+def write_hourly(df, ticker, root=HOURLY_DIR):
+    """Écrit les bougies horaires d'un ticker (schéma de write_ticker, index horodaté dans le fuseau du fournisseur)."""
+    path = hourly_path(ticker, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    normalize_prices(df).to_parquet(path + ".tmp", engine='pyarrow', compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE * 8)
+    os.replace(path + ".tmp", path)
+
+def read_hourly(ticker, root=HOURLY_DIR, start=None, end=None, columns=None):
+    """Bougies horaires stockées d'un ticker sur [start, end[ (bornes avec ou sans fuseau), DataFrame vide si absentes."""
+    from fournisseurs import slice_bars
+    path = hourly_path(ticker, root)
+    if not os.path.exists(path): return pd.DataFrame()
+    return slice_bars(pd.read_parquet(path, columns=list(columns) if columns is not None else None), start, end)
+
+def list_hourly_tickers(root=HOURLY_DIR):
+    """Tickers présents dans le magasin horaire."""
+    if not os.path.isdir(root): return []
+    return sorted(name.split('=', 1)[1] for name in os.listdir(root) if name.startswith('ticker='))
+
+def read_hourly_state(root=HOURLY_DIR):
+    """Dernier complément réussi de chaque ticker : {ticker: Timestamp UTC}."""
+    try:
+        with open(os.path.join(root, HOURLY_STATE_FILE), 'r', encoding='utf-8') as f:
+            return {ticker: pd.Timestamp(value) for ticker, value in json.load(f).items()}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def write_hourly_state(state, root=HOURLY_DIR):
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, HOURLY_STATE_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({ticker: pd.Timestamp(moment).isoformat() for ticker, moment in sorted(state.items())}, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+# --- Manifeste du dossier de données ---
+MANIFEST_FILE = "manifest.json"
+
+def content_hash(df):
+    """Empreinte SHA-256 du contenu d'un DataFrame normalisé (index, colonnes, types et valeurs).
+    Elle ne dépend pas de l'encodage Parquet : deux écritures du même contenu ont la même empreinte."""
+    digest = hashlib.sha256(json.dumps([list(df.columns), [str(t) for t in df.dtypes]]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def manifest_entry(df, digest, version, nbytes):
+    """Entrée du manifeste d'un ticker : empreinte, lignes, première et dernière date, taille,
+    et version de l'instantané où ce contenu a été écrit."""
+    return {"sha256": digest, "rows": len(df),
+            "first": df.index.min().strftime('%Y-%m-%d') if len(df) else None,
+            "last": df.index.max().strftime('%Y-%m-%d') if len(df) else None,
+            "bytes": nbytes, "version": version}
+
+def read_manifest(data_dir=DATA_DIR):
+    """Manifeste du dossier de données : {"version": ..., "tickers": {ticker: entrée}} (vide s'il n'existe pas)."""
+    try:
+        with open(os.path.join(data_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": None, "tickers": {}}
+
+def complete_manifest(manifest, data_dir=DATA_DIR):
+    """Ajoute au manifeste les tickers stockés qui n'y figurent pas encore (données antérieures au manifeste)
+    et retire ceux dont le fichier a disparu. Retourne le nombre d'entrées ajoutées ou retirées."""
+    stored = set(list_stored_tickers(data_dir))
+    removed = set(manifest["tickers"]) - stored
+    for ticker in removed: del manifest["tickers"][ticker]
+    added = len(removed)
+    for ticker in sorted(stored - set(manifest["tickers"])):
+        df = normalize_prices(pd.read_parquet(ticker_path(ticker, data_dir)))
+        manifest["tickers"][ticker] = manifest_entry(df, content_hash(df), manifest.get("version"), os.path.getsize(ticker_path(ticker, data_dir)))
+        added += 1
+    return added
+
+def write_manifest(manifest, data_dir=DATA_DIR):
+    """Écrit le manifeste (fichier temporaire renommé, comme les données)."""
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({"version": manifest.get("version"), "tickers": dict(sorted(manifest["tickers"].items()))}, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+# --- Panel de tout l'univers (projeté en mémoire) ---
+PANEL_DIR = "panel"
+PANEL_VALUES_FILE = "values.npy"
+PANEL_INDEX_FILE = "index.json"
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class PricePanel:
+    """Panel dense (ticker × date × champ OHLCV) aligné sur l'union des dates de tout l'univers.
+    `values` est un np.memmap en lecture seule : les pages du fichier sont partagées par le cache
+    du système entre toutes les sessions et processus, et les accesseurs renvoient des vues sans copie.
+    Les cases sans cotation (week-ends des actions, ticker plus récent...) valent NaN."""
+
+    def __init__(self, values, tickers, dates, fields, version=None):
+        self.values = values
+        self.tickers = tickers
+        self.dates = dates
+        self.fields = fields
+        self.version = version
+        self._positions = {ticker: i for i, ticker in enumerate(tickers)}
+
+    def field(self, name):
+        """Matrice (ticker × date) d'un champ, sous forme de vue."""
+        return self.values[:, :, self.fields.index(name)]
+
+    def ticker(self, ticker):
+        """Matrice (date × champ) d'un ticker, sous forme de vue, ou None s'il est absent du panel."""
+        position = self._positions.get(ticker.upper())
+        return None if position is None else self.values[position]
+
+    def last_valid(self, name='Close'):
+        """Dernière valeur connue d'un champ pour chaque ticker (Series indexée par ticker)."""
+        matrix = self.field(name)
+        valid = ~np.isnan(matrix)
+        last_idx = matrix.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+        last = matrix[np.arange(len(self.tickers)), last_idx]
+        return pd.Series(np.where(valid.any(axis=1), last, np.nan), index=self.tickers, name=name)
+
+def write_panel(data_dir=DATA_DIR, tickers=None):
+    """Construit le panel à partir du jeu de données Parquet de `data_dir` et l'écrit à côté.
+    Retourne (nombre de tickers, nombre de dates), ou None si le jeu de données est vide."""
+    tickers = tickers or list_stored_tickers(data_dir)
+    frames = {}
+    for ticker in tickers:
+        try: frames[ticker] = pd.read_parquet(ticker_path(ticker, data_dir), columns=PANEL_FIELDS)
+        except (FileNotFoundError, KeyError): continue
+    if not frames: return None
+    tickers = sorted(frames)
+    dates = pd.DatetimeIndex(sorted(set().union(*(frame.index for frame in frames.values()))), name='Date')
+
+    panel_dir = os.path.join(data_dir, PANEL_DIR)
+    os.makedirs(panel_dir, exist_ok=True)
+    # Temporaires propres à l'appelant : plusieurs sessions peuvent reconstruire le même panel en même temps (read_panel)
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    tmp_values = os.path.join(panel_dir, PANEL_VALUES_FILE + suffix)
+    values = np.lib.format.open_memmap(tmp_values, mode='w+', dtype='float64', shape=(len(tickers), len(dates), len(PANEL_FIELDS)))
+    for i, ticker in enumerate(tickers):
+        values[i] = frames[ticker].reindex(dates)[PANEL_FIELDS].to_numpy(dtype='float64')
+    values.flush(); del values
+
+    tmp_index = os.path.join(panel_dir, PANEL_INDEX_FILE + suffix)
+    with open(tmp_index, 'w', encoding='utf-8') as f:
+        json.dump({"tickers": tickers, "dates": [d.strftime('%Y-%m-%d') for d in dates], "fields": PANEL_FIELDS}, f)
+    os.replace(tmp_values, os.path.join(panel_dir, PANEL_VALUES_FILE))
+    os.replace(tmp_index, os.path.join(panel_dir, PANEL_INDEX_FILE))
+    return len(tickers), len(dates)
+
+def read_panel(data_dir=DATA_DIR, build=False):
+    """Ouvre le panel en projection mémoire, ou retourne None s'il n'a pas encore été construit.
+    Avec `build`, un panel absent est d'abord construit à partir du jeu de données : il n'est pas commité
+    avec l'instantané (données dérivées, une dizaine de Mo), un clone frais le reconstruit à la première lecture."""
+    # On résout le lien `data` une seule fois : tableau, index et version viennent du même instantané
+    data_dir = os.path.realpath(data_dir)
+    panel_dir = os.path.join(data_dir, PANEL_DIR)
+    if build and not os.path.exists(os.path.join(panel_dir, PANEL_INDEX_FILE)):
+        try:
+            write_panel(data_dir)
+        except OSError as e:
+            logging.warning(f"Panel de {data_dir} non construit : {e}")
+    try:
+        # L'index est écrit après le tableau : s'il existe, le tableau aussi
+        with open(os.path.join(panel_dir, PANEL_INDEX_FILE), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        values = np.load(os.path.join(panel_dir, PANEL_VALUES_FILE), mmap_mode='r')
+    except FileNotFoundError:
+        return None
+    version = None
+    version_path = os.path.join(data_dir, "VERSION")
+    if os.path.exists(version_path):
+        with open(version_path, 'r', encoding='utf-8') as f: version = f.read().strip() or None
+    return PricePanel(values, index["tickers"], pd.DatetimeIndex(index["dates"], name='Date'), index["fields"], version)
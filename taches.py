@@ -0,0 +1,255 @@
+# taches.py
+# Tâches de fond : les scans longs (prédictions de la page 5, recommandations d'analystes de la page 3)
+# sont soumis comme tâches et exécutés par un processus worker détaché, hors de la requête Streamlit.
+# Changer de page ou relancer le script ne perd plus le travail : l'état et l'avancement de chaque tâche
+# sont écrits dans taches/<id>.json, son résultat dans taches/<id>.pkl, gardé pendant une durée de vie (TTL).
+# Toute session, le job horaire ou un script lit le dernier résultat terminé sans rien recalculer.
+#
+#   python taches.py worker                   # exécute les tâches en attente (lancé automatiquement par submit)
+#   python taches.py liste                    # état des tâches récentes
+#   python taches.py soumettre recommandations AAPL MSFT
+
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import traceback
+from datetime import datetime, timezone
+
+import pandas as pd
+
+# --- Constantes ---
+JOBS_DIR = "taches"
+WORKER_LOCK = "worker.lock"
+WORKER_LOG = "worker.log"
+# Un worker sans tâche en attente s'arrête après ce délai ; submit en relance un au besoin
+WORKER_IDLE_TIMEOUT = 120
+POLL_INTERVAL = 1.0
+# Intervalle minimal entre deux écritures de l'avancement d'une tâche
+PROGRESS_INTERVAL = 0.5
+STATUSES = ('en_attente', 'en_cours', 'termine', 'echec')
+
+def _now():
+    return datetime.now(timezone.utc)
+
+def job_key(kind, params):
+    """Identifiant d'une demande : deux soumissions identiques partagent leurs tâches et leurs résultats."""
+    return hashlib.sha256(json.dumps([kind, params], sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+# --- Types de tâches ---
+def _run_predictions(params, progress):
+    import predictions  # Imports tardifs : le worker ne charge que ce dont la tâche a besoin
+    return predictions.run_sector_scan(params["tickers"], progress)
+
+def _run_recommendations(params, progress):
+    import noyau
+    return noyau.scan_analyst_recommendations(params["tickers"], progress)
+
+# {type: (fonction(params, progress) -> résultat, durée de vie du résultat en secondes)}
+JOB_KINDS = {
+    "predictions": (_run_predictions, 3600),
+    "recommandations": (_run_recommendations, 4 * 3600),
+}
+
+# --- Stockage des tâches ---
+class JobStore:
+    """Tâches rangées dans un dossier : `<id>.json` (état, avancement, dates) et `<id>.pkl` (résultat).
+    Chaque écriture passe par un fichier temporaire renommé : un lecteur ne voit jamais d'état partiel."""
+
+    def __init__(self, root=JOBS_DIR):
+        self.root = root
+
+    def _path(self, job_id, extension):
+        return os.path.join(self.root, f"{job_id}.{extension}")
+
+    def write(self, job):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(job["id"], "json")
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    def get(self, job_id):
+        try:
+            with open(self._path(job_id, "json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def jobs(self):
+        """Toutes les tâches, de la plus ancienne à la plus récente soumission."""
+        if not os.path.isdir(self.root): return []
+        jobs = [self.get(name[:-5]) for name in os.listdir(self.root) if name.endswith('.json')]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job["submitted_at"])
+
+    def write_result(self, job_id, result):
+        path = self._path(job_id, "pkl")
+        pd.to_pickle(result, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def read_result(self, job_id):
+        try:
+            return pd.read_pickle(self._path(job_id, "pkl"))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, job_id):
+        for extension in ("json", "pkl"):
+            try: os.remove(self._path(job_id, extension))
+            except FileNotFoundError: pass
+
+    def purge_expired(self):
+        """Supprime les tâches terminées (ou en échec) dont la durée de vie est écoulée. Retourne leur nombre."""
+        now = _now().isoformat()
+        expired = [job for job in self.jobs() if job["status"] in ('termine', 'echec') and job["expires_at"] < now]
+        for job in expired: self.delete(job["id"])
+        return len(expired)
+
+# --- Soumission et lecture ---
+def submit(kind, params, store=None, ttl=None, start_worker=True):
+    """Soumet une tâche et retourne son id. Si une tâche identique est déjà en attente ou en cours, c'est la sienne.
+    Un worker est lancé en arrière-plan s'il n'y en a pas déjà un."""
+    if kind not in JOB_KINDS: raise ValueError(f"Type de tâche inconnu : {kind} (attendu : {', '.join(JOB_KINDS)})")
+    store = store or JobStore()
+    key = job_key(kind, params)
+    active = [job for job in store.jobs() if job["key"] == key and job["status"] in ('en_attente', 'en_cours')]
+    if active: job_id = active[-1]["id"]
+    else:
+        submitted = _now()
+        job_id = f"{kind}-{submitted.strftime('%Y%m%dT%H%M%S%f')}-{key[:6]}"
+        store.write({"id": job_id, "kind": kind, "key": key, "params": params, "status": 'en_attente',
+                     "ttl_s": ttl if ttl is not None else JOB_KINDS[kind][1], "submitted_at": submitted.isoformat(),
+                     "started_at": None, "finished_at": None, "expires_at": None, "error": None,
+                     "progress": {"done": 0, "total": None, "message": "En attente d'un worker..."}})
+    if start_worker: ensure_worker(store)
+    return job_id
+
+def status(job_id, store=None):
+    """État d'une tâche (dict de son fichier JSON, avec `progress`), ou None si elle n'existe pas ou a expiré."""
+    return (store or JobStore()).get(job_id)
+
+def result(job_id, store=None):
+    """Résultat d'une tâche terminée, ou None."""
+    store = store or JobStore()
+    job = store.get(job_id)
+    return store.read_result(job_id) if job is not None and job["status"] == 'termine' else None
+
+def latest_job(kind, params=None, store=None, statuses=('termine',)):
+    """Tâche la plus récente d'un type (et de ces paramètres si donnés) parmi les états demandés,
+    hors résultats expirés. None s'il n'y en a pas."""
+    store = store or JobStore()
+    key = job_key(kind, params) if params is not None else None
+    now = _now().isoformat()
+    for job in reversed(store.jobs()):
+        if job["kind"] != kind or (key is not None and job["key"] != key) or job["status"] not in statuses: continue
+        if job["status"] == 'termine' and job["expires_at"] < now: continue
+        return job
+    return None
+
+def latest_result(kind, params=None, store=None):
+    """(tâche, résultat) du dernier scan terminé et non expiré, ou (None, None) : lecture immédiate, sans recalcul."""
+    store = store or JobStore()
+    job = latest_job(kind, params, store)
+    return (job, store.read_result(job["id"])) if job is not None else (None, None)
+
+# --- Worker ---
+def _try_lock(store):
+    """Verrou exclusif du worker : le descripteur ouvert si on l'obtient, None si un worker tourne déjà."""
+    os.makedirs(store.root, exist_ok=True)
+    handle = open(os.path.join(store.root, WORKER_LOCK), 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return handle
+    except BlockingIOError:
+        handle.close()
+        return None
+
+def ensure_worker(store=None):
+    """Lance un worker détaché (il survit à la session qui l'a lancé) si aucun ne tient le verrou.
+    Retourne True si un worker a été lancé."""
+    store = store or JobStore()
+    handle = _try_lock(store)
+    if handle is None: return False
+    handle.close()  # Le worker reprendra le verrou ; s'il est devancé par un autre, il s'arrête aussitôt
+    with open(os.path.join(store.root, WORKER_LOG), 'a') as log:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--root", store.root, "worker"],
+                         stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True)
+    return True
+
+def run_job(job, store):
+    """Exécute une tâche : état 'en_cours', avancement écrit au fil de l'eau, puis résultat et état final."""
+    job.update(status='en_cours', started_at=_now().isoformat())
+    job["progress"]["message"] = "Démarrage..."
+    store.write(job)
+    last_write = [0.0]
+
+    def progress(done, total, message=""):
+        job["progress"] = {"done": done, "total": total, "message": message}
+        if time.monotonic() - last_write[0] >= PROGRESS_INTERVAL or done == total:
+            store.write(job); last_write[0] = time.monotonic()
+
+    fn, _ = JOB_KINDS[job["kind"]]
+    try:
+        store.write_result(job["id"], fn(job["params"], progress))
+        job.update(status='termine', error=None)
+    except Exception as e:
+        logging.error(f"Tâche {job['id']} en échec : {e}\n{traceback.format_exc()}")
+        job.update(status='echec', error=str(e) or type(e).__name__)
+    finished = _now()
+    job.update(finished_at=finished.isoformat(), expires_at=datetime.fromtimestamp(finished.timestamp() + job["ttl_s"], timezone.utc).isoformat())
+    store.write(job)
+    return job
+
+def worker(store=None, idle_timeout=WORKER_IDLE_TIMEOUT):
+    """Boucle du worker : exécute les tâches en attente dans l'ordre de soumission, une à la fois
+    (un scan de prédictions répartit déjà son calcul sur les cœurs), et s'arrête après `idle_timeout`
+    secondes sans tâche. Une tâche restée 'en_cours' d'un worker interrompu est reprise."""
+    store = store or JobStore()
+    handle = _try_lock(store)
+    if handle is None: return 0  # Un autre worker tourne déjà
+    done = 0
+    try:
+        idle_since = time.monotonic()
+        # Au démarrage, personne d'autre ne tient le verrou : une tâche 'en_cours' vient d'un worker mort
+        for job in store.jobs():
+            if job["status"] == 'en_cours': job["status"] = 'en_attente'; store.write(job)
+        while time.monotonic() - idle_since < idle_timeout:
+            pending = [job for job in store.jobs() if job["status"] == 'en_attente']
+            if not pending:
+                time.sleep(POLL_INTERVAL); continue
+            run_job(pending[0], store); done += 1
+            store.purge_expired()
+            idle_since = time.monotonic()
+    finally:
+        handle.close()
+    return done
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Tâches de fond (scans longs).")
+    parser.add_argument('--root', default=JOBS_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+    worker_parser = sub.add_parser('worker', help="Exécute les tâches en attente.")
+    worker_parser.add_argument('--idle', type=float, default=WORKER_IDLE_TIMEOUT, help="Arrêt après ce nombre de secondes sans tâche.")
+    sub.add_parser('liste', help="État des tâches.")
+    submit_parser = sub.add_parser('soumettre', help="Soumet une tâche.")
+    submit_parser.add_argument('kind', choices=sorted(JOB_KINDS))
+    submit_parser.add_argument('tickers', nargs='+')
+    args = parser.parse_args()
+
+    store = JobStore(args.root)
+    if args.command == 'worker':
+        print(f"{worker(store, args.idle)} tâche(s) exécutée(s).")
+    elif args.command == 'soumettre':
+        print(submit(args.kind, {"tickers": [t.upper() for t in args.tickers]}, store))
+    else:
+        store.purge_expired()
+        for job in store.jobs():
+            progress = job["progress"]
+            done = f"{progress['done']}/{progress['total']}" if progress.get('total') else "-"
+            print(f"{job['id']:<48} {job['status']:<11} {done:>9}  {job['error'] or progress.get('message', '')}")
@@ -0,0 +1,73 @@
+# temps_demarrage.py
+# Mesure du temps d'import à froid du job horaire et de chaque page : chaque cible est importée
+# dans un interpréteur neuf (aucun module déjà chargé), plusieurs fois, et on garde la médiane.
+# Pour une page, seuls ses imports de premier niveau sont exécutés : c'est ce que paie chaque
+# ouverture de la page avant d'afficher quoi que ce soit (les imports tardifs ne comptent pas).
+# Avec --detail, les modules les plus coûteux sont relevés avec `python -X importtime`.
+
+import argparse
+import ast
+import glob
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Modules chargés par le job horaire (run_hourly_update.py importe ses étapes à leur lancement)
+CRON_IMPORTS = "import run_hourly_update\nimport collecteur_propre\nimport noyau\n"
+
+def top_level_imports(path):
+    """Instructions d'import de premier niveau d'un fichier, sous forme de code source."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))) + "\n"
+
+def targets():
+    """{nom: code d'import} : le job horaire, l'accueil et chaque page."""
+    found = {"job horaire": CRON_IMPORTS, "Accueil": top_level_imports(os.path.join(ROOT, "Accueil.py"))}
+    for path in sorted(glob.glob(os.path.join(ROOT, "pages", "*.py"))):
+        found[os.path.basename(path)[:-3]] = top_level_imports(path)
+    return found
+
+def _run(code, extra_args=()):
+    """Exécute `code` dans un interpréteur neuf, depuis un dossier vide (les imports n'écrivent rien dans le dépôt)."""
+    timed = "import time\n_t = time.perf_counter()\n" + code + "print(time.perf_counter() - _t)\n"
+    env = {**os.environ, "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    with tempfile.TemporaryDirectory() as cwd:
+        return subprocess.run([sys.executable, *extra_args, "-c", timed], cwd=cwd, env=env, capture_output=True, text=True)
+
+def measure(code, repeat=5):
+    """Médiane du temps d'import en secondes, ou (None, erreur) si l'import échoue."""
+    durations = []
+    for _ in range(repeat):
+        result = _run(code)
+        if result.returncode != 0: return None, result.stderr.strip().splitlines()[-1]
+        durations.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(durations), None
+
+def heaviest_modules(code, top_n=8):
+    """Modules de premier niveau au temps d'import cumulé le plus élevé (d'après -X importtime)."""
+    result = _run(code, ("-X", "importtime"))
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if len(name) - len(name.lstrip()) == 1: totals[name.strip()] = int(cumulative) / 1e6  # Importé directement par la cible
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top_n]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps d'import à froid du job horaire et des pages.")
+    parser.add_argument('cibles', nargs='*', help="Noms (ou débuts de noms) des cibles à mesurer (par défaut : toutes).")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--detail', action='store_true', help="Afficher les modules les plus coûteux de chaque cible.")
+    args = parser.parse_args()
+
+    for name, code in targets().items():
+        if args.cibles and not any(name.startswith(prefix) for prefix in args.cibles): continue
+        duration, error = measure(code, args.repeat)
+        print(f"{name:<45} {'échec : ' + error if error else f'{duration:6.2f}s'}")
+        if args.detail and not error:
+            for module, seconds in heaviest_modules(code):
+                print(f"    {seconds:6.3f}s  {module}")